@@ -0,0 +1,12 @@
+"""
+Flight-Tools benchmarks.
+
+synthetic_logs.py  -- generates synthetic .bin and .ulg logs of configurable duration, rate and message mix
+run_benchmarks.py  -- times each tool's extraction/render stages and writes JSON results
+
+Results document:
+    meta     -- timestamp, git revision, python and platform details
+    logs     -- {'bin'|'ulg': {'path', 'bytes', 'records'}}
+    results  -- one entry per tool and stage: seconds_median, seconds_min, repeat,
+                peak_rss_mb and, for extract/total stages, mb_per_s and records_per_s
+"""
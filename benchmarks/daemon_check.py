@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+daemon_check.py
+Check that the CLI tools really run in the warm daemon and print the same as a local run.
+
+A daemon is started on a private socket with a plain environment (as from a login shell), then
+each tool is run twice against synthetic logs: locally (FLIGHT_TOOLS_DAEMON=0) and through the
+daemon. Their output must match, the daemon's run counter must go up (the run was not refused
+and run locally instead), and the repeated runs must hit the daemon's decode cache.
+Exits non-zero on any failure, so it can gate CI.
+
+    python -m benchmarks.daemon_check
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+import subprocess
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.synthetic_logs import generate_bin_log, generate_ulg_log
+
+# tool -> log type it reads
+TOOLS = {
+    'ulg_info.py': 'ulg',
+    'ulg_parameter_list.py': 'ulg',
+    'bin_info.py': 'bin',
+    'bin_parameter_list.py': 'bin',
+}
+START_TIMEOUT = 60
+
+def _environment(socket_path):
+    env = {name: value for name, value in os.environ.items()
+           if name not in ('MAVLINK_DIALECT', 'MAVLINK20', 'FLIGHT_TOOLS_DAEMON', 'FLIGHT_TOOLS_IN_DAEMON')}
+    env['FLIGHT_TOOLS_SOCKET'] = socket_path
+    return env
+
+def _run(tool, log, env, workdir):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.join(ROOT_DIR, 'tools', tool), log],
+                            env=env, cwd=workdir, capture_output=True, text=True)
+    return result, time.perf_counter() - started
+
+def _daemon_status(env):
+    """The daemon's status reply, or None while it is not listening."""
+    from tools.daemon import _request
+    try:
+        return _request({'command': 'status'}, env['FLIGHT_TOOLS_SOCKET'], timeout=5)
+    except (OSError, ValueError):
+        return None
+
+def check_daemon(workdir, duration=60.0):
+    """Run every tool locally and through a fresh daemon; returns a list of failure messages."""
+    logs = {
+        'bin': generate_bin_log(os.path.join(workdir, 'check.bin'), duration=duration)['path'],
+        'ulg': generate_ulg_log(os.path.join(workdir, 'check.ulg'), duration=duration)['path'],
+    }
+    socket_path = os.path.join(workdir, 'daemon.sock')
+    env = _environment(socket_path)
+    local_env = dict(env, FLIGHT_TOOLS_DAEMON='0')
+
+    daemon = subprocess.Popen([sys.executable, os.path.join(ROOT_DIR, 'tools', 'daemon.py'), 'serve',
+                               '--socket', socket_path], env=env, cwd=workdir,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    failures = []
+    try:
+        deadline = time.monotonic() + START_TIMEOUT
+        while _daemon_status(env) is None:
+            if daemon.poll() is not None or time.monotonic() > deadline:
+                return [f"daemon did not start: {daemon.stdout.read()}"]
+            time.sleep(0.2)
+
+        for tool, log_type in TOOLS.items():
+            local, local_s = _run(tool, logs[log_type], local_env, workdir)
+            timings = []
+            problem = None
+            for _ in range(2):  # ✅ The second run reads the decoded log from the daemon's cache
+                before = _daemon_status(env)['runs']
+                warm, warm_s = _run(tool, logs[log_type], env, workdir)
+                timings.append(warm_s)
+                if _daemon_status(env)['runs'] != before + 1 or 'Daemon could not run' in warm.stderr:
+                    problem = f"not run by the daemon ({warm.stderr.strip()})"
+                elif (warm.returncode, warm.stdout) != (local.returncode, local.stdout):
+                    problem = "daemon output differs from the local run"
+                if problem:
+                    failures.append(f"{tool}: {problem}")
+                    break
+            print(f"{'❌' if problem else '✅'} {tool:<24}local {local_s:6.2f} s   "
+                  f"daemon {' / '.join(f'{t:.2f}' for t in timings)} s")
+
+        cache = _daemon_status(env)['decode_cache']
+        if not cache['hits']:
+            failures.append(f"repeated runs never hit the decode cache: {json.dumps(cache)}")
+    finally:
+        daemon.terminate()
+        daemon.wait(timeout=10)
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the CLI tools run in the warm daemon")
+    parser.add_argument("--duration", type=float, default=60.0, help="Synthetic log duration in seconds (default: 60)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="flight-tools-daemon-") as workdir:
+        failures = check_daemon(workdir, args.duration)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Every tool ran in the daemon with the same output as a local run")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+run_benchmarks.py
+Time the extraction and render stages of every Flight-Tools script against synthetic
+(or supplied) .bin and .ulg logs, and write machine-readable results as JSON.
+
+Each tool runs in a fresh process so its peak RSS is measured on its own, and every run reads
+its own link (or copy) of the log, so caches the tools write beside a log (parameter sets,
+segments, pyramids) never turn a later run into a cache hit.
+
+    python -m benchmarks.run_benchmarks --duration 1200 --output results.json
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import platform
+import tempfile
+import statistics
+import shutil
+import subprocess
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+# ✅ Enables execution from the repo root or benchmarks/ by patching sys.path
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.synthetic_logs import generate_bin_log, generate_ulg_log
+
+def _encode_png(fig):
+    import matplotlib.pyplot as plt
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png')
+    plt.close(fig)
+    return base64.b64encode(buffer.getvalue())
+
+class _Stages:
+    """Collects (stage, seconds) pairs in the order the stages ran."""
+
+    def __init__(self):
+        self.timings = []
+
+    def run(self, stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.timings.append((stage, time.perf_counter() - start))
+        return result
+
+# --- ArduPilot cases ---
+
+def bench_bin_info(path, stages):
+    from tools.bin_info import extract_bin_info
+    stages.run('extract', extract_bin_info, path)
+
+def bench_bin_parameter_list(path, stages):
+    from tools.bin_parameter_list import extract_parameters
+    stages.run('extract', extract_parameters, path)
+
+def bench_bin_power_plot(path, stages):
+    from tools.bin_power_plot import extract_power_data, generate_power_chart
+    timestamps, current, voltage, _ = stages.run('extract', extract_power_data, path)
+    fig = stages.run('render', generate_power_chart, timestamps, current, voltage)
+    stages.run('encode', _encode_png, fig)
+
+def bench_bin_range_signal(path, stages):
+    from tools.bin_range_signal import extract_signal_data, generate_range_signal_chart
+    rxrssi, rxlq, rad_rssi = stages.run('extract', extract_signal_data, path)
+    fig = stages.run('render', generate_range_signal_chart, rxrssi, rxlq, rad_rssi)
+    stages.run('encode', _encode_png, fig)
+
+def bench_bin_log_explorer(path, stages):
+    from tools.bin_log_explorer import parse_bin_file, get_fields_from_bin, extract_field_data_bin
+    _, messages_by_type = stages.run('extract', parse_bin_file, path)
+    stages.run('fields', get_fields_from_bin, messages_by_type, 'BAT')
+    stages.run('field_data', extract_field_data_bin, messages_by_type, 'BAT', 'Volt')
+
+def bench_bin_parameter_compare(path, stages):
+    from tools.bin_parameter_compare import compare_parameters
+    stages.run('extract', compare_parameters, path, path)
+
+def bench_bin_parquet_export(path, stages):
+    from tools.bin_parquet_export import export_bin_to_parquet
+    with tempfile.TemporaryDirectory() as output_dir:
+        stages.run('extract', export_bin_to_parquet, path, output_dir)
+
+# --- PX4 cases ---
+
+def bench_ulg_info(path, stages):
+    from tools.ulg_info import extract_ulg_info
+    stages.run('extract', extract_ulg_info, path)
+
+def bench_ulg_parameter_list(path, stages):
+    from tools.ulg_parameter_list import extract_parameters
+    stages.run('extract', extract_parameters, path)
+
+def bench_ulg_power_plot(path, stages):
+    from tools.ulg_power_plot import build_power_plot
+    fig, _ = stages.run('extract+render', build_power_plot, path)
+    stages.run('encode', _encode_png, fig)
+
+def bench_ulg_range_signal(path, stages):
+    from tools.ulg_range_signal import parse_ulg_log, generate_range_signal_chart
+    ctrl_rssi, ctrl_lq, telem_rssi, _ = stages.run('extract', parse_ulg_log, path)
+    fig = stages.run('render', generate_range_signal_chart, ctrl_rssi, ctrl_lq, telem_rssi)
+    stages.run('encode', _encode_png, fig)
+
+def bench_ulg_log_explorer(path, stages):
+    from tools.ulg_log_explorer import parse_ulg_file, get_fields_from_log, extract_field_data
+    ulog, _ = stages.run('extract', parse_ulg_file, path)
+    stages.run('fields', get_fields_from_log, ulog, 'battery_status')
+    stages.run('field_data', extract_field_data, ulog, 'battery_status', 'voltage_v')
+
+def bench_ulg_parameter_compare(path, stages):
+    from tools.ulg_parameter_compare import compare_parameters
+    stages.run('extract', compare_parameters, path, path)
+
+def bench_ulg_parquet_export(path, stages):
+    from tools.ulg_parquet_export import export_ulg_to_parquet
+    with tempfile.TemporaryDirectory() as output_dir:
+        stages.run('extract', export_ulg_to_parquet, path, output_dir)
+
+CASES = {
+    'bin': [
+        ('bin_info', bench_bin_info),
+        ('bin_parameter_list', bench_bin_parameter_list),
+        ('bin_power_plot', bench_bin_power_plot),
+        ('bin_range_signal', bench_bin_range_signal),
+        ('bin_log_explorer', bench_bin_log_explorer),
+        ('bin_parameter_compare', bench_bin_parameter_compare),
+        ('bin_parquet_export', bench_bin_parquet_export),
+    ],
+    'ulg': [
+        ('ulg_info', bench_ulg_info),
+        ('ulg_parameter_list', bench_ulg_parameter_list),
+        ('ulg_power_plot', bench_ulg_power_plot),
+        ('ulg_range_signal', bench_ulg_range_signal),
+        ('ulg_log_explorer', bench_ulg_log_explorer),
+        ('ulg_parameter_compare', bench_ulg_parameter_compare),
+        ('ulg_parquet_export', bench_ulg_parquet_export),
+    ],
+}
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # not available on Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def _private_copy(path, directory):
+    """path linked (or copied) into directory: the same bytes, with none of its caches."""
+    target = os.path.join(directory, os.path.basename(path))
+    try:
+        os.link(path, target)
+    except OSError:
+        shutil.copy2(path, target)
+    return target
+
+def _run_case(log_type, tool, path, repeat):
+    """Child process entry point: run one tool `repeat` times and return its timings."""
+    import matplotlib
+    matplotlib.use("Agg")  # ✅ Use non-GUI backend for benchmarks
+
+    func = dict(CASES[log_type])[tool]
+    runs = []
+    error = None
+    for _ in range(repeat):
+        stages = _Stages()
+        with tempfile.TemporaryDirectory(prefix="flight-tools-run-") as run_dir:
+            try:
+                func(_private_copy(path, run_dir), stages)
+            except Exception as e:
+                error = str(e)
+                break
+        runs.append(stages.timings)
+    return {'runs': runs, 'peak_rss_mb': _peak_rss_mb(), 'error': error}
+
+def _summarize(log_type, tool, log_info, outcome):
+    results = []
+    if outcome['error']:
+        return [{'log_type': log_type, 'tool': tool, 'error': outcome['error']}]
+
+    by_stage = {}
+    for run in outcome['runs']:
+        for stage, seconds in run:
+            by_stage.setdefault(stage, []).append(seconds)
+    by_stage['total'] = [sum(seconds for _, seconds in run) for run in outcome['runs']]
+
+    for stage, samples in by_stage.items():
+        median = statistics.median(samples)
+        entry = {
+            'log_type': log_type,
+            'tool': tool,
+            'stage': stage,
+            'seconds_median': round(median, 6),
+            'seconds_min': round(min(samples), 6),
+            'repeat': len(samples),
+            'peak_rss_mb': outcome['peak_rss_mb'],
+        }
+        # Throughput is only meaningful for stages that decode the log
+        if stage.startswith('extract') or stage == 'total':
+            entry['mb_per_s'] = round(log_info['bytes'] / 1e6 / median, 2) if median else None
+            entry['records_per_s'] = round(log_info['records'] / median) if median else None
+        results.append(entry)
+    return results
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run_benchmarks(logs, tools=None, repeat=3):
+    """
+    Benchmark every tool against the given logs.
+    logs  -- {'bin': {'path', 'bytes', 'records'}, 'ulg': {...}}
+    tools -- optional list of tool names to restrict the run
+    Returns the results document described in benchmarks/__init__.py.
+    """
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for log_type, log_info in logs.items():
+        for tool, _ in CASES[log_type]:
+            if tools and tool not in tools:
+                continue
+            # A fresh process per tool keeps peak RSS and import state independent
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                outcome = pool.submit(_run_case, log_type, tool, log_info['path'], repeat).result()
+            results.extend(_summarize(log_type, tool, log_info, outcome))
+            print(f"⏱️  {tool}: done", file=sys.stderr)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+        },
+        'logs': logs,
+        'results': results,
+    }
+
+def _print_table(document):
+    print(f"{'tool':<24}{'stage':<16}{'median s':>10}{'MB/s':>10}{'records/s':>12}{'peak MB':>10}")
+    for entry in document['results']:
+        if 'error' in entry:
+            print(f"{entry['tool']:<24}❌ {entry['error']}")
+            continue
+        print(f"{entry['tool']:<24}{entry['stage']:<16}{entry['seconds_median']:>10.3f}"
+              f"{entry.get('mb_per_s') or '':>10}{entry.get('records_per_s') or '':>12}"
+              f"{entry['peak_rss_mb'] if entry['peak_rss_mb'] is not None else '':>10}")
+
+def _count_records(path, log_type):
+    """Record count for user-supplied logs (generated logs report their own)."""
+    if log_type == 'bin':
+        from pymavlink import DFReader
+        reader = DFReader.DFReader_binary(path)
+        return sum(reader.counts)
+    from pyulog import ULog
+    ulog = ULog(path)
+    return sum(len(entry.data['timestamp']) for entry in ulog.data_list)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Flight-Tools extraction and render stages")
+    parser.add_argument("--bin", help="Use this .bin log instead of a synthetic one")
+    parser.add_argument("--ulg", help="Use this .ulg log instead of a synthetic one")
+    parser.add_argument("--duration", type=float, default=600.0, help="Synthetic log duration in seconds (default: 600)")
+    parser.add_argument("--rate-scale", type=float, default=1.0, help="Synthetic message rate multiplier (default: 1.0)")
+    parser.add_argument("--params", type=int, default=800, help="Synthetic parameter count (default: 800)")
+    parser.add_argument("--only", choices=["bin", "ulg"], help="Benchmark only one log type")
+    parser.add_argument("--tool", action="append", help="Benchmark only this tool (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per tool (default: 3)")
+    parser.add_argument("--workdir", help="Directory for synthetic logs (default: a temp directory)")
+    parser.add_argument("-o", "--output", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="flight-tools-bench-")
+    os.makedirs(workdir, exist_ok=True)
+
+    logs = {}
+    for log_type, supplied, generate in (('bin', args.bin, generate_bin_log), ('ulg', args.ulg, generate_ulg_log)):
+        if args.only and args.only != log_type:
+            continue
+        if supplied:
+            logs[log_type] = {'path': os.path.abspath(supplied), 'bytes': os.path.getsize(supplied),
+                              'records': _count_records(supplied, log_type)}
+        else:
+            path = os.path.join(workdir, f"synthetic_{int(args.duration)}s.{log_type}")
+            logs[log_type] = generate(path, duration=args.duration, rate_scale=args.rate_scale,
+                                      param_count=args.params)
+
+    document = run_benchmarks(logs, tools=args.tool, repeat=args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        _print_table(document)
+        print(f"✅ Results written to {args.output}")
+    else:
+        print(json.dumps(document, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+startup_budget.py
+Check the cold-start import time of every Flight-Tools entry point against a budget.
+
+Each entry point is imported in a fresh interpreter; the best of --repeat runs is compared with
+its budget, and heavy dependencies that must stay deferred until first use are checked too.
+Exits non-zero on any violation, so it can gate CI or a release.
+
+    python -m benchmarks.startup_budget
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Entry points are imported with the repo root as the working directory
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules that no entry point may import at module load
+DEFERRED_MODULES = ('matplotlib.pyplot', 'pandas', 'pymavlink.dialects')
+
+# entry point -> import budget in seconds (measured well below these on a laptop)
+BUDGETS = {
+    'tools.bin_info': 0.15,
+    'tools.bin_parameter_list': 0.15,
+    'tools.bin_range_signal': 0.15,
+    'tools.bin_power_plot': 0.30,
+    'tools.bin_log_explorer': 0.15,
+    'tools.bin_parameter_compare': 0.15,
+    'tools.bin_stream_decoder': 0.15,
+    'tools.ulg_info': 0.30,
+    'tools.ulg_parameter_list': 0.30,
+    'tools.ulg_range_signal': 0.30,
+    'tools.ulg_power_plot': 0.30,
+    'tools.ulg_log_explorer': 0.30,
+    'tools.ulg_parameter_compare': 0.30,
+    'tools.ulg_stream_decoder': 0.15,
+    'tools.flight_segments': 0.15,
+    'tools.field_pyramid': 0.15,
+    'tools.flight_report': 0.15,
+    'tools.fleet_parameter_compare': 0.15,
+    'tools.parameter_timeline': 0.15,
+    'tools.log_index': 0.15,
+    'webapp.app': 0.75,
+}
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+def measure(module, repeat=3):
+    """Best-of-repeat import time and any deferred modules loaded, each in a fresh interpreter."""
+    best = None
+    loaded = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, deferred=DEFERRED_MODULES)],
+                              cwd=ROOT_DIR, capture_output=True, text=True)
+        if proc.returncode != 0:
+            return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr else 'import failed'}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        best = result['seconds'] if best is None else min(best, result['seconds'])
+        loaded = result['loaded']
+    return {'seconds': best, 'loaded': loaded}
+
+def check_budgets(budgets=None, repeat=3, scale=1.0):
+    """Returns (rows, failures); scale multiplies every budget (for slow CI machines)."""
+    rows = []
+    failures = 0
+    for module, budget in (budgets or BUDGETS).items():
+        result = measure(module, repeat=repeat)
+        budget *= scale
+        if 'error' in result:
+            ok = False
+        else:
+            ok = result['seconds'] <= budget and not result['loaded']
+        failures += not ok
+        rows.append(dict(result, module=module, budget=budget, ok=ok))
+    return rows, failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if any entry point's cold import exceeds its budget")
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per entry point; the fastest counts (default: 3)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, e.g. 2.0 on slow CI runners")
+    parser.add_argument("--module", action="append", help="Check only this entry point (repeatable)")
+    args = parser.parse_args()
+
+    budgets = {m: BUDGETS[m] for m in args.module} if args.module else None
+    rows, failures = check_budgets(budgets, repeat=args.repeat, scale=args.scale)
+
+    print(f"{'entry point':<30}{'import s':>10}{'budget s':>10}")
+    for row in rows:
+        if 'error' in row:
+            print(f"❌ {row['module']:<28}{'':>10}{row['budget']:>10.2f}  {row['error']}")
+            continue
+        mark = "✅" if row['ok'] else "❌"
+        extra = f"  loads {', '.join(row['loaded'])} at import" if row['loaded'] else ""
+        print(f"{mark} {row['module']:<28}{row['seconds']:>10.3f}{row['budget']:>10.2f}{extra}")
+
+    if failures:
+        print(f"❌ {failures} entry point(s) over budget")
+        sys.exit(1)
+    print("✅ All entry points within their startup budget")
+
+if __name__ == "__main__":
+    main()
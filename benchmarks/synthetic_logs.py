@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+synthetic_logs.py
+Generate synthetic ArduPilot DataFlash (.bin) and PX4 ULog (.ulg) files for benchmarking.
+Duration, rate scale and message mix are configurable. Each log contains a simple flight:
+arm, takeoff, a mode change, a mid-flight parameter change, landing and disarm.
+"""
+
+import os
+import math
+import heapq
+import struct
+import argparse
+
+# --- DataFlash (.bin) ---
+
+BIN_HEAD = b'\xa3\x95'
+FMT_STRUCT = struct.Struct('<BB4s16s64s')
+
+# name -> (type id, format chars, columns)
+BIN_FORMATS = {
+    'FMT':  (128, 'BBnNZ', 'Type,Length,Name,Format,Columns'),
+    'UNIT': (177, 'QbZ', 'TimeUS,Id,Label'),
+    'MULT': (178, 'Qbd', 'TimeUS,Id,Mult'),
+    'FMTU': (179, 'QBNN', 'TimeUS,FmtType,UnitIds,MultIds'),
+    'PARM': (64, 'QNff', 'TimeUS,Name,Value,Default'),
+    'MSG':  (65, 'QZ', 'TimeUS,Message'),
+    'MODE': (66, 'QMBB', 'TimeUS,Mode,ModeNum,Rsn'),
+    'EV':   (67, 'QB', 'TimeUS,Id'),
+    'ARM':  (68, 'QBIBB', 'TimeUS,ArmState,ArmChecks,Forced,Method'),
+    'BAT':  (69, 'QBfffff', 'TimeUS,Inst,Volt,VoltR,Curr,CurrTot,EnrgTot'),
+    'XKF1': (70, 'QBccCfffffffccc', 'TimeUS,C,Roll,Pitch,Yaw,VN,VE,VD,dPD,PN,PE,PD,GX,GY,GZ'),
+    'RSSI': (71, 'QffI', 'TimeUS,RXRSSI,RXLQ,Flags'),
+    'RAD':  (72, 'QBBBBBHH', 'TimeUS,RSSI,RemRSSI,TxBuf,Noise,RemNoise,RxErrors,Fixed'),
+    'VIBE': (73, 'QBfffI', 'TimeUS,IMU,VibeX,VibeY,VibeZ,Clip'),
+    'GPS':  (74, 'QBBIHBcLLeffffB', 'TimeUS,I,Status,GMS,GWk,NSats,HDop,Lat,Lng,Alt,Spd,GCrs,VZ,Yaw,U'),
+}
+
+# DataFlash format char -> struct char (multiplied types are stored as scaled integers)
+BIN_STRUCT_CHARS = {
+    'a': '64s', 'b': 'b', 'B': 'B', 'h': 'h', 'H': 'H', 'i': 'i', 'I': 'I', 'f': 'f', 'd': 'd',
+    'n': '4s', 'N': '16s', 'Z': '64s', 'c': 'h', 'C': 'H', 'e': 'i', 'E': 'I', 'L': 'i',
+    'M': 'b', 'q': 'q', 'Q': 'Q',
+}
+
+# FMTU unit and multiplier ids for the types that carry them
+BIN_UNITS = {'BAT': ('s#vvAaJ', 'F-00000'), 'XKF1': ('s#ddhnnnnmmmkkk', 'F00000000000000')}
+
+# Default periodic message rates in Hz
+DEFAULT_BIN_RATES = {'BAT': 10.0, 'XKF1': 25.0, 'RSSI': 5.0, 'RAD': 1.0, 'VIBE': 10.0, 'GPS': 5.0}
+DEFAULT_ULG_RATES = {
+    'battery_status': 10.0,
+    'input_rc': 5.0,
+    'radio_status': 1.0,
+    'vehicle_local_position_setpoint': 25.0,
+    'vehicle_attitude': 50.0,
+    'vehicle_imu_status': 10.0,
+    'vehicle_gps_position': 5.0,
+}
+
+# Home position for the GPS records (degrees)
+HOME_LAT, HOME_LNG = -35.363262, 149.165237
+
+# Copter modes used for the MODE records: (name, number)
+BIN_MODES = [('Stabilize', 0), ('Loiter', 5), ('RTL', 6), ('Land', 9)]
+
+def _bin_struct(fmt_chars):
+    return struct.Struct('<' + ''.join(BIN_STRUCT_CHARS[c] for c in fmt_chars))
+
+def _encode(value):
+    return value.encode('ascii') if isinstance(value, str) else value
+
+class _BinWriter:
+    def __init__(self, handle):
+        self.handle = handle
+        self.structs = {}
+        self.records = 0
+
+    def define(self, name):
+        type_id, fmt_chars, columns = BIN_FORMATS[name]
+        packer = _bin_struct(fmt_chars)
+        self.structs[name] = (type_id, packer)
+        length = 3 + packer.size
+        body = FMT_STRUCT.pack(type_id, length, _encode(name), _encode(fmt_chars), _encode(columns))
+        self.handle.write(BIN_HEAD + bytes([128]) + body)
+        self.records += 1
+
+    def write(self, name, *values):
+        type_id, packer = self.structs[name]
+        self.handle.write(BIN_HEAD + bytes([type_id]) + packer.pack(*[_encode(v) for v in values]))
+        self.records += 1
+
+def _flight_profile(duration):
+    """Return (arm, takeoff, mode_change, param_change, land, disarm) times in seconds."""
+    return (duration * 0.05, duration * 0.08, duration * 0.4, duration * 0.5,
+            duration * 0.9, duration * 0.93)
+
+def _position(t, duration):
+    """A circle that drifts away from home, so range grows over the flight."""
+    radius = 20.0 + 400.0 * t / max(duration, 1.0)
+    return radius * math.cos(t / 30.0), radius * math.sin(t / 30.0), -min(t, 60.0)
+
+def _lat_lng(t, duration):
+    pn, pe, _ = _position(t, duration)
+    lat = HOME_LAT + pn / 111320.0
+    return lat, HOME_LNG + pe / (111320.0 * math.cos(math.radians(HOME_LAT)))
+
+def _vibration(t, armed):
+    return (12.0 + 6.0 * math.sin(t / 5.0), 11.0 + 5.0 * math.cos(t / 4.0), 18.0 + 8.0 * math.sin(t / 9.0)) if armed else (0.5, 0.5, 0.6)
+
+def _schedule(rates, duration):
+    heap = [(0.0, name, 1.0 / rate) for name, rate in rates.items() if rate > 0]
+    heapq.heapify(heap)
+    while heap:
+        t, name, period = heapq.heappop(heap)
+        if t > duration:
+            continue
+        yield t, name
+        heapq.heappush(heap, (t + period, name, period))
+
+def generate_bin_log(path, duration=600.0, rate_scale=1.0, rates=None, param_count=800):
+    """
+    Write a synthetic DataFlash log.
+    duration   -- log length in seconds
+    rate_scale -- multiplier applied to every periodic message rate
+    rates      -- {msg_type: Hz} overriding DEFAULT_BIN_RATES (0 disables a type)
+    Returns {'path', 'bytes', 'records'}.
+    """
+    rates = dict(DEFAULT_BIN_RATES, **(rates or {}))
+    rates = {name: hz * rate_scale for name, hz in rates.items()}
+    arm_t, takeoff_t, mode_t, param_t, land_t, disarm_t = _flight_profile(duration)
+
+    with open(path, 'wb') as handle:
+        writer = _BinWriter(handle)
+        for name in BIN_FORMATS:
+            writer.define(name)
+
+        for unit_id, label in (('s', 's'), ('v', 'V'), ('A', 'A'), ('a', 'Ah'), ('J', 'J'),
+                               ('d', 'deg'), ('h', 'degheading'), ('n', 'm/s'), ('m', 'm'),
+                               ('k', 'deg/s'), ('#', 'instance'), ('-', '')):
+            writer.write('UNIT', 0, ord(unit_id), label)
+        for mult_id, mult in (('0', 1.0), ('-', 0.0), ('F', 1e-6)):
+            writer.write('MULT', 0, ord(mult_id), mult)
+        for name, (unit_ids, mult_ids) in BIN_UNITS.items():
+            writer.write('FMTU', 0, BIN_FORMATS[name][0], unit_ids[:16], mult_ids[:16])
+
+        writer.write('MSG', 0, 'ArduCopter V4.5.7 (2a3dc4b7)')
+        for i in range(param_count):
+            writer.write('PARM', 1000, f"SYN_PARAM_{i:04d}"[:16], float(i % 97), float(i % 97))
+        writer.write('PARM', 1000, 'ATC_RAT_RLL_P', 0.135, 0.135)
+        writer.write('MODE', 2000, BIN_MODES[0][1], BIN_MODES[0][1], 0)
+
+        events = [
+            (arm_t, 'ARM'), (takeoff_t, 'TAKEOFF'), (mode_t, 'MODE'), (param_t, 'PARM'),
+            (land_t, 'LAND'), (disarm_t, 'DISARM'),
+        ]
+        event_idx = 0
+        energy = 0.0
+        last_t = 0.0
+        armed = False
+        for t, name in _schedule(rates, duration):
+            while event_idx < len(events) and events[event_idx][0] <= t:
+                ev_t, ev = events[event_idx]
+                time_us = int(ev_t * 1e6)
+                if ev == 'ARM':
+                    armed = True
+                    writer.write('ARM', time_us, 1, 0, 0, 0)
+                    writer.write('EV', time_us, 10)
+                elif ev == 'TAKEOFF':
+                    writer.write('EV', time_us, 28)
+                    writer.write('MODE', time_us, BIN_MODES[1][1], BIN_MODES[1][1], 1)
+                elif ev == 'MODE':
+                    writer.write('MODE', time_us, BIN_MODES[2][1], BIN_MODES[2][1], 1)
+                elif ev == 'PARM':
+                    writer.write('PARM', time_us, 'ATC_RAT_RLL_P', 0.150, 0.135)
+                elif ev == 'LAND':
+                    writer.write('MODE', time_us, BIN_MODES[3][1], BIN_MODES[3][1], 1)
+                    writer.write('EV', time_us, 18)
+                elif ev == 'DISARM':
+                    armed = False
+                    writer.write('ARM', time_us, 0, 0, 0, 0)
+                    writer.write('EV', time_us, 11)
+                event_idx += 1
+
+            time_us = int(t * 1e6)
+            if name == 'BAT':
+                current = 18.0 + 4.0 * math.sin(t / 7.0) if armed else 0.4
+                volt = 16.8 - 2.0 * t / max(duration, 1.0)
+                energy += volt * current * (t - last_t)
+                last_t = t
+                writer.write('BAT', time_us, 0, volt, volt + 0.1, current, energy / volt / 3.6, energy)
+            elif name == 'XKF1':
+                pn, pe, pd = _position(t, duration)
+                writer.write('XKF1', time_us, 0, 150, -120, int(t * 100) % 36000,
+                             1.0, 0.5, -0.1, 0.0, pn, pe, pd, 1, -2, 3)
+            elif name == 'RSSI':
+                writer.write('RSSI', time_us, 0.9 - 0.5 * t / max(duration, 1.0), 100.0 - 40.0 * t / max(duration, 1.0), 0)
+            elif name == 'RAD':
+                writer.write('RAD', time_us, 200 - int(80 * t / max(duration, 1.0)), 190, 99, 40, 41, 0, 0)
+            elif name == 'VIBE':
+                writer.write('VIBE', time_us, 0, *_vibration(t, armed), int(t) // 60 if armed else 0)
+            elif name == 'GPS':
+                lat, lng = _lat_lng(t, duration)
+                alt = 584.0 - _position(t, duration)[2]
+                writer.write('GPS', time_us, 0, 6, int(t * 1000) % 604800000, 2300, 17, 70,
+                             int(lat * 1e7), int(lng * 1e7), int(alt * 100), 8.0, 0.0, 0.0, 0.0, 1)
+
+    return {'path': path, 'bytes': os.path.getsize(path), 'records': writer.records}
+
+# --- ULog (.ulg) ---
+
+ULG_HEADER = b'ULog\x01\x12\x35'
+
+ULG_FORMATS = {
+    'battery_status': [('uint64_t', 'timestamp'), ('float', 'voltage_v'), ('float', 'current_a'),
+                       ('float', 'discharged_mah'), ('float', 'remaining')],
+    'input_rc': [('uint64_t', 'timestamp'), ('int32_t', 'rssi'), ('uint16_t', 'link_quality'),
+                 ('uint8_t', 'channel_count')],
+    'radio_status': [('uint64_t', 'timestamp'), ('uint8_t', 'rssi'), ('uint8_t', 'remote_rssi')],
+    'vehicle_local_position_setpoint': [('uint64_t', 'timestamp'), ('float', 'x'), ('float', 'y'),
+                                        ('float', 'z')],
+    'vehicle_attitude': [('uint64_t', 'timestamp'), ('float[4]', 'q')],
+    'vehicle_status': [('uint64_t', 'timestamp'), ('uint8_t', 'arming_state'), ('uint8_t', 'nav_state')],
+    'vehicle_land_detected': [('uint64_t', 'timestamp'), ('bool', 'landed'), ('bool', 'maybe_landed')],
+    'vehicle_imu_status': [('uint64_t', 'timestamp'), ('float', 'accel_vibration_metric'),
+                           ('float', 'gyro_vibration_metric')],
+    'vehicle_gps_position': [('uint64_t', 'timestamp'), ('int32_t', 'lat'), ('int32_t', 'lon'),
+                             ('int32_t', 'alt'), ('uint8_t', 'fix_type'), ('uint8_t', 'satellites_used')],
+}
+
+ULG_STRUCT_CHARS = {
+    'int8_t': 'b', 'uint8_t': 'B', 'int16_t': 'h', 'uint16_t': 'H', 'int32_t': 'i',
+    'uint32_t': 'I', 'int64_t': 'q', 'uint64_t': 'Q', 'float': 'f', 'double': 'd',
+    'bool': '?', 'char': 'c',
+}
+
+def _ulg_struct(fields):
+    chars = '<'
+    for type_str, _ in fields:
+        base, _, count = type_str.partition('[')
+        chars += (count.rstrip(']') if count else '') + ULG_STRUCT_CHARS[base]
+    return struct.Struct(chars)
+
+class _UlgWriter:
+    def __init__(self, handle):
+        self.handle = handle
+        self.records = 0
+
+    def message(self, msg_type, payload):
+        self.handle.write(struct.pack('<HB', len(payload), ord(msg_type)) + payload)
+        self.records += 1
+
+    def key_value(self, msg_type, type_str, key, value_bytes):
+        key_bytes = f"{type_str} {key}".encode('ascii')
+        self.message(msg_type, bytes([len(key_bytes)]) + key_bytes + value_bytes)
+
+    def parameter(self, name, value):
+        if isinstance(value, float):
+            self.key_value('P', 'float', name, struct.pack('<f', value))
+        else:
+            self.key_value('P', 'int32_t', name, struct.pack('<i', value))
+
+def generate_ulg_log(path, duration=600.0, rate_scale=1.0, rates=None, param_count=800):
+    """
+    Write a synthetic ULog file.
+    duration   -- log length in seconds
+    rate_scale -- multiplier applied to every periodic topic rate
+    rates      -- {topic: Hz} overriding DEFAULT_ULG_RATES (0 disables a topic)
+    Returns {'path', 'bytes', 'records'}.
+    """
+    rates = dict(DEFAULT_ULG_RATES, **(rates or {}))
+    rates = {name: hz * rate_scale for name, hz in rates.items()}
+    arm_t, takeoff_t, mode_t, param_t, land_t, disarm_t = _flight_profile(duration)
+    start_us = 1_000_000
+
+    with open(path, 'wb') as handle:
+        writer = _UlgWriter(handle)
+        handle.write(ULG_HEADER + b'\x01' + struct.pack('<Q', start_us))
+        writer.message('B', bytes(40))
+        writer.key_value('I', 'char[3]', 'sys_name', b'PX4')
+        writer.key_value('I', 'char[9]', 'ver_hw', b'SITL_SYNT')
+        writer.key_value('I', 'uint32_t', 'ver_sw_release', struct.pack('<I', 0x010F0000))
+
+        packers = {}
+        for name, fields in ULG_FORMATS.items():
+            spec = ';'.join(f"{type_str} {field}" for type_str, field in fields) + ';'
+            writer.message('F', f"{name}:{spec}".encode('ascii'))
+            packers[name] = _ulg_struct(fields)
+
+        for i in range(param_count):
+            writer.parameter(f"SYN_PARAM_{i:04d}", float(i % 97) if i % 2 else i % 97)
+        writer.parameter('MC_ROLLRATE_P', 0.15)
+
+        msg_ids = {}
+        for msg_id, name in enumerate(ULG_FORMATS):
+            msg_ids[name] = msg_id
+            writer.message('A', struct.pack('<BH', 0, msg_id) + name.encode('ascii'))
+
+        def data(name, *values):
+            writer.message('D', struct.pack('<H', msg_ids[name]) + packers[name].pack(*values))
+
+        events = [
+            (arm_t, 'ARM'), (takeoff_t, 'TAKEOFF'), (mode_t, 'MODE'), (param_t, 'PARM'),
+            (land_t, 'LAND'), (disarm_t, 'DISARM'),
+        ]
+        event_idx = 0
+        armed = False
+        nav_state = 0
+        discharged = 0.0
+        last_t = 0.0
+        data('vehicle_status', start_us, 1, nav_state)
+        data('vehicle_land_detected', start_us, True, False)
+        for t, name in _schedule(rates, duration):
+            while event_idx < len(events) and events[event_idx][0] <= t:
+                ev_t, ev = events[event_idx]
+                ts = start_us + int(ev_t * 1e6)
+                if ev == 'ARM':
+                    armed = True
+                    data('vehicle_status', ts, 2, nav_state)
+                elif ev == 'TAKEOFF':
+                    nav_state = 2
+                    data('vehicle_status', ts, 2, nav_state)
+                    data('vehicle_land_detected', ts, False, False)
+                elif ev == 'MODE':
+                    nav_state = 3
+                    data('vehicle_status', ts, 2, nav_state)
+                elif ev == 'PARM':
+                    writer.parameter('MC_ROLLRATE_P', 0.18)
+                    writer.message('L', struct.pack('<BQ', ord('6'), ts) + b'param changed')
+                elif ev == 'LAND':
+                    nav_state = 18
+                    data('vehicle_status', ts, 2, nav_state)
+                    data('vehicle_land_detected', ts, True, False)
+                elif ev == 'DISARM':
+                    armed = False
+                    data('vehicle_status', ts, 1, nav_state)
+                event_idx += 1
+
+            ts = start_us + int(t * 1e6)
+            frac = t / max(duration, 1.0)
+            if name == 'battery_status':
+                current = 18.0 + 4.0 * math.sin(t / 7.0) if armed else 0.4
+                discharged += current * (t - last_t) / 3.6
+                last_t = t
+                data(name, ts, 16.8 - 2.0 * frac, current, discharged, 1.0 - frac)
+            elif name == 'input_rc':
+                data(name, ts, 90 - int(50 * frac), 100 - int(40 * frac), 16)
+            elif name == 'radio_status':
+                data(name, ts, 200 - int(80 * frac), 190)
+            elif name == 'vehicle_local_position_setpoint':
+                data(name, ts, *_position(t, duration))
+            elif name == 'vehicle_attitude':
+                data(name, ts, 1.0, 0.0, 0.0, 0.0)
+            elif name == 'vehicle_imu_status':
+                vibe_x, _, vibe_z = _vibration(t, armed)
+                data(name, ts, vibe_z / 4.0, vibe_x / 400.0)
+            elif name == 'vehicle_gps_position':
+                lat, lng = _lat_lng(t, duration)
+                data(name, ts, int(lat * 1e7), int(lng * 1e7), int((584.0 - _position(t, duration)[2]) * 1000), 3, 17)
+
+    return {'path': path, 'bytes': os.path.getsize(path), 'records': writer.records}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic .bin and .ulg logs for benchmarking")
+    parser.add_argument("output_dir", help="Directory for the generated logs")
+    parser.add_argument("--duration", type=float, default=600.0, help="Log duration in seconds (default: 600)")
+    parser.add_argument("--rate-scale", type=float, default=1.0, help="Multiplier for all message rates (default: 1.0)")
+    parser.add_argument("--params", type=int, default=800, help="Number of parameters (default: 800)")
+    parser.add_argument("--rate", action="append", default=[], metavar="TYPE=HZ",
+                        help="Override one message rate, e.g. --rate XKF1=50 --rate input_rc=0")
+    args = parser.parse_args()
+
+    overrides = {}
+    for item in args.rate:
+        name, _, hz = item.partition('=')
+        overrides[name] = float(hz)
+    bin_rates = {k: v for k, v in overrides.items() if k in BIN_FORMATS}
+    ulg_rates = {k: v for k, v in overrides.items() if k in ULG_FORMATS}
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stem = f"synthetic_{int(args.duration)}s"
+    for generate, ext, rates in ((generate_bin_log, 'bin', bin_rates), (generate_ulg_log, 'ulg', ulg_rates)):
+        path = os.path.join(args.output_dir, f"{stem}.{ext}")
+        info = generate(path, duration=args.duration, rate_scale=args.rate_scale,
+                        rates=rates, param_count=args.params)
+        print(f"✅ {info['path']}: {info['bytes'] / 1e6:.1f} MB, {info['records']} records")
+
+if __name__ == "__main__":
+    main()
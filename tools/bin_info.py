@@ -5,17 +5,28 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-import pymavlink
-from pymavlink import DFReader
+from tools.profiling import timed_stage, add_profile_arguments, profile_session
+from tools.compressed_logs import log_exists, is_compressed
 
 # Set MAVLink dialect explicitly
 os.environ['MAVLINK_DIALECT'] = 'ardupilotmega'
 
+@timed_stage
 def extract_bin_info(filepath):
     try:
-        if not os.path.exists(filepath):
+        if not log_exists(filepath):
             return {'error': f"File not found: {filepath}"}
 
+        if is_compressed(filepath):
+            # ✅ DFReader needs a file to map: decode the decompressed stream instead (same summary)
+            from tools.bin_stream_decoder import decode_bin_file
+
+            summary = decode_bin_file(filepath)
+            summary.pop('parameters', None)
+            return summary
+
+        from pymavlink import DFReader  # ✅ Deferred: importing pymavlink loads the full MAVLink dialect
+
         reader = DFReader.DFReader_binary(filepath)
 
         message_types = set()
@@ -89,11 +100,16 @@ def generate_bin_info(filepath, mode="cli"):
         return {'error': f"Unknown mode: {mode}"}
 
 if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
     import argparse
     parser = argparse.ArgumentParser(description="Extract summary info from ArduPilot .bin log")
-    parser.add_argument("input_file", help="Path to .bin log file")
+    parser.add_argument("input_file", help="Path to .bin log file (or .bin.gz / .bin.xz / .bin.zst / .zip)")
     parser.add_argument("--mode", choices=["cli", "file", "flask"], default="cli")
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    result = generate_bin_info(args.input_file, mode=args.mode)
+    with profile_session(args):
+        result = generate_bin_info(args.input_file, mode=args.mode)
     print(result.get('error') or f"✅ {result['output']}")
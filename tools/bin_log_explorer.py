@@ -1,30 +1,39 @@
 import os
-import pandas as pd
-from pymavlink import DFReader
+from tools.profiling import timed_stage
+from tools.time_window import is_windowed, iter_bin_window, boot_time
+from tools.compressed_logs import log_exists, decompressed_log
 
 # Ensure ArduPilot dialect is used
 os.environ['MAVLINK_DIALECT'] = 'ardupilotmega'
 
 # Step 1: Parse .BIN file and return message types + raw message map
-def parse_bin_file(filepath):
-    if not os.path.exists(filepath):
+@timed_stage
+def parse_bin_file(filepath, start=None, end=None):
+    if not log_exists(filepath):
         raise FileNotFoundError(f"File not found: {filepath}")
 
-    reader = DFReader.DFReader_binary(filepath)
     message_types = set()
     messages_by_type = {}
 
-    while True:
-        msg = reader.recv_msg()
-        if msg is None:
-            break
-        msg_type = msg.get_type()
-        message_types.add(msg_type)
-        messages_by_type.setdefault(msg_type, []).append(msg)
+    # ✅ A window decodes only its records; without one DFReader reads it all (a compressed log from a decompressed copy)
+    with decompressed_log(filepath) as plain:
+        if is_windowed(start, end):
+            messages = iter_bin_window(filepath, None, start, end, untimed=True)
+        else:
+            from pymavlink import DFReader  # ✅ Deferred: importing pymavlink loads the full MAVLink dialect
+
+            reader = DFReader.DFReader_binary(plain)
+            messages = boot_time(iter(reader.recv_msg, None))  # ✅ Seconds since boot, as with a window
+
+        for msg in messages:
+            msg_type = msg.get_type()
+            message_types.add(msg_type)
+            messages_by_type.setdefault(msg_type, []).append(msg)
 
     return sorted(message_types), messages_by_type
 
 # Step 2: Extract available fields from a selected message type
+@timed_stage
 def get_fields_from_bin(messages_by_type, msg_type):
     try:
         sample_msg = messages_by_type[msg_type][0]
@@ -33,6 +42,7 @@ def get_fields_from_bin(messages_by_type, msg_type):
         return []
 
 # Step 3: Extract timestamped values for a selected field
+@timed_stage
 def extract_field_data_bin(messages_by_type, msg_type, field_name):
     try:
         data = []
@@ -46,6 +56,15 @@ def extract_field_data_bin(messages_by_type, msg_type, field_name):
     except KeyError:
         return []
 
+# Step 3 for another process: the same values as two NumPy columns, which cross in shared memory
+@timed_stage
+def extract_field_columns_bin(messages_by_type, msg_type, field_name):
+    import numpy as np
+
+    rows = extract_field_data_bin(messages_by_type, msg_type, field_name)
+    return {'time': np.array([timestamp for timestamp, _ in rows], dtype=np.float64),
+            'value': np.array([value for _, value in rows]) if rows else np.empty(0)}
+
 # Optional: Check if a field is numeric (for future charting)
 def is_field_numeric_bin(messages_by_type, msg_type, field_name):
     try:
@@ -54,6 +73,17 @@ def is_field_numeric_bin(messages_by_type, msg_type, field_name):
             for msg in messages_by_type[msg_type]
             if field_name in msg.to_dict()
         ]
-        return pd.Series(values).apply(lambda x: isinstance(x, (int, float))).all()
+        return all(isinstance(x, (int, float)) for x in values)
     except KeyError:
         return False
+
+# One explorer step as plain data (message types, a type's fields or a field's values as columns),
+# so the web app can run it in a memory-limited worker process
+@timed_stage
+def explore_bin_file(filepath, start=None, end=None, msg_type=None, field_name=None):
+    message_types, messages_by_type = parse_bin_file(filepath, start, end)
+    if msg_type is None:
+        return message_types
+    if field_name is None:
+        return get_fields_from_bin(messages_by_type, msg_type)
+    return extract_field_columns_bin(messages_by_type, msg_type, field_name)
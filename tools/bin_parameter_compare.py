@@ -3,60 +3,53 @@
 bin_parameter_compare.py
 Compare parameters between two ArduPilot .bin log files.
 Reports parameter values in CSV format, with options to use initial or final values.
+Parameters come from the cache beside each log (see parameter_sets.py).
 """
 
 import os
 import sys
 import argparse
-from pymavlink import DFReader
 
-def parse_bin_file(filepath):
-    if not os.path.exists(filepath):
-        raise FileNotFoundError(f"File not found: {filepath}")
-
-    reader = DFReader.DFReader_binary(filepath)
-    message_types = set()
-    messages_by_type = {}
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-    while True:
-        msg = reader.recv_msg()
-        if msg is None:
-            break
-        msg_type = msg.get_type()
-        message_types.add(msg_type)
-        messages_by_type.setdefault(msg_type, []).append(msg)
+from tools.profiling import timed_stage, add_profile_arguments, profile_session
+from tools.parameter_sets import load_parameter_set, load_parameter_sets
+from tools.compressed_logs import log_exists
 
-    return sorted(message_types), messages_by_type
+def _parameter_values(entry, mode):
+    return entry['initial'] if mode == "initial" else entry['parameters']
 
+@timed_stage
 def extract_parameters(filepath, mode="final"):
     """
     Extract parameters from a .bin file.
     mode = "initial" -> first occurrence of each parameter
     mode = "final"   -> last occurrence of each parameter
     """
-    _, messages_by_type = parse_bin_file(filepath)
-    param_messages = messages_by_type.get("PARM", []) + messages_by_type.get("PARAM", [])
-    parameters = {}
-
-    for msg in param_messages:
-        try:
-            name = getattr(msg, "Name", None) or getattr(msg, "name", None)
-            value = getattr(msg, "Value", None) or getattr(msg, "value", None)
-            if name is not None and value is not None:
-                if mode == "initial":
-                    if name not in parameters:  # keep first occurrence
-                        parameters[name] = value
-                else:  # "final"
-                    parameters[name] = value  # overwrite, last occurrence wins
-        except Exception:
-            continue
-
-    return parameters
+    if not log_exists(filepath):
+        raise FileNotFoundError(f"File not found: {filepath}")
+    entry = load_parameter_set(filepath)
+    if 'error' in entry:
+        raise ValueError(entry['error'])
+    return _parameter_values(entry, mode)
 
+@timed_stage
 def compare_parameters(file1, file2, mode1="final", mode2="final"):
-    """Compare parameters between two .bin files with mode options."""
-    params1 = extract_parameters(file1, mode=mode1)
-    params2 = extract_parameters(file2, mode=mode2)
+    """
+    Compare parameters between two .bin files with mode options.
+    Both logs are read in one pass each (parameters and firmware banner), concurrently.
+    """
+    for path in (file1, file2):
+        if not log_exists(path):
+            return {'error': f"File not found: {path}"}
+
+    entry1, entry2 = load_parameter_sets([file1, file2])
+    for path, entry in ((file1, entry1), (file2, entry2)):
+        if 'error' in entry:
+            return {'error': f"{os.path.basename(path)}: {entry['error']}"}
+    params1 = _parameter_values(entry1, mode1)
+    params2 = _parameter_values(entry2, mode2)
 
     diffs = {}
     all_keys = set(params1.keys()) | set(params2.keys())
@@ -69,6 +62,8 @@ def compare_parameters(file1, file2, mode1="final", mode2="final"):
     return {
         'file1': os.path.basename(file1),
         'file2': os.path.basename(file2),
+        'version1': entry1['firmware'] or "Unknown version",
+        'version2': entry2['firmware'] or "Unknown version",
         'differences': diffs,
         'total': len(all_keys)
     }
@@ -82,13 +77,20 @@ def main():
     parser.add_argument("--file2_mode", choices=["initial", "final"], default="final",
                         help="Use 'initial' or 'final' values for file2 (default: final)")
     parser.add_argument("-o", "--output", help="Optional output file path")
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
     try:
-        result = compare_parameters(args.log1, args.log2,
-                                    mode1=args.file1_mode,
-                                    mode2=args.file2_mode)
-
+        with profile_session(args):
+            result = compare_parameters(args.log1, args.log2,
+                                        mode1=args.file1_mode,
+                                        mode2=args.file2_mode)
+        if 'error' in result:
+            print(f"❌ Error: {result['error']}")
+            sys.exit(1)
+
+        print(f"📄 {result['file1']}: {result['version1']}")
+        print(f"📄 {result['file2']}: {result['version2']}")
         if result['differences']:
             header = "Parameter,File1,File2"
             lines = [header]
@@ -119,4 +121,7 @@ def main():
         sys.exit(2)
 
 if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
     main()
@@ -1,13 +1,35 @@
 #!/usr/bin/env python3
 
 import os
-from pymavlink import mavutil
+import sys
 
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import timed_stage, add_profile_arguments, profile_session
+from tools.bin_stream_decoder import decode_bin_file
+from tools.compressed_logs import log_exists, log_extension
+
+@timed_stage
 def extract_parameters(filepath):
     try:
-        if not os.path.exists(filepath):
+        if not log_exists(filepath):
             return {'error': f"File not found: {filepath}"}
 
+        # ✅ .bin PARM records only need framing, so skip pymavlink (and its dialect import)
+        if log_extension(filepath) == '.bin':
+            result = decode_bin_file(filepath)
+            if 'error' in result:
+                return result
+            if not result['parameters']:
+                return {'error': "No parameters found in .bin file"}
+            return {
+                'filename': os.path.basename(filepath),
+                'parameters': result['parameters']
+            }
+
+        from pymavlink import mavutil
+
         mlog = mavutil.mavlink_connection(filepath)
         param_dict = {}
 
@@ -48,10 +70,15 @@ def generate_parameter_list(filepath, mode="cli"):
     return summary
 
 if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
     import argparse
 
     parser = argparse.ArgumentParser(description="Extract parameter list from ArduPilot .bin log")
     parser.add_argument("input_file", help="Path to .bin log file")
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    generate_parameter_list(args.input_file, mode="cli")
+    with profile_session(args):
+        generate_parameter_list(args.input_file, mode="cli")
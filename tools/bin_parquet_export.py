@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+bin_parquet_export.py
+Export every message type in an ArduPilot .bin log to a directory of Parquet files.
+One file per message type, each with a shared 'time_s' column (seconds since boot, from TimeUS)
+and FMTU units stored as Parquet field metadata.
+Records are buffered per message type and flushed as row groups, so memory stays bounded.
+"""
+
+import os
+import sys
+import argparse
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pymavlink import DFReader
+from tools.profiling import timed_stage, add_profile_arguments, profile_session
+from tools.time_window import add_time_window_arguments, check_time_window_args, is_windowed, iter_bin_window
+from tools.compressed_logs import log_exists, log_extension, log_stem, decompressed_log
+
+# Set MAVLink dialect explicitly
+os.environ['MAVLINK_DIALECT'] = 'ardupilotmega'
+
+DEFAULT_BATCH_ROWS = 65536
+
+# DataFlash format characters -> Arrow types (values as returned by DFMessage)
+FORMAT_TO_ARROW = {
+    'a': pa.list_(pa.int16()),
+    'b': pa.int8(),
+    'B': pa.uint8(),
+    'g': pa.float32(),
+    'h': pa.int16(),
+    'H': pa.uint16(),
+    'i': pa.int32(),
+    'I': pa.uint32(),
+    'f': pa.float32(),
+    'n': pa.string(),
+    'N': pa.string(),
+    'Z': pa.string(),
+    'c': pa.float64(),
+    'C': pa.float64(),
+    'e': pa.float64(),
+    'E': pa.float64(),
+    'L': pa.float64(),
+    'd': pa.float64(),
+    'M': pa.int8(),
+    'q': pa.int64(),
+    'Q': pa.uint64(),
+}
+
+class _TypeWriter:
+    """Buffers rows of one message type and writes them as Parquet row groups."""
+
+    def __init__(self, path, fmt, source_name, compression):
+        self.path = path
+        self.columns = list(fmt.columns)
+        self.rows = 0
+        self._writer = None
+        self._compression = compression
+        self._buffer = [[] for _ in range(len(self.columns) + 1)]
+
+        fields = [pa.field('time_s', pa.float64(), metadata={'unit': 's'})]
+        for i, col in enumerate(self.columns):
+            fmt_char = fmt.format[i]
+            arrow_type = FORMAT_TO_ARROW.get(fmt_char, pa.string())
+            if fmt_char == 'Z' and fmt.name == 'FILE':
+                arrow_type = pa.binary()  # FILE contents are raw bytes
+            metadata = {'format': fmt_char}
+            if fmt.units is not None and i < len(fmt.units) and fmt.units[i]:
+                metadata['unit'] = fmt.units[i]
+            fields.append(pa.field(col, arrow_type, metadata=metadata))
+
+        self.schema = pa.schema(fields, metadata={
+            'source': source_name,
+            'log_type': 'bin',
+            'message_type': fmt.name,
+        })
+
+    def append(self, time_s, msg):
+        self._buffer[0].append(time_s)
+        for i, col in enumerate(self.columns, start=1):
+            value = getattr(msg, col, None)
+            if isinstance(value, float) and value != value:
+                value = None  # NaN placeholders become nulls
+            elif hasattr(value, 'tolist'):
+                value = value.tolist()  # array.array for 'a' fields
+            self._buffer[i].append(value)
+        self.rows += 1
+
+    def pending(self):
+        return len(self._buffer[0])
+
+    def flush(self):
+        if not self._buffer[0]:
+            return
+        arrays = [pa.array(values, type=field.type)
+                  for values, field in zip(self._buffer, self.schema)]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, self.schema, compression=self._compression)
+        self._writer.write_batch(batch)
+        self._buffer = [[] for _ in range(len(self.columns) + 1)]
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+
+@timed_stage
+def export_bin_to_parquet(filepath, output_dir=None, batch_rows=DEFAULT_BATCH_ROWS, compression="zstd",
+                          start=None, end=None):
+    """
+    Stream a .bin log into one Parquet file per message type.
+    With start/end (seconds since boot) only the timed records inside that window are exported.
+    Returns {'output_dir': ..., 'files': {msg_type: row_count}} or {'error': ...}.
+    """
+    if not log_exists(filepath):
+        return {'error': f"File not found: {filepath}"}
+
+    if output_dir is None:
+        output_dir = log_stem(filepath) + "_parquet"
+
+    writers = {}
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        # ✅ A window decodes only its records; without one DFReader reads it all (a compressed log from a decompressed copy)
+        with decompressed_log(filepath) as plain:
+            if is_windowed(start, end):
+                messages = iter_bin_window(filepath, None, start, end)
+            else:
+                reader = DFReader.DFReader_binary(plain)
+                messages = iter(reader.recv_msg, None)
+            source_name = os.path.basename(filepath)
+            last_time_us = None
+
+            for msg in messages:
+                time_us = getattr(msg, 'TimeUS', None)
+                if time_us is not None:
+                    last_time_us = time_us
+                time_s = last_time_us / 1e6 if last_time_us is not None else None
+
+                # A message type redefined with a different layout gets its own file
+                key = (msg.fmt.name, tuple(msg.fmt.columns))
+                writer = writers.get(key)
+                if writer is None:
+                    same_name = sum(1 for name, _ in writers if name == msg.fmt.name)
+                    stem = msg.fmt.name if same_name == 0 else f"{msg.fmt.name}_{same_name + 1}"
+                    path = os.path.join(output_dir, f"{stem}.parquet")
+                    writer = _TypeWriter(path, msg.fmt, source_name, compression)
+                    writers[key] = writer
+
+                writer.append(time_s, msg)
+                if writer.pending() >= batch_rows:
+                    writer.flush()
+
+        for writer in writers.values():
+            writer.close()
+
+        return {
+            'output_dir': os.path.abspath(output_dir),
+            'files': {os.path.splitext(os.path.basename(w.path))[0]: w.rows for w in writers.values()},
+        }
+
+    except Exception as e:
+        return {'error': str(e)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Export an ArduPilot .bin log to Parquet files (one per message type)")
+    parser.add_argument("input_file", help="Path to .bin log file")
+    parser.add_argument("-o", "--output-dir", help="Output directory (default: <log>_parquet next to the log)")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS,
+                        help=f"Rows buffered per message type before a row group is written (default: {DEFAULT_BATCH_ROWS})")
+    parser.add_argument("--compression", choices=["zstd", "snappy", "gzip", "none"], default="zstd")
+    add_time_window_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    check_time_window_args(parser, args)
+
+    if log_extension(args.input_file) != ".bin":
+        print(f"❌ Error: Expected a .bin file, but got '{os.path.splitext(args.input_file)[1]}'")
+        sys.exit(1)
+
+    with profile_session(args):
+        result = export_bin_to_parquet(args.input_file, args.output_dir,
+                                       batch_rows=args.batch_rows, compression=args.compression,
+                                       start=args.start, end=args.end)
+    if 'error' in result:
+        print(f"❌ {result['error']}")
+        sys.exit(1)
+
+    for name, rows in sorted(result['files'].items()):
+        print(f"  {name}: {rows} rows")
+    print(f"✅ {len(result['files'])} Parquet files written to {result['output_dir']}")
+
+if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
+    main()
@@ -6,21 +6,34 @@ import argparse
 import base64
 import subprocess
 from io import BytesIO
-import matplotlib.pyplot as plt
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 import numpy as np
-from pymavlink import mavutil
+from tools.profiling import stage, timed_stage, add_profile_arguments, profile_session
+from tools.time_window import add_time_window_arguments, check_time_window_args, is_windowed, iter_bin_window
+from tools.compressed_logs import log_exists, log_extension, is_compressed
+from tools.flight_segments import add_segment_arguments, segment_window
+
+@timed_stage
+def extract_power_data(filepath, start=None, end=None):
+    if is_windowed(start, end) or is_compressed(filepath):
+        messages = iter_bin_window(filepath, ['BAT'], start, end)  # ✅ Decodes only the window
+    else:
+        from pymavlink import mavutil  # ✅ Deferred: loading the MAVLink dialect is slow
 
-def extract_power_data(filepath):
-    reader = mavutil.mavlink_connection(filepath)
+        reader = mavutil.mavlink_connection(filepath)
+        messages = iter(lambda: reader.recv_match(type='BAT', blocking=False), None)
+    return power_samples(messages)
+
+def power_samples(messages):
+    """(timestamps, current, voltage, error) from BAT messages (anything with Curr/Volt/TimeUS attributes)."""
     timestamps = []
     current_data = []
     voltage_data = []
 
-    while True:
-        msg = reader.recv_match(type='BAT', blocking=False)
-        if msg is None:
-            break
-
+    for msg in messages:
         curr = getattr(msg, 'Curr', None)
         volt = getattr(msg, 'Volt', None)
         time = getattr(msg, 'TimeUS', None)
@@ -36,11 +49,17 @@ def extract_power_data(filepath):
 
     return timestamps, current_data, voltage_data, None
 
-def generate_power_chart(timestamps, current_data, voltage_data):
+def compute_watt_hours(timestamps, current_data, voltage_data):
     power = np.array(current_data) * np.array(voltage_data)
     time_deltas = np.diff(timestamps, prepend=timestamps[0])
     watt_sec = np.cumsum(power * time_deltas)
-    watt_hours = watt_sec / 3600
+    return watt_sec / 3600
+
+@timed_stage
+def generate_power_chart(timestamps, current_data, voltage_data):
+    import matplotlib.pyplot as plt  # ✅ Deferred until a chart is actually drawn
+
+    watt_hours = compute_watt_hours(timestamps, current_data, voltage_data)
 
     fig, ax1 = plt.subplots(figsize=(14, 6))
 
@@ -66,6 +85,10 @@ def generate_power_chart(timestamps, current_data, voltage_data):
     fig.tight_layout()
     return fig
 
+def close_chart(fig):
+    import matplotlib.pyplot as plt
+    plt.close(fig)
+
 def open_image(path):
     try:
         abs_path = os.path.abspath(path)
@@ -86,13 +109,13 @@ def get_temp_chart_path(logfile_path, script_name):
     return os.path.abspath(os.path.join("webapp", "uploads", filename))
 
 def validate_input_file(path_str):
-    if not os.path.exists(path_str):
+    if not log_exists(path_str):
         return None, f"❌ Error: File '{path_str}' does not exist."
-    if not path_str.lower().endswith(".bin"):
+    if log_extension(path_str) != ".bin":
         return None, f"❌ Error: Expected a .bin file, but got '{os.path.splitext(path_str)[1]}'"
     return path_str, None
 
-def flask_entry(input_path):
+def flask_entry(input_path, start=None, end=None):
     import matplotlib
     matplotlib.use("Agg")  # ✅ Use non-GUI backend for Flask
 
@@ -100,7 +123,7 @@ def flask_entry(input_path):
     if error:
         return {'error': error}
 
-    timestamps, current_data, voltage_data, parse_error = extract_power_data(path)
+    timestamps, current_data, voltage_data, parse_error = extract_power_data(path, start, end)
     if parse_error:
         return {'error': parse_error}
     if not (timestamps and current_data and voltage_data):
@@ -108,14 +131,19 @@ def flask_entry(input_path):
 
     fig = generate_power_chart(timestamps, current_data, voltage_data)
     buffer = BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-    plt.close()  # ✅ Clean up figure after saving
+    with stage("savefig"):
+        fig.savefig(buffer, format='png')
+    with stage("encode"):
+        buffer.seek(0)
+        image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
+    close_chart(fig)  # ✅ Clean up figure after saving
     print("[DEBUG] Power chart image generated and encoded successfully.")
     return {'image_data': image_base64}
 
 if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
     import matplotlib
     matplotlib.use("Agg")  # ✅ Use non-GUI backend for CLI mode
 
@@ -124,37 +152,49 @@ if __name__ == "__main__":
     parser.add_argument("--output", help="Path to save PNG chart")
     parser.add_argument("--nogui", action="store_true", help="Suppress GUI display")
     parser.add_argument("--view", action="store_true", help="Open chart after saving")
+    add_time_window_arguments(parser)
+    add_segment_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
-
-    path, error = validate_input_file(args.input_file)
-    if error:
-        print(error)
-        exit(1)
-
-    timestamps, current_data, voltage_data, parse_error = extract_power_data(path)
-    if parse_error:
-        print(parse_error)
-        exit(1)
-    if not (timestamps and current_data and voltage_data):
-        print("❌ No valid power data found in log.")
-        exit(0)
-
-    fig = generate_power_chart(timestamps, current_data, voltage_data)
-
-    if args.output:
-        output_path = args.output
-        if not output_path.lower().endswith(".png"):
-            output_path += ".png"
-        output_path = os.path.abspath(output_path)
-    elif args.nogui:
-        print("❌ Headless mode requires --output to save chart.")
-        exit(1)
-    else:
-        output_path = get_temp_chart_path(args.input_file, __file__)
-
-    fig.savefig(output_path)
-    print(f"✅ Chart saved to: {output_path}")
-    plt.close()  # ✅ Clean up figure after saving
-
-    if not args.nogui and (not args.output or args.view):
-        open_image(output_path)
+    check_time_window_args(parser, args)
+
+    with profile_session(args):
+        path, error = validate_input_file(args.input_file)
+        if error:
+            print(error)
+            exit(1)
+
+        try:
+            start, end = segment_window(str(path), args.segment, args.start, args.end)  # ✅ Decode only this part
+        except ValueError as e:
+            print(f"❌ {e}")
+            exit(1)
+
+        timestamps, current_data, voltage_data, parse_error = extract_power_data(path, start, end)
+        if parse_error:
+            print(parse_error)
+            exit(1)
+        if not (timestamps and current_data and voltage_data):
+            print("❌ No valid power data found in log.")
+            exit(0)
+
+        fig = generate_power_chart(timestamps, current_data, voltage_data)
+
+        if args.output:
+            output_path = args.output
+            if not output_path.lower().endswith(".png"):
+                output_path += ".png"
+            output_path = os.path.abspath(output_path)
+        elif args.nogui:
+            print("❌ Headless mode requires --output to save chart.")
+            exit(1)
+        else:
+            output_path = get_temp_chart_path(args.input_file, __file__)
+
+        with stage("savefig"):
+            fig.savefig(output_path)
+        print(f"✅ Chart saved to: {output_path}")
+        close_chart(fig)  # ✅ Clean up figure after saving
+
+        if not args.nogui and (not args.output or args.view):
+            open_image(output_path)
@@ -7,22 +7,36 @@ import argparse
 import base64
 import subprocess
 from io import BytesIO
-import matplotlib.pyplot as plt
-from pymavlink import mavutil
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import stage, timed_stage, add_profile_arguments, profile_session
+from tools.time_window import add_time_window_arguments, check_time_window_args, is_windowed, iter_bin_window
+from tools.compressed_logs import log_exists, log_extension, is_compressed
+from tools.flight_segments import add_segment_arguments, segment_window
 
 def compute_range(pn, pe, pd):
     return math.sqrt(pn**2 + pe**2 + pd**2)
 
-def extract_signal_data(filepath):
-    mlog = mavutil.mavlink_connection(filepath)
+@timed_stage
+def extract_signal_data(filepath, start=None, end=None):
+    msg_types = ['XKF1', 'RSSI', 'RAD']
+    if is_windowed(start, end) or is_compressed(filepath):
+        messages = iter_bin_window(filepath, msg_types, start, end)  # ✅ Decodes only the window
+    else:
+        from pymavlink import mavutil  # ✅ Deferred: loading the MAVLink dialect is slow
+
+        mlog = mavutil.mavlink_connection(filepath)
+        messages = iter(lambda: mlog.recv_match(type=msg_types, blocking=False), None)
+    return pair_range_signal(messages)
+
+def pair_range_signal(messages):
+    """Pair each XKF1 position with the RSSI/RAD values logged since the previous one."""
     range_rxrssi, range_rxlq, range_rad_rssi = [], [], []
     latest_rssi, latest_rad = {}, {}
 
-    while True:
-        msg = mlog.recv_match(type=['XKF1', 'RSSI', 'RAD'], blocking=False)
-        if msg is None:
-            break
-
+    for msg in messages:
         msg_type = msg.get_type()
         data = msg.to_dict()
 
@@ -48,7 +62,10 @@ def extract_signal_data(filepath):
 
     return range_rxrssi, range_rxlq, range_rad_rssi
 
+@timed_stage
 def generate_range_signal_chart(rxrssi, rxlq, rad_rssi):
+    import matplotlib.pyplot as plt  # ✅ Deferred until a chart is actually drawn
+
     fig, ax1 = plt.subplots(figsize=(14, 6))
     ax2 = ax1.twinx()
     ax3 = None
@@ -78,6 +95,10 @@ def generate_range_signal_chart(rxrssi, rxlq, rad_rssi):
     fig.tight_layout()
     return fig
 
+def close_chart(fig):
+    import matplotlib.pyplot as plt
+    plt.close(fig)
+
 def open_image(path):
     try:
         abs_path = os.path.abspath(path)
@@ -98,13 +119,13 @@ def get_temp_chart_path(logfile_path, script_name):
     return os.path.abspath(os.path.join("webapp", "uploads", filename))
 
 def validate_input_file(path_str):
-    if not os.path.exists(path_str):
+    if not log_exists(path_str):
         return None, f"❌ Error: File '{path_str}' does not exist."
-    if not path_str.lower().endswith(".bin"):
+    if log_extension(path_str) != ".bin":
         return None, f"❌ Error: Expected a .bin file, but got '{os.path.splitext(path_str)[1]}'"
     return path_str, None
 
-def flask_entry(input_path):
+def flask_entry(input_path, start=None, end=None):
     import matplotlib
     matplotlib.use("Agg")  # ✅ Use non-GUI backend for Flask
 
@@ -112,19 +133,24 @@ def flask_entry(input_path):
     if error:
         return {'error': error}
 
-    rxrssi, rxlq, rad_rssi = extract_signal_data(path)
+    rxrssi, rxlq, rad_rssi = extract_signal_data(path, start, end)
     if not (rxrssi or rxlq or rad_rssi):
         return {'error': 'No valid signal data found in log file.'}
 
     fig = generate_range_signal_chart(rxrssi, rxlq, rad_rssi)
     buffer = BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-    plt.close()  # ✅ Clean up figure after saving
+    with stage("savefig"):
+        fig.savefig(buffer, format='png')
+    with stage("encode"):
+        buffer.seek(0)
+        image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
+    close_chart(fig)  # ✅ Clean up figure after saving
     return {'figure': f'<img src="data:image/png;base64,{image_base64}"/>'}
 
 if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
     import matplotlib
     matplotlib.use("Agg")  # ✅ Use non-GUI backend for CLI mode
 
@@ -133,34 +159,46 @@ if __name__ == "__main__":
     parser.add_argument("--output", help="Path to save PNG chart")
     parser.add_argument("--nogui", action="store_true", help="Suppress GUI display")
     parser.add_argument("--view", action="store_true", help="Open chart after saving")
+    add_time_window_arguments(parser)
+    add_segment_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
-
-    path, error = validate_input_file(args.input_file)
-    if error:
-        print(error)
-        exit(1)
-
-    rxrssi, rxlq, rad_rssi = extract_signal_data(path)
-    if not (rxrssi or rxlq or rad_rssi):
-        print("❌ No valid signal data found in log.")
-        exit(0)
-
-    fig = generate_range_signal_chart(rxrssi, rxlq, rad_rssi)
-
-    if args.output:
-        output_path = args.output
-        if not output_path.lower().endswith(".png"):
-            output_path += ".png"
-        output_path = os.path.abspath(output_path)
-    elif args.nogui:
-        print("❌ Headless mode requires --output to save chart.")
-        exit(1)
-    else:
-        output_path = get_temp_chart_path(args.input_file, __file__)
-
-    fig.savefig(output_path)
-    print(f"✅ Chart saved to: {output_path}")
-    plt.close()  # ✅ Clean up figure after saving
-
-    if not args.nogui and (not args.output or args.view):
-        open_image(output_path)
+    check_time_window_args(parser, args)
+
+    with profile_session(args):
+        path, error = validate_input_file(args.input_file)
+        if error:
+            print(error)
+            exit(1)
+
+        try:
+            start, end = segment_window(str(path), args.segment, args.start, args.end)  # ✅ Decode only this part
+        except ValueError as e:
+            print(f"❌ {e}")
+            exit(1)
+
+        rxrssi, rxlq, rad_rssi = extract_signal_data(path, start, end)
+        if not (rxrssi or rxlq or rad_rssi):
+            print("❌ No valid signal data found in log.")
+            exit(0)
+
+        fig = generate_range_signal_chart(rxrssi, rxlq, rad_rssi)
+
+        if args.output:
+            output_path = args.output
+            if not output_path.lower().endswith(".png"):
+                output_path += ".png"
+            output_path = os.path.abspath(output_path)
+        elif args.nogui:
+            print("❌ Headless mode requires --output to save chart.")
+            exit(1)
+        else:
+            output_path = get_temp_chart_path(args.input_file, __file__)
+
+        with stage("savefig"):
+            fig.savefig(output_path)
+        print(f"✅ Chart saved to: {output_path}")
+        close_chart(fig)  # ✅ Clean up figure after saving
+
+        if not args.nogui and (not args.output or args.view):
+            open_image(output_path)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+bin_stream_decoder.py
+Incremental ArduPilot .bin (DataFlash) decoder that accepts the log as a sequence of byte chunks.
+Used by the webapp to decode uploads while they are still arriving; it produces the same summary
+as bin_info.py plus the PARM values bin_parameter_list.py reports, without needing the whole file.
+"""
+
+import os
+import sys
+import struct
+import argparse
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import timed_stage, add_profile_arguments, profile_session
+from tools.compressed_logs import log_exists, iter_log_chunks
+
+HEAD1 = 0xA3
+HEAD2 = 0x95
+FMT_TYPE = 0x80
+FMT_STRUCT = struct.Struct('<BB4s16s64s')
+TIME_US = struct.Struct('<Q')
+
+# DataFlash format characters -> struct codes (same table as pymavlink.DFReader)
+FORMAT_TO_STRUCT = {
+    'a': '64s', 'b': 'b', 'B': 'B', 'g': 'e', 'h': 'h', 'H': 'H', 'i': 'i', 'I': 'I',
+    'f': 'f', 'n': '4s', 'N': '16s', 'Z': '64s', 'c': 'h', 'C': 'H', 'e': 'i', 'E': 'I',
+    'L': 'i', 'd': 'd', 'M': 'b', 'q': 'q', 'Q': 'Q',
+}
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+def _null_term(raw):
+    return raw.split(b'\0', 1)[0].decode('utf-8', 'ignore')
+
+# Message types whose fields are unpacked (everything else is only framed and counted)
+DECODED_TYPES = ('PARM', 'GPS')
+
+class _Format:
+    __slots__ = ('name', 'length', 'format', 'columns', 'has_time_us', 'unpack')
+
+    def __init__(self, name, length, fmt, columns, collect_types=()):
+        self.name = name
+        self.length = length
+        self.format = fmt
+        self.columns = columns
+        self.has_time_us = bool(columns) and columns[0] == 'TimeUS' and fmt[:1] == 'Q'
+        self.unpack = None
+        if name in DECODED_TYPES or name in collect_types:
+            try:
+                self.unpack = struct.Struct('<' + ''.join(FORMAT_TO_STRUCT[c] for c in fmt)).unpack_from
+            except (KeyError, struct.error):
+                self.unpack = None
+
+class BinStreamDecoder:
+    """
+    Feed .bin bytes in any chunk sizes with feed(), then call finish() for the summary.
+    Records are framed exactly like DFReader: resync byte-by-byte on bad headers and
+    stop at a truncated final record.
+    Records of collect_types are also kept, unscaled and in log order, in records as
+    (name, values) tuples (formats[name] has their columns and format string).
+    Every PARM record is kept in parameter_records as (TimeUS, name, value).
+    """
+
+    def __init__(self, filename=None, collect_types=()):
+        self.filename = filename
+        self.collect_types = frozenset(collect_types)
+        self.records = []
+        self.formats = {}
+        self.bytes_fed = 0
+        self.total_messages = 0
+        self.counts = {}
+        self.parameters = {}
+        self.parameter_records = []
+        self._formats = {FMT_TYPE: _Format('FMT', 89, 'BBnNZ', ['Type', 'Length', 'Name', 'Format', 'Columns'])}
+        self._buf = bytearray()
+        self._first_us = None
+        self._last_us = None
+        self._untimed_before_first_us = False
+        self._gps_time_seen = False
+
+    def feed(self, chunk):
+        self.bytes_fed += len(chunk)
+        buf = self._buf
+        buf += chunk
+        pos = self._parse(buf)
+        del buf[:pos]
+
+    def _parse(self, buf):
+        formats = self._formats
+        counts = self.counts
+        end = len(buf)
+        pos = 0
+        while end - pos >= 3:
+            if buf[pos] != HEAD1 or buf[pos + 1] != HEAD2 or buf[pos + 2] not in formats:
+                # Resync on the next header signature
+                nxt = buf.find(bytes((HEAD1, HEAD2)), pos + 1)
+                pos = nxt if nxt != -1 else max(pos + 1, end - 1)
+                continue
+
+            fmt = formats[buf[pos + 2]]
+            if end - pos < fmt.length:
+                break  # wait for the rest of this record
+
+            body = pos + 3
+            if fmt.name == 'FMT':
+                ftype, length, name, fmt_str, columns = FMT_STRUCT.unpack_from(buf, body)
+                columns = _null_term(columns)
+                if length >= 3:
+                    fmt_def = _Format(_null_term(name), length, _null_term(fmt_str),
+                                      columns.split(',') if columns else [], self.collect_types)
+                    formats[ftype] = fmt_def
+                    if fmt_def.name in self.collect_types:
+                        self.formats[fmt_def.name] = fmt_def
+            elif fmt.has_time_us:
+                time_us = TIME_US.unpack_from(buf, body)[0]
+                if self._first_us is None:
+                    self._first_us = time_us
+                if self._last_us is None or time_us > self._last_us:
+                    self._last_us = time_us
+            if fmt.unpack is not None:
+                if fmt.name in self.collect_types:
+                    self.records.append((fmt.name, fmt.unpack(buf, body)))
+                if fmt.name in DECODED_TYPES:
+                    self._decode(fmt, buf, body)
+            if self._first_us is None and not fmt.has_time_us:
+                self._untimed_before_first_us = True
+
+            counts[fmt.name] = counts.get(fmt.name, 0) + 1
+            self.total_messages += 1
+            pos += fmt.length
+        return pos
+
+    def field_names(self):
+        """{message type: column names} for every format defined so far."""
+        return {fmt.name: list(fmt.columns) for fmt in self._formats.values()}
+
+    def _decode(self, fmt, buf, body):
+        values = dict(zip(fmt.columns, fmt.unpack(buf, body)))
+        if fmt.name == 'PARM':
+            name = values.get('Name')
+            if isinstance(name, bytes) and 'Value' in values:
+                name = _null_term(name)
+                self.parameters[name] = values['Value']
+                self.parameter_records.append((values.get('TimeUS', 0), name, values['Value']))
+        elif values.get('GWk', 0) > 0:
+            # A GPS week makes DFReader anchor timestamps at the first TimeUS instead of boot
+            self._gps_time_seen = True
+
+    @timed_stage
+    def finish(self):
+        """Return the bin_info-style summary plus 'parameters' for everything fed so far."""
+        if self._last_us is not None:
+            start_us = self._first_us if (self._gps_time_seen or not self._untimed_before_first_us) else 0
+            duration_min = round((self._last_us - start_us) / 1e6 / 60, 2)
+            duration_str = f"{duration_min} minutes"
+        elif self.total_messages:
+            duration_str = "0.0 minutes"
+        else:
+            duration_str = "Unknown (no valid timestamps)"
+
+        return {
+            'filename': os.path.basename(self.filename) if self.filename else None,
+            'message_types': sorted(self.counts),
+            'total_messages': self.total_messages,
+            'log_duration': duration_str,
+            'parameters': dict(sorted(self.parameters.items())),
+        }
+
+@timed_stage
+def decode_bin_file(filepath, chunk_size=DEFAULT_CHUNK_SIZE, decoder=None):
+    """Run the stream decoder (a fresh one, or the given one) over a plain or compressed file on disk."""
+    if not log_exists(filepath):
+        return {'error': f"File not found: {filepath}"}
+    try:
+        decoder = decoder or BinStreamDecoder(filepath)
+        for chunk in iter_log_chunks(filepath, chunk_size):
+            decoder.feed(chunk)
+        return decoder.finish()
+    except Exception as e:
+        return {'error': str(e)}
+
+if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
+    parser = argparse.ArgumentParser(description="Decode an ArduPilot .bin log chunk by chunk")
+    parser.add_argument("input_file", help="Path to .bin log file (or .bin.gz / .bin.xz / .bin.zst / .zip)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Bytes fed per chunk")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with profile_session(args):
+        result = decode_bin_file(args.input_file, chunk_size=args.chunk_size)
+    if 'error' in result:
+        print(f"❌ {result['error']}")
+        sys.exit(1)
+
+    print(f"📄 Log Summary for {result['filename']}")
+    print(f"Total Messages: {result['total_messages']}")
+    print(f"Log Duration: {result['log_duration']}")
+    print(f"Parameters: {len(result['parameters'])}")
+    print("Message Types:")
+    for msg_type in result['message_types']:
+        print(f"  - {msg_type}")
@@ -0,0 +1,186 @@
+"""
+chart_data.py
+Decimated column data for the interactive power, range-vs-signal and explorer field charts: the
+browser draws, pans and zooms locally and asks for finer data only when the view changes.
+
+Power: voltage, current and watt-hours are stored once per log as a derived 'chart.power'
+pyramid (see field_pyramid.py), so any zoom level is a bounded min/max/mean slice.
+Explorer fields: the same slices of the message type's own pyramid.
+Range vs signal: (range, signal) points are thinned to one per cell of a grid the size of the
+requested view, so dense clouds stay dense and outliers are kept.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from tools.field_pyramid import TILE_SIZE, MAX_RANGE_POINTS, load_pyramid
+from tools.log_cache import source_stamp
+from tools.compressed_logs import log_extension
+
+POWER_SERIES = 'chart.power'
+POWER_LABELS = {'voltage': 'Voltage (V)', 'current': 'Current (A)', 'watt_hours': 'Watt-Hours (Wh)'}
+
+SIGNAL_LABELS = {
+    '.bin': {'ctrl_lq': 'Control Radio Link Quality (RXLQ)', 'ctrl_rssi': 'Control Radio RSSI (RXRSSI)',
+             'telem_rssi': 'Telemetry Radio RSSI (RAD.RSSI)'},
+    '.ulg': {'ctrl_lq': 'Control Radio Link Quality (input_rc.link_quality)',
+             'ctrl_rssi': 'Control Radio RSSI (input_rc.rssi)',
+             'telem_rssi': 'Telemetry Radio RSSI (radio_status.rssi)'},
+}
+SCATTER_ROWS = 128
+
+# Extracted range-signal points of recent (log, window) requests, so zooming does not re-decode
+SIGNAL_CACHE_SIZE = 8
+_signal_cache = OrderedDict()
+_signal_lock = threading.Lock()
+
+def _log_ext(filepath):
+    ext = log_extension(filepath)
+    if ext not in ('.bin', '.ulg'):
+        raise ValueError(f"Unsupported log type: {ext}")
+    return ext
+
+# ---------------------------------------------------------------- power
+
+def _collect_power(filepath):
+    import numpy as np
+
+    if _log_ext(filepath) == '.bin':
+        from tools.bin_power_plot import extract_power_data, compute_watt_hours
+
+        timestamps, current, voltage, error = extract_power_data(filepath)
+        if error:
+            raise ValueError(error)
+        watt_hours = compute_watt_hours(timestamps, current, voltage)
+    else:
+        from tools.ulg_power_plot import extract_power_series
+
+        timestamps, voltage, current, watt_hours, error = extract_power_series(filepath)
+        if error:
+            raise ValueError(error)
+
+    fields = {'voltage': voltage, 'current': current, 'watt_hours': watt_hours}
+    return {POWER_SERIES: (np.asarray(timestamps, dtype=np.float64),
+                           {name: np.asarray(values, dtype=np.float64) for name, values in fields.items()})}
+
+def power_chart_data(filepath, start=None, end=None, points=TILE_SIZE):
+    """
+    Voltage, current and watt-hours over [start, end] (seconds since boot) as min/max/mean buckets,
+    at most `points` per series. Returns (data, cache_hit); raises ValueError without battery data.
+    """
+    pyramid, hit = load_pyramid(filepath, POWER_SERIES, collect=lambda: _collect_power(filepath))
+    series = {}
+    for field in pyramid.fields:
+        series[field] = pyramid.range(field, start, end, points)
+        series[field]['label'] = POWER_LABELS.get(field, field)
+    return {
+        'kind': 'time',
+        'x_label': 'Time (s)',
+        'extent': [pyramid.t0, pyramid.entry['t_end']],
+        'series': series,
+    }, hit
+
+# ---------------------------------------------------------------- explorer fields
+
+def field_chart_data(filepath, start=None, end=None, points=TILE_SIZE, msg_type=None, field=None):
+    """
+    One numeric field of msg_type (a message type / topic) over [start, end] (seconds since boot) as
+    min/max/mean buckets, from the type's zoom pyramid. Returns (data, cache_hit); raises ValueError if the
+    field is not numeric.
+    """
+    pyramid, hit = load_pyramid(filepath, msg_type)
+    series = pyramid.range(field, start, end, points)
+    series['label'] = f"{msg_type}.{field}"
+    return {
+        'kind': 'time',
+        'x_label': 'Time (s)',
+        'extent': [pyramid.t0, pyramid.entry['t_end']],
+        'series': {'value': series},
+    }, hit
+
+# ---------------------------------------------------------------- range vs signal
+
+def _extract_signal(filepath, start, end):
+    if _log_ext(filepath) == '.bin':
+        from tools.bin_range_signal import extract_signal_data
+
+        ctrl_rssi, ctrl_lq, telem_rssi = extract_signal_data(filepath, start, end)
+    else:
+        from tools.ulg_range_signal import parse_ulg_log
+
+        ctrl_rssi, ctrl_lq, telem_rssi, error = parse_ulg_log(filepath, start, end)
+        if error:
+            raise ValueError(error)
+    return {'ctrl_lq': ctrl_lq, 'ctrl_rssi': ctrl_rssi, 'telem_rssi': telem_rssi}
+
+def _signal_points(filepath, start, end):
+    """{series: (x, y) arrays} for a log and time window, from the in-process cache when possible."""
+    import numpy as np
+
+    key = (os.path.abspath(filepath), start, end)
+    stamp = source_stamp(filepath)
+    with _signal_lock:
+        cached = _signal_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            _signal_cache.move_to_end(key)
+            return cached[1], True
+
+    points = {}
+    for name, pairs in _extract_signal(filepath, start, end).items():
+        xy = np.asarray(pairs, dtype=np.float64).reshape(-1, 2)
+        points[name] = (xy[:, 0], xy[:, 1])
+
+    with _signal_lock:
+        _signal_cache[key] = (stamp, points)
+        while len(_signal_cache) > SIGNAL_CACHE_SIZE:
+            _signal_cache.popitem(last=False)
+    return points, False
+
+def decimate_scatter(x, y, x_min, x_max, columns):
+    """The first point in each cell of a columns x SCATTER_ROWS grid over [x_min, x_max]."""
+    import numpy as np
+
+    keep = (x >= x_min) & (x <= x_max)
+    x, y = x[keep], y[keep]
+    if len(x) == 0:
+        return x, y
+    y_min, y_max = float(y.min()), float(y.max())
+    col = ((x - x_min) / max(x_max - x_min, 1e-9) * (columns - 1)).astype(np.int64)
+    row = ((y - y_min) / max(y_max - y_min, 1e-9) * (SCATTER_ROWS - 1)).astype(np.int64)
+    _, first = np.unique(col * SCATTER_ROWS + row, return_index=True)
+    if len(first) > MAX_RANGE_POINTS:
+        first = first[np.linspace(0, len(first) - 1, MAX_RANGE_POINTS).astype(np.int64)]
+    first.sort()
+    return x[first], y[first]
+
+def range_signal_chart_data(filepath, start=None, end=None, x_min=None, x_max=None, points=TILE_SIZE):
+    """
+    Signal strength against 3D range for the [start, end] time window, thinned to the
+    [x_min, x_max] range view. Returns (data, cache_hit); raises ValueError without signal data.
+    """
+    import numpy as np
+
+    labels = SIGNAL_LABELS[_log_ext(filepath)]
+    all_points, hit = _signal_points(filepath, start, end)
+    if not any(len(x) for x, _ in all_points.values()):
+        raise ValueError('No valid signal data found in log file.')
+
+    all_x = np.concatenate([x for x, _ in all_points.values()])
+    extent = [float(all_x.min()), float(all_x.max())]
+    x_min = extent[0] if x_min is None else x_min
+    x_max = extent[1] if x_max is None else x_max
+    columns = max(1, min(points, MAX_RANGE_POINTS))
+
+    series = {}
+    for name, (x, y) in all_points.items():
+        if len(x) == 0:
+            continue
+        x, y = decimate_scatter(x, y, x_min, x_max, columns)
+        series[name] = {'label': labels[name], 'x': x.tolist(), 'y': y.tolist()}
+    return {
+        'kind': 'scatter',
+        'x_label': '3D Distance from Home (meters)',
+        'extent': extent,
+        'series': series,
+    }, hit
@@ -0,0 +1,320 @@
+"""
+compressed_logs.py
+Compressed .bin / .ulg inputs (.gz, .xz, .zst and .zip bundles).
+
+A compressed log is named after the log it holds: flight.bin.gz, flight.ulg.zst, flight.bin.xz.
+A .zip bundle holding a single log can be used as it is; a log inside a bundle with several is
+named bundle.zip/member.bin (as zipfile.Path does).
+
+Sequential readers (the stream decoders, and through them the parameter and summary tools) take
+the decompressed bytes chunk by chunk, without writing anything to disk. Readers that need random
+access (time-window bisection, the NumPy .ulg reader, DFReader) do need the decompressed log on
+disk: by default a copy in the temp directory, as large as the decompressed log, memory-mapped
+like a plain log and removed when the last reader in the process is done. A job that reads the
+same log several times (the index build) holds one copy for all of them with decompressed_log().
+
+Set FLIGHT_TOOLS_KEEP_DECOMPRESSED=1 (the web app does) to keep the copy beside the log instead,
+as <log>.decompressed.bin / .ulg: it is made once, under a file lock, and then shared by every
+process and job reading that log, until the log changes or is deleted. In the upload store that
+puts it in the log's object directory, where the quota counts it and eviction removes it with the
+log. Where the log directory is read-only (or FLIGHT_TOOLS_NO_CACHE is set) the temp copy is used.
+.zst needs the zstandard package.
+"""
+
+import os
+import re
+import mmap
+import shutil
+import zipfile
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock; a racing copy is only made twice
+    fcntl = None
+
+LOG_EXTENSIONS = ('.bin', '.ulg')
+COMPRESSIONS = {'.gz': 'gzip', '.xz': 'xz', '.zst': 'zstd', '.zip': 'zip'}
+DEFAULT_CHUNK_SIZE = 1 << 20
+SPILL_CHUNK_SIZE = 8 << 20
+
+_ZIP_MEMBER = re.compile(r'\.zip[/\\]', re.IGNORECASE)
+
+KEPT_COPY_SUFFIX = '.decompressed'
+
+_copies = {}  # compressed log -> [decompressed copy, users, temporary], while decompressed_log() holds it
+_copies_lock = threading.Lock()
+
+def split_member(path):
+    """(archive, member) for a log inside a .zip bundle, else (path, None)."""
+    if not os.path.isfile(path):
+        for match in _ZIP_MEMBER.finditer(path):
+            archive = path[:match.start() + 4]
+            if os.path.isfile(archive):
+                return archive, path[match.end():].replace('\\', '/')
+    return path, None
+
+def compression(path):
+    """'gzip', 'xz', 'zstd' or 'zip' for a compressed log, None for a plain one."""
+    archive, member = split_member(path)
+    if member is not None:
+        return 'zip'
+    return COMPRESSIONS.get(os.path.splitext(path)[1].lower())
+
+def is_compressed(path):
+    return compression(path) is not None
+
+def log_exists(path):
+    return os.path.exists(split_member(path)[0])
+
+def zip_log_members(archive):
+    """Names of the .bin/.ulg logs in a .zip bundle, in archive order."""
+    with zipfile.ZipFile(archive) as zf:
+        return [info.filename for info in zf.infolist()
+                if not info.is_dir() and info.filename.lower().endswith(LOG_EXTENSIONS)]
+
+def _zip_member(path):
+    archive, member = split_member(path)
+    if member is not None:
+        return archive, member
+    members = zip_log_members(path)
+    if len(members) != 1:
+        found = f"{len(members)} logs" if members else "no .bin or .ulg log"
+        raise ValueError(f"{os.path.basename(path)} holds {found}; name one as {os.path.basename(path)}/<log>")
+    return path, members[0]
+
+def member_size(path):
+    """Decompressed size of a log in a .zip bundle (.gz, .xz and .zst do not record it reliably: None)."""
+    if compression(path) != 'zip':
+        return None
+    archive, member = _zip_member(path)
+    with zipfile.ZipFile(archive) as zf:
+        return zf.getinfo(member).file_size
+
+def log_extension(path):
+    """
+    '.bin' or '.ulg' for a plain or compressed log ('flight.bin.gz' -> '.bin'), else the plain
+    extension. A .zip bundle that exists on disk is looked into; an upload name cannot be.
+    """
+    if compression(path) == 'zip':
+        try:
+            path = _zip_member(path)[1]
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return '.zip'
+    root, ext = os.path.splitext(path)
+    if ext.lower() in COMPRESSIONS and ext.lower() != '.zip':
+        root, ext = os.path.splitext(root)
+    return ext.lower()
+
+def log_stem(path):
+    """
+    The path without its log and compression extensions ('a/flight.bin.gz' -> 'a/flight'), for
+    naming outputs; a bundled log is named after the bundle and the member.
+    """
+    archive, member = split_member(path)
+    if member is not None:
+        path = os.path.splitext(archive)[0] + '_' + member.replace('/', '_')
+    root, ext = os.path.splitext(path)
+    if ext.lower() in COMPRESSIONS:
+        root, ext = os.path.splitext(root)
+    return root if ext.lower() in LOG_EXTENSIONS else root + ext
+
+def is_log_name(filename):
+    """True for an upload or file name the tools can read (a .zip is checked once it is on disk)."""
+    name = filename.lower()
+    return name.endswith(LOG_EXTENSIONS) or name.endswith('.zip') or any(
+        name.endswith(ext + suffix) for ext in LOG_EXTENSIONS for suffix in COMPRESSIONS if suffix != '.zip')
+
+def open_log(path):
+    """Binary file object reading the (decompressed) log; use it as a context manager."""
+    kind = compression(path)
+    if kind is None:
+        return open(path, 'rb')
+    with _copies_lock:
+        copy = _copies.get(path)
+        if copy is not None:
+            return open(copy[0], 'rb')  # ✅ Decompressed already
+    if kind == 'gzip':
+        import gzip
+        return gzip.open(path, 'rb')
+    if kind == 'xz':
+        import lzma
+        return lzma.open(path, 'rb')
+    if kind == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("Reading .zst logs needs the zstandard package (pip install zstandard)") from None
+        # ✅ Seekable-format logs are many small frames: keep reading across them
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+    archive, member = _zip_member(path)
+    with zipfile.ZipFile(archive) as zf:
+        return zf.open(member)  # the member stays readable after the archive handle is closed
+
+def iter_log_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """The (decompressed) log as a sequence of byte chunks."""
+    with open_log(path) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            yield chunk
+
+class _Members:
+    """zlib/lzma decompressor that carries on into the next member of a concatenated stream."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._decompressor = factory()
+
+    def decompress(self, data):
+        out = []
+        while data:
+            out.append(self._decompressor.decompress(data))
+            if not self._decompressor.eof:
+                break
+            data = self._decompressor.unused_data
+            self._decompressor = self._factory()
+        return b''.join(out)
+
+def stream_decompressor(kind):
+    """
+    Object whose decompress(chunk) returns the next decompressed bytes, for a log arriving chunk
+    by chunk (an upload); kind as from compression(). None for zip, which is read from its end.
+    """
+    if kind == 'gzip':
+        import zlib
+        return _Members(lambda: zlib.decompressobj(wbits=31))
+    if kind == 'xz':
+        import lzma
+        return _Members(lzma.LZMADecompressor)
+    if kind == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("Reading .zst logs needs the zstandard package (pip install zstandard)") from None
+        return zstandard.ZstdDecompressor().decompressobj(read_across_frames=True)
+    return None
+
+def keeping_copies():
+    """True when decompressed copies are kept beside their logs (FLIGHT_TOOLS_KEEP_DECOMPRESSED)."""
+    return (os.environ.get('FLIGHT_TOOLS_KEEP_DECOMPRESSED', '') not in ('', '0')
+            and os.environ.get('FLIGHT_TOOLS_NO_CACHE', '') in ('', '0'))
+
+def kept_copy_path(path):
+    """Where the decompressed copy of a compressed log is kept beside it (see the module docstring)."""
+    archive, member = split_member(path)
+    base = path if member is None else f"{archive}.{member.replace('/', '_')}"
+    return base + KEPT_COPY_SUFFIX + log_extension(path)
+
+def has_current_copy(path):
+    """True if the kept copy of a compressed log exists and was made from the log as it is now."""
+    try:
+        return os.stat(kept_copy_path(path)).st_mtime_ns == os.stat(split_member(path)[0]).st_mtime_ns
+    except OSError:
+        return False
+
+def _decompress_into(path, copy_file):
+    with open_log(path) as f:
+        shutil.copyfileobj(f, copy_file, SPILL_CHUNK_SIZE)
+
+def _decompress_to_file(path):
+    """Decompress a log into a new file in the temp directory; returns the file's path."""
+    fd, copy = tempfile.mkstemp(prefix='flight-tools-', suffix=log_extension(path))
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            _decompress_into(path, out)
+    except BaseException:
+        os.remove(copy)
+        raise
+    return copy
+
+def _keep_copy(path):
+    """The kept copy of a compressed log, made now unless a current one exists; raises OSError."""
+    copy = kept_copy_path(path)
+    with open(copy + '.lock', 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # ✅ One process decompresses; the others wait and reuse it
+        source = os.stat(split_member(path)[0])
+        if has_current_copy(path):
+            return copy
+        tmp_path = f"{copy}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as out:
+                _decompress_into(path, out)
+            # ✅ The copy carries the log's mtime: a changed log no longer matches it
+            os.utime(tmp_path, ns=(source.st_atime_ns, source.st_mtime_ns))
+            os.replace(tmp_path, copy)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return copy
+
+def _make_copy(path):
+    """[decompressed copy, 0 users, temporary] for a compressed log."""
+    if keeping_copies():
+        try:
+            return [_keep_copy(path), 0, False]
+        except OSError:
+            pass  # a read-only log directory, or the log was removed meanwhile: decompress to temp
+    return [_decompress_to_file(path), 0, True]
+
+@contextmanager
+def decompressed_log(path):
+    """
+    A plain file holding the log, for the block: path itself unless it is compressed, else a
+    decompressed copy that open_log() and log_buffer() of path (and nested calls) also read,
+    so the log is decompressed once however often the block reads it.
+    """
+    if not is_compressed(path):
+        yield path
+        return
+    with _copies_lock:
+        copy = _copies.get(path)
+        if copy is not None:
+            copy[1] += 1
+    if copy is None:
+        copy = _make_copy(path)
+        copy[1] = 1
+        with _copies_lock:
+            other = _copies.setdefault(path, copy)
+            if other is not copy:  # another thread finished first: use its copy
+                other[1] += 1
+                if copy[2]:
+                    os.remove(copy[0])
+                copy = other
+    try:
+        yield copy[0]
+    finally:
+        with _copies_lock:
+            copy[1] -= 1
+            if copy[1] == 0:
+                del _copies[path]
+                if copy[2]:
+                    try:
+                        os.remove(copy[0])  # ✅ Open maps keep their pages until they close
+                    except OSError:
+                        pass
+
+@contextmanager
+def log_buffer(path):
+    """
+    The whole log for random access: a read-only memory map of a plain log, or of a decompressed
+    copy of a compressed one (see decompressed_log()).
+    """
+    if is_compressed(path):
+        with decompressed_log(path) as copy, log_buffer(copy) as data:
+            yield data
+        return
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield data
+    finally:
+        try:
+            data.close()
+        except BufferError:
+            pass  # a view of it is still alive (an exception's traceback); unmapped when that goes
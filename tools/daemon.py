@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+daemon.py
+Opt-in warm analysis daemon for the Flight-Tools CLI scripts.
+
+`python tools/daemon.py serve` imports matplotlib, pymavlink, pyulog and the tools once and then
+listens on a UNIX socket. While it runs, each CLI tool forwards its command line to the daemon
+(forward_to_daemon() at the top of the tool's __main__ block) and prints the daemon's output
+as the run produces it, so repeated invocations skip interpreter start-up and heavy imports. When
+no daemon is listening the tools simply run in-process as before.
+
+Runs are executed one at a time (the tools use process-wide state: sys.argv, stdout, the working
+directory) with the tool's own __main__ code, in the caller's working directory and environment,
+so output and exit codes are identical to a local run. Settings that are read when a module is
+imported (IMPORT_TIME_ENV) cannot change per run: a caller whose values differ from those the
+daemon started with (or that the tools themselves set on import) runs locally.
+
+Between runs the daemon keeps decoded logs in memory (see decode_cache.py, up to --cache-mb), so
+repeated runs on the same log skip decoding, and the worker pools of worker_pool.py stay up.
+
+The socket lives in $XDG_RUNTIME_DIR when set (else a per-user temp path), and a client only talks
+to a socket owned by its own user. Set FLIGHT_TOOLS_DAEMON=0 to bypass a running daemon.
+"""
+
+import io
+import os
+import sys
+import json
+import stat
+import time
+import runpy
+import socket
+import argparse
+import tempfile
+import threading
+import socketserver
+from contextlib import redirect_stdout, redirect_stderr
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools import decode_cache
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+CONNECT_TIMEOUT = 0.5
+
+# Modules imported once at daemon start (the cost every CLI run would otherwise pay)
+WARM_MODULES = (
+    'numpy', 'matplotlib.pyplot', 'pymavlink.mavutil', 'pymavlink.DFReader', 'pyulog',
+    'tools.bin_info', 'tools.bin_parameter_list', 'tools.bin_power_plot', 'tools.bin_range_signal',
+    'tools.bin_parameter_compare', 'tools.bin_stream_decoder', 'tools.flight_segments', 'tools.field_pyramid',
+    'tools.flight_report', 'tools.report_charts', 'tools.fleet_parameter_compare', 'tools.parameter_timeline',
+    'tools.ulg_info', 'tools.ulg_parameter_list', 'tools.ulg_power_plot', 'tools.ulg_range_signal',
+    'tools.ulg_parameter_compare', 'tools.ulg_stream_decoder', 'tools.ulg_reader', 'tools.compressed_logs',
+    'tools.log_index',
+)
+
+# Environment read when pymavlink is imported; the daemon keeps the values it started with
+IMPORT_TIME_ENV = ('MAVLINK_DIALECT', 'MAVLINK20')
+DEFAULT_CACHE_MB = 1024
+
+_run_lock = threading.Lock()
+_started_env = {}  # IMPORT_TIME_ENV as the daemon was started, before warm_up() imported the tools
+
+def default_socket_path():
+    path = os.environ.get('FLIGHT_TOOLS_SOCKET')
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "flight-tools.sock")  # ✅ Private to the user
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(tempfile.gettempdir(), f"flight-tools-{uid}.sock")
+
+def is_own_socket(socket_path):
+    """True if socket_path is a socket (not a link) owned by this user, so its replies can be trusted."""
+    try:
+        st = os.lstat(socket_path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+def _connect(payload, socket_path=None, timeout=None):
+    """Send one JSON request; returns the connected socket. Raises OSError if no daemon is listening."""
+    socket_path = socket_path or default_socket_path()
+    if not is_own_socket(socket_path):
+        raise PermissionError(f"{socket_path} is not a socket owned by this user")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(socket_path)
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(payload).encode('utf-8') + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def _request(payload, socket_path=None, timeout=None):
+    """Send one JSON request and return the JSON reply; raises OSError if no daemon is listening."""
+    sock = _connect(payload, socket_path, timeout)
+    try:
+        with sock.makefile('rb') as reply:
+            return json.loads(reply.read().decode('utf-8'))
+    finally:
+        sock.close()
+
+def forward_to_daemon(tool_file, argv=None):
+    """
+    Run this CLI invocation in the daemon if one is listening, then exit with its status.
+    Returns (so the tool runs in-process) when there is no daemon or it is disabled.
+    """
+    if os.environ.get('FLIGHT_TOOLS_IN_DAEMON') or not hasattr(socket, 'AF_UNIX') \
+            or os.environ.get('FLIGHT_TOOLS_DAEMON') == '0':
+        return
+    socket_path = default_socket_path()
+    if not os.path.exists(socket_path):
+        return
+    if not is_own_socket(socket_path):
+        print(f"[WARNING] Ignoring daemon socket {socket_path}: not owned by this user", file=sys.stderr)
+        return
+    payload = {
+        'command': 'run',
+        'tool': os.path.basename(tool_file),
+        'argv': list(sys.argv[1:] if argv is None else argv),
+        'cwd': os.getcwd(),
+        'env': dict(os.environ),
+    }
+    try:
+        sock = _connect(payload, socket_path)
+    except OSError:
+        return  # stale socket or daemon went away: fall back to running locally
+
+    # ✅ Output is relayed as the run produces it: one JSON message per line
+    started = False
+    streams = {'stdout': sys.stdout, 'stderr': sys.stderr}
+    try:
+        with sock.makefile('rb') as replies:
+            for line in replies:
+                message = json.loads(line.decode('utf-8'))
+                if 'error' in message and not started:
+                    print(f"[WARNING] Daemon could not run {payload['tool']}: {message['error']}", file=sys.stderr)
+                    return
+                if 'exit_code' in message:
+                    sys.stdout.flush()
+                    sys.exit(message['exit_code'])
+                for name, stream in streams.items():
+                    if name in message:
+                        started = True
+                        stream.write(message[name])
+                        stream.flush()
+    except (OSError, ValueError):
+        if not started:
+            return
+    finally:
+        sock.close()
+    print(f"❌ The daemon stopped while running {payload['tool']}", file=sys.stderr)
+    sys.exit(1)
+
+class _RelayWriter(io.TextIOBase):
+    """A text stream that sends whole lines to emit() as {name: text} messages."""
+
+    def __init__(self, emit, name):
+        self._emit = emit
+        self._name = name
+        self._buffer = []
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self._buffer.append(text)
+        if '\n' in text:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self._buffer and self._emit is not None:
+            try:
+                self._emit({self._name: ''.join(self._buffer)})
+            except OSError:
+                self._emit = None  # the client went away; the run finishes without it
+        self._buffer = []
+
+def run_tool(tool, argv, cwd, env=None, emit=None):
+    """
+    Execute tools/<tool> as __main__ with argv in cwd and environment env (default: the daemon's).
+    Returns {'exit_code', 'stdout', 'stderr'}; with emit, output is sent to emit() as
+    {'stdout': text} / {'stderr': text} messages while it runs and the result is {'exit_code'}.
+    """
+    path = os.path.join(TOOLS_DIR, os.path.basename(tool))
+    if not tool.endswith('.py') or not os.path.isfile(path):
+        return {'error': f"Unknown tool: {tool}"}
+
+    if not os.path.isdir(cwd):
+        return {'error': f"Working directory not found: {cwd}"}
+
+    if env is not None:
+        # ✅ A value the tools set on import (MAVLINK_DIALECT) matches a caller that has not run them yet
+        differs = [name for name in IMPORT_TIME_ENV
+                   if env.get(name) not in (_started_env.get(name), os.environ.get(name))]
+        if differs:
+            return {'error': f"{', '.join(differs)} differs from the daemon's; running locally"}
+
+    if emit is None:
+        stdout, stderr = io.StringIO(), io.StringIO()
+    else:
+        stdout, stderr = _RelayWriter(emit, 'stdout'), _RelayWriter(emit, 'stderr')
+    exit_code = 0
+    with _run_lock:
+        saved_argv, saved_path, saved_cwd = sys.argv, list(sys.path), os.getcwd()
+        saved_env = dict(os.environ)
+        try:
+            os.chdir(cwd)
+            sys.argv = [path] + list(argv)
+            if env is not None:
+                os.environ.clear()
+                os.environ.update(env)
+            os.environ['FLIGHT_TOOLS_IN_DAEMON'] = '1'
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    runpy.run_path(path, run_name="__main__")
+                except SystemExit as e:
+                    if isinstance(e.code, int):
+                        exit_code = e.code
+                    elif e.code is not None:
+                        print(e.code, file=sys.stderr)
+                        exit_code = 1
+                except Exception as e:
+                    print(f"❌ {type(e).__name__}: {e}", file=sys.stderr)
+                    exit_code = 1
+        finally:
+            stdout.flush()
+            stderr.flush()
+            sys.argv = saved_argv
+            sys.path[:] = saved_path
+            os.chdir(saved_cwd)
+            os.environ.clear()
+            os.environ.update(saved_env)
+            _close_figures()
+    if emit is not None:
+        return {'exit_code': exit_code}
+    return {'exit_code': exit_code, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+def _close_figures():
+    if 'matplotlib.pyplot' in sys.modules:
+        sys.modules['matplotlib.pyplot'].close('all')
+
+class _Handler(socketserver.StreamRequestHandler):
+    def emit(self, message):
+        self.wfile.write(json.dumps(message).encode('utf-8') + b"\n")
+        self.wfile.flush()
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode('utf-8'))
+        except ValueError as e:
+            reply = {'error': f"Bad request: {e}"}
+        else:
+            reply = self.server.dispatch(request, self.emit)
+        try:
+            self.emit(reply)
+        except OSError:
+            pass  # the client went away
+
+class AnalysisDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self.started = time.time()
+        self.runs = 0
+        if os.path.exists(socket_path):
+            os.remove(socket_path)  # caller already checked nothing is listening
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+
+    def dispatch(self, request, emit=None):
+        command = request.get('command')
+        if command == 'run':
+            self.runs += 1
+            return run_tool(request.get('tool', ''), request.get('argv', []), request.get('cwd', os.getcwd()),
+                            request.get('env'), emit)
+        if command == 'status':
+            return {'pid': os.getpid(), 'uptime_s': round(time.time() - self.started, 1), 'runs': self.runs,
+                    'socket': self.socket_path, 'decode_cache': decode_cache.stats()}
+        if command == 'stop':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'stopping': True}
+        return {'error': f"Unknown command: {command}"}
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+def warm_up():
+    import importlib
+    import matplotlib
+    matplotlib.use("Agg")  # ✅ Headless backend, as the CLI tools use
+    started = time.perf_counter()
+    for name in WARM_MODULES:
+        importlib.import_module(name)
+    return time.perf_counter() - started
+
+def serve(socket_path=None, cache_mb=DEFAULT_CACHE_MB):
+    socket_path = socket_path or default_socket_path()
+    if os.path.lexists(socket_path) and not is_own_socket(socket_path):
+        print(f"❌ {socket_path} exists and is not this user's socket; choose another with --socket")
+        return 1
+    try:
+        status = _request({'command': 'status'}, socket_path, timeout=2)
+        print(f"❌ A daemon is already running (pid {status.get('pid')}) on {socket_path}")
+        return 1
+    except (OSError, ValueError):
+        pass
+
+    os.environ['FLIGHT_TOOLS_IN_DAEMON'] = '1'  # tools run by the daemon must not forward again
+    _started_env.update({name: os.environ.get(name) for name in IMPORT_TIME_ENV})
+    seconds = warm_up()
+    decode_cache.enable(cache_mb << 20)
+    server = AnalysisDaemon(socket_path)
+    print(f"✅ Flight-Tools daemon (pid {os.getpid()}) warmed up in {seconds:.2f} s, listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    print("[INFO] Daemon stopped")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm local daemon for the Flight-Tools CLI scripts")
+    parser.add_argument("command", choices=["serve", "status", "stop"])
+    parser.add_argument("--socket", help="UNIX socket path (default: $FLIGHT_TOOLS_SOCKET, $XDG_RUNTIME_DIR or a per-user temp path)")
+    parser.add_argument("--cache-mb", type=int, default=DEFAULT_CACHE_MB,
+                        help=f"Decoded logs kept in memory between runs (default: {DEFAULT_CACHE_MB} MB, 0 = off)")
+    args = parser.parse_args()
+
+    if not hasattr(socket, 'AF_UNIX'):
+        print("❌ UNIX sockets are not available on this platform")
+        sys.exit(1)
+
+    if args.command == "serve":
+        sys.exit(serve(args.socket, args.cache_mb))
+
+    try:
+        reply = _request({'command': args.command}, args.socket, timeout=5)
+    except (OSError, ValueError):
+        print("❌ No daemon is running")
+        sys.exit(1)
+    if args.command == "status":
+        cache = reply['decode_cache']
+        print(f"📄 Daemon pid {reply['pid']}: up {reply['uptime_s']} s, {reply['runs']} runs, socket {reply['socket']}")
+        print(f"   Decode cache: {cache['entries']} logs, {cache['bytes'] >> 20} of {cache['max_bytes'] >> 20} MB, "
+              f"{cache['hits']} hits, {cache['misses']} misses")
+    else:
+        print("✅ Daemon stopping")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+decode_cache.py
+Decoded logs kept in memory between the runs of a long-lived process (the CLI daemon).
+
+Off by default: a one-shot CLI run or a web worker decodes every time, as before. enable()
+turns it on for the process; read_ulog() and iter_bin_window() results are then kept per
+(log, source stamp, arguments), the least recently used dropped first beyond the byte budget,
+and a log that changed on disk is decoded again. Cached results are shared by every later
+caller and must be treated as read-only.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from tools.log_cache import source_stamp
+
+_entries = OrderedDict()  # key -> (value, bytes)
+_lock = threading.Lock()
+_state = {'max_bytes': 0, 'bytes': 0, 'hits': 0, 'misses': 0}
+
+def enable(max_bytes):
+    """Keep up to max_bytes of decoded logs in this process (0 turns the cache off and empties it)."""
+    with _lock:
+        _state['max_bytes'] = max(int(max_bytes), 0)
+        _evict()
+
+def is_enabled():
+    return _state['max_bytes'] > 0
+
+def stats():
+    """{'entries', 'bytes', 'max_bytes', 'hits', 'misses'} of the cache."""
+    with _lock:
+        return dict(_state, entries=len(_entries))
+
+def _evict():
+    while _entries and _state['bytes'] > _state['max_bytes']:
+        _, (_, size) = _entries.popitem(last=False)
+        _state['bytes'] -= size
+
+def cached(kind, filepath, args, decode, size):
+    """
+    decode() of this log with these (hashable) args, from the cache when it holds a result for
+    the log as it is on disk now; size(value) estimates a result's bytes.
+    """
+    if not is_enabled():
+        return decode()
+    try:
+        stamp = tuple(sorted(source_stamp(filepath).items()))
+    except OSError:
+        return decode()
+    path = os.path.abspath(filepath)
+    key = (kind, path, stamp, args)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+            _state['hits'] += 1
+            return entry[0]
+        _state['misses'] += 1
+
+    value = decode()
+    nbytes = size(value)
+    with _lock:
+        if nbytes <= _state['max_bytes'] and key not in _entries:
+            # ✅ Results for an older version of this log are never served again
+            for old in [k for k in _entries if k[:2] == (kind, path) and k[2] != stamp]:
+                _state['bytes'] -= _entries.pop(old)[1]
+            _entries[key] = (value, nbytes)
+            _state['bytes'] += nbytes
+            _evict()
+    return value
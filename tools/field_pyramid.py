@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+field_pyramid.py
+Multi-resolution min/max/mean pyramid for every numeric field of a log, so a zoomable chart can
+fetch any zoom level of any field as a bounded number of points.
+
+Level 0 buckets are about one sample interval wide (at most MAX_BASE_BUCKETS per field); each
+level above halves the resolution, up to a level that fits in a single tile. Buckets keep min,
+max, sum and count, so means stay exact at every level.
+
+Pyramids are built per message type on first use and cached beside the log in <log>.pyramid/:
+meta.json (source stamp, fields, level layout) and one <type>.npy array per message type,
+memory-mapped when served (the OPEN_PYRAMIDS most recently used stay mapped).
+"""
+
+import os
+import sys
+import math
+import argparse
+import threading
+from collections import OrderedDict
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import timed_stage, stage, add_profile_arguments, profile_session
+from tools.time_window import iter_bin_window, read_ulg_window
+from tools.log_cache import cache_base, source_stamp, is_current, read_json, write_json
+from tools.compressed_logs import log_exists, log_extension
+
+PYRAMID_SUFFIX = ".pyramid"
+CACHE_VERSION = 1
+TILE_SIZE = 512
+MAX_BASE_BUCKETS = 1 << 17
+MAX_RANGE_POINTS = 4 * TILE_SIZE
+OPEN_PYRAMIDS = 64  # memory-mapped types kept open, least recently used dropped first
+
+# Row order of the per-field (4, buckets) block
+STAT_MIN, STAT_MAX, STAT_SUM, STAT_COUNT = range(4)
+
+# DataFlash format characters that are not numbers (strings and arrays)
+BIN_NON_NUMERIC_FORMATS = set('nNZa')
+
+_build_lock = threading.Lock()
+_open_pyramids = OrderedDict()
+_open_lock = threading.Lock()
+
+def pyramid_dir(filepath):
+    return cache_base(filepath) + PYRAMID_SUFFIX
+
+# ---------------------------------------------------------------- sources
+
+def _collect_bin(filepath, msg_types=None):
+    """{type: (times, {field: values})} for the numeric fields of the given .bin message types."""
+    import numpy as np
+
+    rows = {}
+    columns = {}
+    for msg in iter_bin_window(filepath, msg_types):
+        msg_type = msg.get_type()
+        fields = columns.get(msg_type)
+        if fields is None:
+            fmt = msg.fmt
+            fields = columns[msg_type] = [col for col, fc in zip(fmt.columns, fmt.format)
+                                          if col != 'TimeUS' and fc not in BIN_NON_NUMERIC_FORMATS]
+            rows[msg_type] = ([], [])
+        times, values = rows[msg_type]
+        times.append(msg._timestamp)
+        values.append([getattr(msg, col) for col in fields])
+
+    collected = {}
+    for msg_type, (times, values) in rows.items():
+        table = np.asarray(values, dtype=np.float64).reshape(len(times), len(columns[msg_type]))
+        collected[msg_type] = (np.asarray(times, dtype=np.float64),
+                               {field: table[:, i] for i, field in enumerate(columns[msg_type])})
+    return collected
+
+def _collect_ulg(filepath, msg_types=None):
+    """{topic: (times, {field: values})} for the numeric fields of the given .ulg topics (instance 0)."""
+    return ulog_numeric_fields(read_ulg_window(filepath, message_name_filter_list=msg_types))
+
+def ulog_numeric_fields(ulog):
+    """_collect_ulg() of a log already decoded."""
+    import numpy as np
+
+    collected = {}
+    for dataset in ulog.data_list:
+        if dataset.multi_id != 0:
+            continue
+        data = dataset.data
+        times = data['timestamp'].astype(np.float64) / 1e6
+        fields = {name: values.astype(np.float64) for name, values in data.items()
+                  if name != 'timestamp' and values.dtype.kind in 'biuf'}
+        collected[dataset.name] = (times, fields)
+    return collected
+
+def collect_fields(filepath, msg_types=None):
+    ext = log_extension(filepath)
+    if ext == '.bin':
+        return _collect_bin(filepath, msg_types)
+    if ext == '.ulg':
+        return _collect_ulg(filepath, msg_types)
+    raise ValueError(f"Unsupported log type: {ext}")
+
+# ---------------------------------------------------------------- levels
+
+def _base_layout(times):
+    """(t0, level-0 bucket width, level-0 bucket count) for a sample time vector."""
+    import numpy as np
+
+    t0 = float(times.min())
+    span = float(times.max()) - t0
+    steps = np.diff(np.unique(times))
+    width = float(np.median(steps)) if len(steps) else 0.0
+    width = max(width, span / MAX_BASE_BUCKETS)
+    if width <= 0:
+        width = 1.0
+    return t0, width, int(span // width) + 1
+
+def level_lengths(base_count):
+    lengths = [base_count]
+    while lengths[-1] > TILE_SIZE:
+        lengths.append((lengths[-1] + 1) // 2)
+    return lengths
+
+def _base_level(bucket, order, values, count):
+    """(4, count) min/max/sum/count of values grouped by bucket; empty buckets hold +inf/-inf/0/0."""
+    import numpy as np
+
+    stats = np.empty((4, count))
+    stats[STAT_MIN] = np.inf
+    stats[STAT_MAX] = -np.inf
+    stats[STAT_SUM] = 0.0
+    stats[STAT_COUNT] = 0.0
+
+    values = values[order]
+    keep = np.isfinite(values)
+    values = values[keep]
+    if len(values) == 0:
+        return stats
+    sorted_bucket = bucket[keep]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_bucket)) + 1))
+    used = sorted_bucket[starts]
+    stats[STAT_MIN, used] = np.minimum.reduceat(values, starts)
+    stats[STAT_MAX, used] = np.maximum.reduceat(values, starts)
+    stats[STAT_SUM, used] = np.add.reduceat(values, starts)
+    stats[STAT_COUNT, used] = np.diff(np.append(starts, len(values)))
+    return stats
+
+def _coarsen(stats):
+    """Merge adjacent bucket pairs: the next level up."""
+    import numpy as np
+
+    if stats.shape[1] % 2:
+        pad = np.array([[np.inf], [-np.inf], [0.0], [0.0]])
+        stats = np.concatenate((stats, pad), axis=1)
+    pairs = stats.reshape(4, -1, 2)
+    return np.stack((pairs[STAT_MIN].min(axis=1), pairs[STAT_MAX].max(axis=1),
+                     pairs[STAT_SUM].sum(axis=1), pairs[STAT_COUNT].sum(axis=1)))
+
+def _write_type_pyramid(path, times, fields):
+    """Write every level of every field into one (fields, 4, buckets) .npy; returns its meta entry."""
+    import numpy as np
+
+    t0, width, base_count = _base_layout(times)
+    lengths = level_lengths(base_count)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).tolist()
+    names = list(fields)
+
+    bucket = np.minimum(((times - t0) / width).astype(np.int64), base_count - 1)
+    order = np.argsort(bucket, kind='stable')
+    bucket = bucket[order]
+
+    tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+    out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float64,
+                                    shape=(len(names), 4, sum(lengths)))
+    for i, name in enumerate(names):
+        stats = _base_level(bucket, order, fields[name], base_count)
+        for offset, length in zip(offsets, lengths):
+            out[i, :, offset:offset + length] = stats
+            stats = _coarsen(stats) if length > TILE_SIZE else stats
+    out.flush()
+    del out
+    os.replace(tmp_path, path)
+
+    return {
+        'file': os.path.basename(path),
+        'fields': names,
+        'samples': int(len(times)),
+        't0': t0,
+        't_end': float(times.max()),
+        'bucket_s': width,
+        'levels': [{'offset': offset, 'length': length} for offset, length in zip(offsets, lengths)],
+    }
+
+# ---------------------------------------------------------------- cache
+
+def _read_meta(filepath):
+    meta = read_json(os.path.join(pyramid_dir(filepath), 'meta.json'))
+    if meta is None or not is_current(meta, filepath, CACHE_VERSION):
+        meta = {'version': CACHE_VERSION, 'source': source_stamp(filepath), 'types': {}}
+    return meta
+
+@timed_stage
+def build_pyramids(filepath, msg_types=None):
+    """Build (or rebuild) the pyramids of the given message types (None = all) and cache them."""
+    if not log_exists(filepath):
+        return {'error': f"File not found: {filepath}"}
+
+    try:
+        with stage("collect_fields"):
+            collected = collect_fields(filepath, msg_types)
+        return store_pyramids(filepath, collected)
+    except Exception as e:
+        return {'error': str(e)}
+
+def store_pyramids(filepath, collected):
+    """
+    Write pyramids for {name: (times, {field: values})} into the log's cache and return the meta.
+    Besides message types this takes series derived by the tools (e.g. 'chart.power').
+    """
+    with _build_lock:
+        meta = _read_meta(filepath)
+        out_dir = pyramid_dir(filepath)
+        os.makedirs(out_dir, exist_ok=True)
+        with stage("write_levels"):
+            for msg_type, (times, fields) in collected.items():
+                if len(times) == 0 or not fields:
+                    continue
+                path = os.path.join(out_dir, f"{msg_type}.npy")
+                meta['types'][msg_type] = _write_type_pyramid(path, times, fields)
+        write_json(os.path.join(out_dir, 'meta.json'), meta)
+    return meta
+
+def load_pyramid(filepath, msg_type, collect=None):
+    """
+    (FieldPyramid, cache_hit) for one message type, building it on first use.
+    collect() may supply the series instead ({msg_type: (times, fields)}) for derived data.
+    Raises ValueError if the log cannot be read or has no numeric fields of that type.
+    """
+    stamp = source_stamp(filepath)
+    key = (os.path.abspath(filepath), msg_type)
+    with _open_lock:
+        cached = _open_pyramids.get(key)
+        if cached is not None:
+            if cached.source == stamp:
+                _open_pyramids.move_to_end(key)
+                return cached, True
+            del _open_pyramids[key]  # ✅ The log changed: its old pyramid is never served again
+
+    meta = _read_meta(filepath)
+    hit = msg_type in meta['types']
+    if not hit:
+        if collect is None:
+            meta = build_pyramids(filepath, [msg_type])
+        else:
+            try:
+                meta = store_pyramids(filepath, collect())
+            except Exception as e:
+                meta = {'error': str(e)}
+        if 'error' in meta:
+            raise ValueError(meta['error'])
+        if msg_type not in meta['types']:
+            raise ValueError(f"No numeric fields of type '{msg_type}' in this log")
+
+    pyramid = FieldPyramid(pyramid_dir(filepath), msg_type, meta['types'][msg_type], meta['source'])
+    with _open_lock:
+        _open_pyramids[key] = pyramid
+        while len(_open_pyramids) > OPEN_PYRAMIDS:
+            _open_pyramids.popitem(last=False)  # its map closes once no request holds it
+    return pyramid, hit
+
+class FieldPyramid:
+    """The cached levels of one message type; tiles and ranges are slices of a memory-mapped array."""
+
+    def __init__(self, directory, msg_type, entry, source):
+        import numpy as np
+
+        self.msg_type = msg_type
+        self.entry = entry
+        self.source = source
+        self.fields = entry['fields']
+        self.levels = entry['levels']
+        self.t0 = entry['t0']
+        self.bucket_s = entry['bucket_s']
+        self._data = np.load(os.path.join(directory, entry['file']), mmap_mode='r')
+
+    def describe(self):
+        return {
+            'msg_type': self.msg_type,
+            'fields': self.fields,
+            'samples': self.entry['samples'],
+            'start_s': self.t0,
+            'end_s': self.entry['t_end'],
+            'tile_size': TILE_SIZE,
+            'levels': [{'level': i, 'bucket_s': self.level_width(i), 'buckets': level['length'],
+                        'tiles': math.ceil(level['length'] / TILE_SIZE)}
+                       for i, level in enumerate(self.levels)],
+        }
+
+    def level_width(self, level):
+        return self.bucket_s * (1 << level)
+
+    def _field_index(self, field):
+        try:
+            return self.fields.index(field)
+        except ValueError:
+            raise ValueError(f"No numeric field '{field}' in {self.msg_type}")
+
+    def _points(self, field, level, first, last):
+        """Non-empty buckets [first, last) of a level as columns: bucket start time, min, max, mean."""
+        import numpy as np
+
+        layout = self.levels[level]
+        first = max(first, 0)
+        last = min(last, layout['length'])
+        stats = np.array(self._data[self._field_index(field), :, layout['offset'] + first:layout['offset'] + max(first, last)])
+        used = np.flatnonzero(stats[STAT_COUNT] > 0)
+        width = self.level_width(level)
+        return {
+            'level': level,
+            'bucket_s': width,
+            'time': (self.t0 + (first + used) * width).tolist(),
+            'min': stats[STAT_MIN, used].tolist(),
+            'max': stats[STAT_MAX, used].tolist(),
+            'mean': (stats[STAT_SUM, used] / stats[STAT_COUNT, used]).tolist(),
+        }
+
+    def tile(self, field, level, tile):
+        if not 0 <= level < len(self.levels):
+            raise ValueError(f"Level must be between 0 and {len(self.levels) - 1}")
+        if tile < 0 or tile * TILE_SIZE >= self.levels[level]['length']:
+            raise ValueError(f"No tile {tile} at level {level}")
+        result = self._points(field, level, tile * TILE_SIZE, (tile + 1) * TILE_SIZE)
+        result['tile'] = tile
+        return result
+
+    def range(self, field, start=None, end=None, points=TILE_SIZE):
+        """The finest level that covers [start, end] in at most `points` buckets."""
+        start = self.t0 if start is None else max(start, self.t0)
+        end = self.entry['t_end'] if end is None else min(end, self.entry['t_end'])
+        points = max(1, min(points, MAX_RANGE_POINTS))
+        span = max(end - start, 0.0)
+        level = 0
+        while level < len(self.levels) - 1 and span / self.level_width(level) > points:
+            level += 1
+        width = self.level_width(level)
+        first = int((start - self.t0) // width)
+        last = int((end - self.t0) // width) + 1
+        return self._points(field, level, first, last)
+
+if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
+    parser = argparse.ArgumentParser(description="Build the zoom pyramids of a .bin or .ulg log's numeric fields")
+    parser.add_argument("input_file", help="Path to .bin or .ulg log file")
+    parser.add_argument("--type", action="append", dest="msg_types", metavar="MSG_TYPE",
+                        help="Only build this message type / topic (repeatable)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with profile_session(args):
+        result = build_pyramids(args.input_file, args.msg_types)
+    if 'error' in result:
+        print(f"❌ {result['error']}")
+        sys.exit(1)
+
+    print(f"📄 Pyramids in {pyramid_dir(args.input_file)}")
+    print(f"{'type':<36}{'fields':>7}{'samples':>10}{'levels':>8}{'bucket s':>12}")
+    for msg_type, entry in sorted(result['types'].items()):
+        print(f"{msg_type:<36}{len(entry['fields']):>7}{entry['samples']:>10}"
+              f"{len(entry['levels']):>8}{entry['bucket_s']:>12.4f}")
+    print(f"✅ {len(result['types'])} message types")
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+fleet_parameter_compare.py
+Compare the parameters of many .bin / .ulg logs against a reference configuration.
+
+Each log's final parameter set is extracted once and cached beside it (see parameter_sets.py),
+logs with identical sets are grouped by hash, and every distinct set is diffed against the
+reference in one vectorized pass. The reference is a log or a saved parameter file
+(.param / .parm / .params); by default it is the most common parameter set in the fleet.
+Writes CSV, JSON or a standalone HTML table.
+"""
+
+import os
+import sys
+import csv
+import html
+import json
+import argparse
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import timed_stage, stage, add_profile_arguments, profile_session
+from tools.parameter_sets import find_logs, load_parameter_sets, reference_parameter_set
+
+# Values closer than this (relative) are equal: float32 log values vs decimal parameter files
+DEFAULT_RTOL = 1e-6
+OUTPUT_FORMATS = ('csv', 'json', 'html')
+
+def _most_common_set(entries):
+    counts = {}
+    for entry in entries:
+        counts[entry['hash']] = counts.get(entry['hash'], 0) + 1
+    best = max(counts, key=counts.get)
+    return next(entry for entry in entries if entry['hash'] == best)
+
+@timed_stage
+def diff_matrix(reference, parameter_sets, rtol=DEFAULT_RTOL):
+    """
+    (names, values, present, differs) for the union of parameter names: values is a
+    (names x sets) float array (NaN where missing) and differs flags every cell that is missing,
+    extra or not equal to the reference within rtol.
+    """
+    import numpy as np
+
+    names = sorted(set(reference).union(*parameter_sets))
+    index = {name: i for i, name in enumerate(names)}
+
+    def column(parameters):
+        values = np.full(len(names), np.nan)
+        rows = np.fromiter((index[name] for name in parameters), dtype=np.int64, count=len(parameters))
+        values[rows] = np.fromiter(parameters.values(), dtype=np.float64, count=len(parameters))
+        return values
+
+    ref = column(reference)
+    values = np.column_stack([column(p) for p in parameter_sets]) if parameter_sets else np.empty((len(names), 0))
+    present, ref_present = ~np.isnan(values), ~np.isnan(ref)[:, None]
+    with np.errstate(invalid='ignore'):
+        unequal = ~np.isclose(values, ref[:, None], rtol=rtol, atol=0.0)
+    differs = (present != ref_present) | (present & ref_present & unequal)
+    return names, values, present, differs
+
+@timed_stage
+def fleet_compare(paths, reference=None, rtol=DEFAULT_RTOL, jobs=None, rebuild=False):
+    """Compare every log under paths against the reference; returns the result dict or {'error': ...}."""
+    logs = find_logs(paths)
+    if not logs:
+        return {'error': "No .bin or .ulg logs found"}
+
+    loaded = load_parameter_sets(logs, jobs, rebuild)
+    errors = [{'path': path, 'error': entry['error']} for path, entry in zip(logs, loaded) if 'error' in entry]
+    fleet = [(path, entry) for path, entry in zip(logs, loaded) if 'error' not in entry]
+    if not fleet:
+        return {'error': "No parameters could be read from any log", 'errors': errors}
+
+    if reference:
+        ref_entry = reference_parameter_set(reference, rebuild)
+        if 'error' in ref_entry:
+            return {'error': f"Reference {reference}: {ref_entry['error']}"}
+    else:
+        ref_entry = _most_common_set([entry for _, entry in fleet])
+
+    # ✅ Identical sets are diffed once
+    groups = {}
+    for path, entry in fleet:
+        groups.setdefault(entry['hash'], []).append(path)
+    group_hashes = list(groups)
+    group_sets = {entry['hash']: entry['parameters'] for _, entry in fleet}
+
+    with stage("diff"):
+        names, values, present, differs = diff_matrix(ref_entry['parameters'],
+                                                      [group_sets[h] for h in group_hashes], rtol)
+    changed_rows = differs.any(axis=1).nonzero()[0]
+    ref_values = ref_entry['parameters']
+
+    group_results = []
+    for col, group_hash in enumerate(group_hashes):
+        rows = differs[:, col].nonzero()[0]
+        group_results.append({
+            'hash': group_hash,
+            'logs': [os.path.basename(p) for p in groups[group_hash]],
+            'paths': groups[group_hash],
+            'matches_reference': group_hash == ref_entry['hash'] or not len(rows),
+            'differences': {names[r]: (ref_values.get(names[r]), values[r, col].item() if present[r, col] else None)
+                            for r in rows},
+        })
+    group_results.sort(key=lambda g: (not g['matches_reference'], -len(g['logs'])))
+
+    column_of = {h: i for i, h in enumerate(group_hashes)}
+    log_results = []
+    for path, entry in fleet:
+        col = column_of[entry['hash']]
+        log_results.append({
+            'filename': os.path.basename(path),
+            'path': path,
+            'log_type': entry['log_type'],
+            'hash': entry['hash'],
+            'differences': int(differs[:, col].sum()),
+        })
+
+    return {
+        'reference': ref_entry['filename'],
+        'reference_hash': ref_entry['hash'],
+        'reference_parameters': ref_values,
+        'rtol': rtol,
+        'total_parameters': len(names),
+        'differing_parameters': [names[r] for r in changed_rows],
+        'groups': group_results,
+        'logs': log_results,
+        'errors': errors,
+        '_matrix': (names, values, present, differs, column_of),
+    }
+
+# ---------------------------------------------------------------- output
+
+def fmt(val):
+    if val is None:
+        return "missing"
+    if isinstance(val, float):
+        return f"{val:.6f}"
+    return str(val)
+
+def _rows(result):
+    """(parameter, reference value, [cell per log]) for every differing parameter; '' where a log matches."""
+    names, values, present, differs, column_of = result['_matrix']
+    row_of = {name: i for i, name in enumerate(names)}
+    ref_values = result['reference_parameters']
+    for name in result['differing_parameters']:
+        r = row_of[name]
+        cells = []
+        for log in result['logs']:
+            col = column_of[log['hash']]
+            if not differs[r, col]:
+                cells.append('')
+            else:
+                cells.append(fmt(values[r, col].item() if present[r, col] else None))
+        yield name, fmt(ref_values.get(name)), cells
+
+def write_csv(result, out):
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(['Parameter', f"Reference ({result['reference']})"] + [log['filename'] for log in result['logs']])
+    for name, ref, cells in _rows(result):
+        writer.writerow([name, ref] + cells)
+
+def write_json(result, out):
+    document = {key: value for key, value in result.items() if not key.startswith('_')}
+    json.dump(document, out, indent=1)
+    out.write('\n')
+
+HTML_CSS = """
+body { font-family: Arial, sans-serif; margin: 2em; color: #222; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+td, th { border: 1px solid #ccc; padding: 3px 8px; text-align: left; }
+td.num { text-align: right; font-family: monospace; }
+td.diff { background: #fde2e2; }
+code { font-size: 0.9em; }
+"""
+
+def write_html(result, out):
+    e = html.escape
+    out.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Fleet Parameter Compare</title>"
+              f"<style>{HTML_CSS}</style></head><body>\n<h1>Fleet Parameter Compare</h1>\n")
+    out.write(f"<p>Reference: <strong>{e(result['reference'])}</strong> "
+              f"(<code>{result['reference_hash'][:12]}</code>), {len(result['logs'])} logs, "
+              f"{len(result['groups'])} distinct parameter sets, "
+              f"{len(result['differing_parameters'])} of {result['total_parameters']} parameters differ.</p>\n")
+
+    out.write("<h2>Parameter sets</h2>\n<table><tr><th>Hash</th><th>Logs</th><th>Differences</th><th>Members</th></tr>\n")
+    for group in result['groups']:
+        out.write(f"<tr><td><code>{group['hash'][:12]}</code></td><td class=\"num\">{len(group['logs'])}</td>"
+                  f"<td class=\"num\">{len(group['differences'])}</td><td>{e(', '.join(group['logs']))}</td></tr>\n")
+    out.write("</table>\n")
+
+    if result['differing_parameters']:
+        out.write("<h2>Differences from the reference</h2>\n<table><tr><th>Parameter</th><th>Reference</th>")
+        out.write(''.join(f"<th>{e(log['filename'])}</th>" for log in result['logs']) + "</tr>\n")
+        for name, ref, cells in _rows(result):
+            out.write(f"<tr><td>{e(name)}</td><td class=\"num\">{e(ref)}</td>")
+            out.write(''.join(f"<td class=\"num diff\">{e(c)}</td>" if c else "<td></td>" for c in cells) + "</tr>\n")
+        out.write("</table>\n")
+
+    if result['errors']:
+        out.write("<h2>Unreadable logs</h2>\n<ul>\n")
+        out.write(''.join(f"<li>{e(err['path'])}: {e(err['error'])}</li>\n" for err in result['errors']))
+        out.write("</ul>\n")
+    out.write("</body></html>\n")
+
+WRITERS = {'csv': write_csv, 'json': write_json, 'html': write_html}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the parameters of many .bin/.ulg logs against a reference")
+    parser.add_argument("logs", nargs="+", help="Log files and/or directories (searched recursively)")
+    parser.add_argument("-r", "--reference",
+                        help="Reference log or parameter file (.param/.parm/.params); default: the most common set")
+    parser.add_argument("-o", "--output", help="Output file; the format follows its extension unless --format is given")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="Output format (default: csv)")
+    parser.add_argument("--rtol", type=float, default=DEFAULT_RTOL,
+                        help=f"Relative tolerance for equal values (default: {DEFAULT_RTOL})")
+    parser.add_argument("-j", "--jobs", type=int, help="Processes for extracting uncached logs (default: CPU count)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore cached parameter sets")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with profile_session(args):
+        result = fleet_compare(args.logs, args.reference, args.rtol, args.jobs, args.rebuild)
+    if 'error' in result:
+        print(f"❌ {result['error']}")
+        for err in result.get('errors', []):
+            print(f"   {err['path']}: {err['error']}")
+        sys.exit(1)
+
+    output_format = args.format or (os.path.splitext(args.output)[1].lower()[1:] if args.output else 'csv')
+    if output_format not in WRITERS:
+        print(f"❌ Unknown output format '{output_format}' (use {', '.join(OUTPUT_FORMATS)})")
+        sys.exit(1)
+    # ✅ A JSON or HTML document on stdout stays parseable: the human summary goes to stderr
+    summary = sys.stderr if output_format != 'csv' and not args.output else sys.stdout
+
+    for err in result['errors']:
+        print(f"⚠️  {err['path']}: {err['error']}", file=summary)
+    print(f"📄 Reference: {result['reference']} ({result['reference_hash'][:12]})", file=summary)
+    print(f"{'hash':<14}{'logs':>6}{'diffs':>7}  members", file=summary)
+    for group in result['groups']:
+        members = ', '.join(group['logs'][:4]) + (f", … (+{len(group['logs']) - 4})" if len(group['logs']) > 4 else "")
+        print(f"{group['hash'][:12]:<14}{len(group['logs']):>6}{len(group['differences']):>7}  {members}", file=summary)
+
+    if args.output:
+        with open(args.output, "w", newline='' if output_format == 'csv' else None, encoding="utf-8") as f:
+            WRITERS[output_format](result, f)
+        print(f"✅ Comparison written to {args.output}")
+    elif output_format != 'csv':
+        WRITERS[output_format](result, sys.stdout)
+    elif result['differing_parameters']:
+        print()
+        WRITERS[output_format](result, sys.stdout)
+
+    matching = sum(len(g['logs']) for g in result['groups'] if g['matches_reference'])
+    print(f"\n🔎 {matching} of {len(result['logs'])} logs match the reference; "
+          f"{len(result['differing_parameters'])} parameters differ out of {result['total_parameters']} compared.",
+          file=summary)
+
+if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+flight_report.py
+One-file HTML flight report for a .bin or .ulg log: summary, parameters, message counts and the
+power, range-vs-signal, vibration and GPS track charts.
+
+The log is decoded once (BinStreamDecoder / read_ulg_window) and every chart is fed from that
+single pass. Charts are then drawn in parallel worker processes (matplotlib is single-threaded),
+so a report takes about as long as the decode plus its slowest chart (see report_charts.py).
+"""
+
+import os
+import sys
+import html
+import argparse
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import timed_stage, add_profile_arguments, profile_session
+from tools.report_charts import render_charts
+from tools.parameter_sets import bin_firmware_version, ulg_firmware_version
+from tools.compressed_logs import log_exists, log_extension
+
+# Every .bin message type the report reads, collected in the one decode pass
+REPORT_BIN_TYPES = ('MSG', 'BAT', 'XKF1', 'RSSI', 'RAD', 'VIBE', 'GPS')
+
+# DataFlash format characters stored scaled (centi-units, 1e-7 degrees), as DFReader applies them
+BIN_SCALES = {'c': 0.01, 'C': 0.01, 'e': 0.01, 'E': 0.01, 'L': 1e-7}
+
+GPS_3D_FIX = 3
+CHART_TITLES = {
+    'power': 'Power',
+    'range_signal': 'Range vs Signal',
+    'vibration': 'Vibration',
+    'gps_track': 'GPS Track',
+}
+
+# ---------------------------------------------------------------- .bin
+
+class _Record:
+    """The part of DFMessage the power / range-signal extractors use, for a collected record."""
+    __slots__ = ('_type', '_data')
+
+    def __init__(self, msg_type, data):
+        self._type = msg_type
+        self._data = data
+
+    def get_type(self):
+        return self._type
+
+    def to_dict(self):
+        return dict(self._data)
+
+    def __getattr__(self, name):
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+def _bin_records(decoder):
+    """The collected records as _Record objects, scaled and with strings decoded like DFReader."""
+    layouts = {}
+    for name, fmt in decoder.formats.items():
+        layouts[name] = [(column, BIN_SCALES.get(code)) for column, code in zip(fmt.columns, fmt.format)]
+
+    records = []
+    for name, values in decoder.records:
+        data = {}
+        for (column, scale), value in zip(layouts[name], values):
+            if isinstance(value, bytes):
+                value = value.split(b'\0', 1)[0].decode('ascii', 'ignore')
+            elif scale is not None:
+                value = value * scale
+            data[column] = value
+        records.append(_Record(name, data))
+    return records
+
+def _column(values):
+    """A series as a NumPy column, which the chart workers receive in shared memory."""
+    import numpy as np
+
+    return np.asarray(values, dtype=np.float64)
+
+def _vibration_bin(records):
+    rows = [r for r in records if r.get_type() == 'VIBE' and getattr(r, 'IMU', 0) == 0]
+    if not rows:
+        return None
+    return {
+        'timestamps': _column([r.TimeUS / 1e6 for r in rows]),
+        'series': {axis: _column([getattr(r, axis) for r in rows]) for axis in ('VibeX', 'VibeY', 'VibeZ')},
+        'clips': _column([r.Clip for r in rows]) if 'Clip' in rows[0].to_dict() else None,
+        'title': 'Vibration (VIBE, IMU 0)',
+    }
+
+def _gps_track_bin(records):
+    rows = [r for r in records if r.get_type() == 'GPS' and getattr(r, 'I', 0) == 0
+            and getattr(r, 'Status', 0) >= GPS_3D_FIX]
+    if not rows:
+        return None
+    return {
+        'lat': _column([r.Lat for r in rows]),
+        'lng': _column([r.Lng for r in rows]),
+        'timestamps': _column([r.TimeUS / 1e6 for r in rows]),
+        'title': 'GPS Track (3D fix)',
+    }
+
+@timed_stage(name="decode")
+def collect_bin(filepath):
+    """Summary, parameters and every chart's series from one streaming pass over a .bin log."""
+    from tools.bin_stream_decoder import BinStreamDecoder, decode_bin_file
+    from tools.bin_power_plot import power_samples
+    from tools.bin_range_signal import pair_range_signal
+
+    decoder = BinStreamDecoder(filepath, REPORT_BIN_TYPES)
+    summary = decode_bin_file(filepath, decoder=decoder)
+    if 'error' in summary:
+        return summary
+
+    records = _bin_records(decoder)
+    messages = [r.Message for r in records if r.get_type() == 'MSG']
+    firmware = bin_firmware_version(messages)
+
+    charts = {}
+    timestamps, current, voltage, error = power_samples(r for r in records if r.get_type() == 'BAT')
+    charts['power'] = error or {'timestamps': _column(timestamps), 'current': _column(current),
+                                'voltage': _column(voltage)}
+    ctrl_rssi, ctrl_lq, telem_rssi = pair_range_signal(r for r in records if r.get_type() in ('XKF1', 'RSSI', 'RAD'))
+    charts['range_signal'] = ({'ctrl_rssi': ctrl_rssi, 'ctrl_lq': ctrl_lq, 'telem_rssi': telem_rssi}
+                              if ctrl_rssi or ctrl_lq or telem_rssi else 'No valid signal data found in log file.')
+    charts['vibration'] = _vibration_bin(records) or 'No VIBE messages in log file.'
+    charts['gps_track'] = _gps_track_bin(records) or 'No GPS positions with a 3D fix in log file.'
+
+    return {
+        'filename': summary['filename'],
+        'log_type': 'bin',
+        'firmware': firmware or 'Unknown',
+        'total_messages': summary['total_messages'],
+        'log_duration': summary['log_duration'],
+        'counts': dict(sorted(decoder.counts.items())),
+        'parameters': summary['parameters'],
+        'charts': charts,
+    }
+
+# ---------------------------------------------------------------- .ulg
+
+def _vibration_ulg(ulog):
+    try:
+        data = ulog.get_dataset('vehicle_imu_status').data
+    except (IndexError, KeyError, ValueError):
+        return None
+    series = {label: data[field] for label, field in (('Accel vibration', 'accel_vibration_metric'),
+                                                      ('Gyro vibration', 'gyro_vibration_metric'))
+              if field in data}
+    if not series:
+        return None
+    return {'timestamps': data['timestamp'] / 1e6, 'series': series, 'clips': None,
+            'title': 'Vibration (vehicle_imu_status, instance 0)'}
+
+def _gps_track_ulg(ulog):
+    try:
+        data = ulog.get_dataset('vehicle_gps_position').data
+    except (IndexError, KeyError, ValueError):
+        return None
+    if 'latitude_deg' in data:
+        lat, lng = data['latitude_deg'], data['longitude_deg']
+    elif 'lat' in data:
+        lat, lng = data['lat'] * 1e-7, data['lon'] * 1e-7
+    else:
+        return None
+    fixed = data['fix_type'] >= GPS_3D_FIX if 'fix_type' in data else slice(None)
+    if not len(lat[fixed]):
+        return None
+    return {'lat': lat[fixed], 'lng': lng[fixed], 'timestamps': data['timestamp'][fixed] / 1e6,
+            'title': 'GPS Track (3D fix)'}
+
+@timed_stage(name="decode")
+def collect_ulg(filepath):
+    """Summary, parameters and every chart's series from one pass over a .ulg log."""
+    from tools.time_window import read_ulg_window
+    from tools.ulg_power_plot import power_series_from_ulog
+    from tools.ulg_range_signal import range_signal_from_ulog
+
+    if not log_exists(filepath):
+        return {'error': f"File not found: {filepath}"}
+    try:
+        ulog = read_ulg_window(filepath)
+    except Exception as e:
+        return {'error': f"❌ Failed to parse .ulg file: {e}"}
+
+    parameters = dict(ulog.initial_parameters)
+    for _, key, value in ulog.changed_parameters:
+        parameters[key] = value  # ✅ Value in effect at the end of the log
+
+    charts = {}
+    timestamps, voltage, current, watt_hours, error = power_series_from_ulog(ulog)
+    charts['power'] = error or {'timestamps': timestamps, 'voltage': voltage, 'current': current,
+                                'watt_hours': watt_hours}
+    ctrl_rssi, ctrl_lq, telem_rssi, error = range_signal_from_ulog(ulog)
+    if not error and not (ctrl_rssi or ctrl_lq or telem_rssi):
+        error = 'No valid signal data found in log file.'
+    charts['range_signal'] = error or {'ctrl_rssi': ctrl_rssi, 'ctrl_lq': ctrl_lq, 'telem_rssi': telem_rssi}
+    charts['vibration'] = _vibration_ulg(ulog) or 'No vehicle_imu_status data in log file.'
+    charts['gps_track'] = _gps_track_ulg(ulog) or 'No GPS positions with a 3D fix in log file.'
+
+    counts = {}
+    for entry in ulog.data_list:
+        counts[entry.name] = counts.get(entry.name, 0) + len(entry.data['timestamp'])
+    duration = (ulog.last_timestamp - ulog.start_timestamp) / 1e6
+
+    return {
+        'filename': os.path.basename(filepath),
+        'log_type': 'ulg',
+        'firmware': ulg_firmware_version(ulog.msg_info_dict) or 'Unknown',
+        'total_messages': sum(counts.values()),
+        'log_duration': f"{duration:.2f} seconds",
+        'counts': dict(sorted(counts.items())),
+        'parameters': dict(sorted(parameters.items())),
+        'charts': charts,
+    }
+
+# ---------------------------------------------------------------- HTML
+
+REPORT_CSS = """
+body { font-family: Arial, sans-serif; margin: 2em auto; max-width: 1100px; color: #222; }
+h1 { margin-bottom: 0.2em; }
+h2 { border-bottom: 1px solid #ccc; padding-bottom: 0.2em; margin-top: 1.6em; }
+table { border-collapse: collapse; }
+td, th { padding: 3px 12px 3px 0; text-align: left; vertical-align: top; }
+th { color: #555; font-weight: normal; }
+td.num { text-align: right; font-family: monospace; }
+img { max-width: 100%; border: 1px solid #ddd; }
+.note { color: #a60; font-style: italic; }
+.columns { column-count: 3; column-gap: 2em; }
+@media print { details { display: block; } details > summary { display: none; } h2 { page-break-after: avoid; } img { page-break-inside: avoid; } }
+"""
+
+def _table(rows, numeric=False):
+    cls = ' class="num"' if numeric else ''
+    body = ''.join(f"<tr><th>{html.escape(str(k))}</th><td{cls}>{html.escape(str(v))}</td></tr>" for k, v in rows)
+    return f"<table>{body}</table>"
+
+@timed_stage(name="assemble")
+def build_report_html(report, images):
+    """Self-contained HTML page (inline CSS, embedded PNGs) for a collected report."""
+    title = f"Flight Report: {report['filename']}"
+    parts = [
+        "<!DOCTYPE html>",
+        f"<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>",
+        f"<style>{REPORT_CSS}</style></head><body>",
+        f"<h1>{html.escape(title)}</h1>",
+        "<h2>Summary</h2>",
+        _table([
+            ('Log type', f".{report['log_type']}"),
+            ('Firmware', report['firmware']),
+            ('Duration', report['log_duration']),
+            ('Total messages', report['total_messages']),
+            ('Message types', len(report['counts'])),
+            ('Parameters', len(report['parameters'])),
+        ]),
+    ]
+
+    for name, chart_title in CHART_TITLES.items():
+        parts.append(f"<h2>{html.escape(chart_title)}</h2>")
+        image = images.get(name)
+        if isinstance(image, str):
+            parts.append(f"<img alt=\"{html.escape(chart_title)}\" src=\"data:image/png;base64,{image}\">")
+        else:
+            reason = image if image is not None else report['charts'][name]
+            parts.append(f"<p class=\"note\">⚠️ {html.escape(str(reason))}</p>")
+
+    parts.append("<h2>Message Counts</h2>")
+    parts.append(f"<div class=\"columns\">{_table(report['counts'].items(), numeric=True)}</div>")
+    parts.append("<h2>Parameters</h2>")
+    parts.append(f"<details><summary>{len(report['parameters'])} parameters</summary>"
+                 f"<div class=\"columns\">{_table(report['parameters'].items(), numeric=True)}</div></details>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+@timed_stage
+def generate_flight_report(filepath, workers=None):
+    """{'html': ..., 'filename': ...} or {'error': ...} for a .bin or .ulg log."""
+    ext = log_extension(filepath)
+    if ext == '.bin':
+        report = collect_bin(filepath)
+    elif ext == '.ulg':
+        report = collect_ulg(filepath)
+    else:
+        return {'error': f"Unsupported log type: {ext}"}
+    if 'error' in report:
+        return report
+
+    jobs = {name: dict(payload, log_type=report['log_type'])
+            for name, payload in report['charts'].items() if isinstance(payload, dict)}
+    images = render_charts(jobs, workers)
+    return {'filename': report['filename'], 'html': build_report_html(report, images)}
+
+if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
+    parser = argparse.ArgumentParser(description="Generate a single-file HTML flight report from a .bin or .ulg log")
+    parser.add_argument("input_file", help="Path to .bin or .ulg log file")
+    parser.add_argument("-o", "--output", help="Output HTML path (default: <log>_report.html)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Chart rendering processes (default: one per chart, up to the CPU count; 1 = in-process)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if not log_exists(args.input_file):
+        print(f"❌ File not found: {args.input_file}")
+        sys.exit(1)
+
+    with profile_session(args):
+        result = generate_flight_report(args.input_file, args.workers)
+    if 'error' in result:
+        print(f"❌ {result['error']}")
+        sys.exit(1)
+
+    output_path = args.output or args.input_file + "_report.html"
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(result['html'])
+    print(f"✅ Report saved to: {output_path}")
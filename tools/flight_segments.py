@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+flight_segments.py
+Per-log flight segment index: arm/disarm, takeoff/landing and mode-change events, and the
+armed, airborne and per-mode segments between them.
+
+ArduPilot: ARM (EV 10/11 on firmware without ARM records), EV 28/18 (not landed / land complete)
+and MODE records. PX4: vehicle_status.arming_state / nav_state and vehicle_land_detected.landed.
+Only those records are read, and the table is cached beside the log as <log>.segments.json.
+
+Tools take a segment selector and decode only that segment's time window:
+    3                   row 3 of the table
+    armed, armed:2      first / second armed period
+    airborne[:N]        takeoff to landing
+    mode:LOITER[:N]     a period in the named flight mode
+"""
+
+import os
+import sys
+import json
+import argparse
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import timed_stage, add_profile_arguments, profile_session
+from tools.time_window import iter_bin_sparse, read_ulg_window, parse_time_window
+from tools.log_cache import cache_base, source_stamp, is_current, read_json, write_json
+from tools.compressed_logs import log_exists, log_extension
+
+CACHE_SUFFIX = ".segments.json"
+CACHE_VERSION = 1
+
+SEGMENT_KINDS = ('armed', 'airborne', 'mode')
+
+# ArduPilot LogEvent ids
+EV_ARMED = 10
+EV_DISARMED = 11
+EV_LAND_COMPLETE = 18
+EV_NOT_LANDED = 28
+
+# MSG banner prefix -> pymavlink mode table
+ARDUPILOT_MODE_TABLES = (
+    ('ArduCopter', 'mode_mapping_acm'),
+    ('ArduPlane', 'mode_mapping_apm'),
+    ('ArduRover', 'mode_mapping_rover'),
+    ('Rover', 'mode_mapping_rover'),
+    ('ArduSub', 'mode_mapping_sub'),
+    ('Blimp', 'mode_mapping_blimp'),
+    ('AntennaTracker', 'mode_mapping_tracker'),
+)
+
+PX4_ARMING_STATE_ARMED = 2
+PX4_NAV_STATES = {
+    0: 'MANUAL', 1: 'ALTCTL', 2: 'POSCTL', 3: 'AUTO_MISSION', 4: 'AUTO_LOITER', 5: 'AUTO_RTL',
+    10: 'ACRO', 12: 'DESCEND', 13: 'TERMINATION', 14: 'OFFBOARD', 15: 'STAB', 17: 'AUTO_TAKEOFF',
+    18: 'AUTO_LAND', 19: 'AUTO_FOLLOW_TARGET', 20: 'AUTO_PRECLAND', 21: 'ORBIT',
+    22: 'AUTO_VTOL_TAKEOFF',
+}
+
+def cache_path(filepath):
+    return cache_base(filepath) + CACHE_SUFFIX
+
+def _ardupilot_mode_names(banner):
+    from pymavlink import mavutil  # ✅ Deferred: loading the MAVLink dialect is slow
+
+    for prefix, table in ARDUPILOT_MODE_TABLES:
+        if banner.startswith(prefix):
+            return getattr(mavutil, table, {})
+    return {}
+
+def extract_bin_events(filepath):
+    """[(time_s, event, detail)] from the ARM, EV and MODE records of a .bin log."""
+    events = []
+    ev_arming = []
+    has_arm_records = False
+    banner = None
+    for msg in iter_bin_sparse(filepath, ['ARM', 'EV', 'MODE', 'MSG']):
+        msg_type = msg.get_type()
+        t = getattr(msg, '_timestamp', None)
+        if msg_type == 'MSG':
+            text = getattr(msg, 'Message', '') or ''
+            if banner is None and text.startswith(('Ardu', 'Rover', 'Blimp', 'AntennaTracker')):
+                banner = text
+        elif msg_type == 'ARM':
+            has_arm_records = True
+            events.append((t, 'arm' if msg.ArmState else 'disarm', None))
+        elif msg_type == 'EV':
+            if msg.Id == EV_ARMED:
+                ev_arming.append((t, 'arm', None))
+            elif msg.Id == EV_DISARMED:
+                ev_arming.append((t, 'disarm', None))
+            elif msg.Id == EV_NOT_LANDED:
+                events.append((t, 'takeoff', None))
+            elif msg.Id == EV_LAND_COMPLETE:
+                events.append((t, 'land', None))
+        elif msg_type == 'MODE':
+            events.append((t, 'mode', int(msg.ModeNum)))
+
+    if not has_arm_records:
+        events.extend(ev_arming)  # older firmware only logs arming as events
+
+    names = _ardupilot_mode_names(banner) if banner else {}
+    events = [(t, ev, names.get(detail, f"MODE_{detail}") if ev == 'mode' else detail)
+              for t, ev, detail in events]
+    events.sort(key=lambda e: e[0])
+    return events
+
+def extract_ulg_events(filepath):
+    """[(time_s, event, detail)] from vehicle_status and vehicle_land_detected of a .ulg log."""
+    ulog = read_ulg_window(filepath, message_name_filter_list=['vehicle_status', 'vehicle_land_detected'])
+    events = []
+
+    try:
+        status = ulog.get_dataset('vehicle_status').data
+    except IndexError:
+        status = None
+    if status is not None:
+        armed = nav_state = None
+        for t, arming_state, nav in zip(status['timestamp'], status['arming_state'], status['nav_state']):
+            is_armed = int(arming_state) == PX4_ARMING_STATE_ARMED
+            if is_armed != armed:
+                if armed is not None or is_armed:
+                    events.append((float(t) / 1e6, 'arm' if is_armed else 'disarm', None))
+                armed = is_armed
+            if nav != nav_state:
+                events.append((float(t) / 1e6, 'mode', PX4_NAV_STATES.get(int(nav), f"NAV_STATE_{int(nav)}")))
+                nav_state = nav
+
+    try:
+        land = ulog.get_dataset('vehicle_land_detected').data
+    except IndexError:
+        land = None
+    if land is not None:
+        landed = None
+        for t, is_landed in zip(land['timestamp'], land['landed']):
+            is_landed = bool(is_landed)
+            if is_landed != landed:
+                if landed is not None or not is_landed:
+                    events.append((float(t) / 1e6, 'land' if is_landed else 'takeoff', None))
+                landed = is_landed
+
+    events.sort(key=lambda e: e[0])
+    return events
+
+def _spans(events, on, off):
+    """Pair on/off events into (start, end) spans; None means the log's start or end."""
+    spans = []
+    start = None
+    is_on = False
+    seen = False
+    for t, ev, _ in events:
+        if ev == on and not is_on:
+            start, is_on, seen = t, True, True
+        elif ev == off:
+            if is_on:
+                spans.append((start, t))
+                is_on = False
+            elif not seen:
+                spans.append((None, t))  # log started in the "on" state
+            seen = True
+    if is_on:
+        spans.append((start, None))
+    return spans
+
+def build_segments(events):
+    """Segment table rows: {'index', 'kind', 'name', 'start_s', 'end_s'} (None = open end)."""
+    rows = []
+    for kind, on, off in (('armed', 'arm', 'disarm'), ('airborne', 'takeoff', 'land')):
+        for n, (start, end) in enumerate(_spans(events, on, off), start=1):
+            rows.append({'kind': kind, 'name': f"{kind} {n}", 'start_s': start, 'end_s': end})
+
+    modes = [(t, detail) for t, ev, detail in events if ev == 'mode']
+    modes = [m for i, m in enumerate(modes) if i == 0 or m[1] != modes[i - 1][1]]
+    for i, (t, name) in enumerate(modes):
+        end = modes[i + 1][0] if i + 1 < len(modes) else None
+        rows.append({'kind': 'mode', 'name': name, 'start_s': t, 'end_s': end})
+
+    rows.sort(key=lambda r: (r['start_s'] if r['start_s'] is not None else -1, SEGMENT_KINDS.index(r['kind'])))
+    for index, row in enumerate(rows, start=1):
+        row['index'] = index
+    return rows
+
+@timed_stage
+def build_segment_index(filepath):
+    """Decode the events of a .bin or .ulg log; returns the index dict or {'error': ...}."""
+    if not log_exists(filepath):
+        return {'error': f"File not found: {filepath}"}
+    ext = log_extension(filepath)
+    try:
+        if ext == '.bin':
+            events = extract_bin_events(filepath)
+        elif ext == '.ulg':
+            events = extract_ulg_events(filepath)
+        else:
+            return {'error': f"Expected a .bin or .ulg file, but got '{ext}'"}
+    except Exception as e:
+        return {'error': str(e)}
+
+    return {
+        'version': CACHE_VERSION,
+        'filename': os.path.basename(filepath),
+        'log_type': ext[1:],
+        'source': source_stamp(filepath),
+        'events': [{'time_s': round(float(t), 6), 'event': ev, 'detail': detail} for t, ev, detail in events],
+        'segments': build_segments(events),
+    }
+
+def load_segment_index(filepath, rebuild=False):
+    """The cached index beside the log if it is still current, else a freshly built (and cached) one."""
+    path = cache_path(filepath)
+    if not rebuild:
+        index = read_json(path)
+        if index is not None and is_current(index, filepath, CACHE_VERSION):
+            return index
+
+    index = build_segment_index(filepath)
+    if 'error' not in index:
+        write_json(path, index)
+    return index
+
+def select_segment(segments, selector):
+    """Resolve a selector (row number, 'armed[:N]', 'airborne[:N]', 'mode:NAME[:N]'); raises ValueError."""
+    selector = selector.strip()
+    if selector.isdigit():
+        matches = [s for s in segments if s['index'] == int(selector)]
+        if matches:
+            return matches[0]
+        raise ValueError(f"No segment number {selector} (the log has {len(segments)})")
+
+    parts = selector.split(':')
+    kind = parts[0].lower()
+    if kind not in SEGMENT_KINDS:
+        raise ValueError(f"Unknown segment selector '{selector}' (use a row number, "
+                         f"armed[:N], airborne[:N] or mode:NAME[:N])")
+    candidates = [s for s in segments if s['kind'] == kind]
+    if kind == 'mode':
+        if len(parts) < 2 or not parts[1]:
+            raise ValueError("A mode selector needs a mode name, e.g. mode:LOITER")
+        candidates = [s for s in candidates if s['name'].lower() == parts[1].lower()]
+        occurrence = parts[2] if len(parts) > 2 else '1'
+    else:
+        occurrence = parts[1] if len(parts) > 1 else '1'
+
+    if not occurrence.isdigit() or int(occurrence) < 1:
+        raise ValueError(f"Invalid segment number in '{selector}'")
+    if int(occurrence) > len(candidates):
+        raise ValueError(f"No segment matches '{selector}'")
+    return candidates[int(occurrence) - 1]
+
+def segment_window(filepath, selector=None, start=None, end=None):
+    """
+    (start, end) in seconds since boot for the selected segment, narrowed by any explicit
+    start/end. Without a selector this is just the validated start/end. Raises ValueError.
+    """
+    start, end = parse_time_window(start, end)
+    if not selector:
+        return start, end
+
+    index = load_segment_index(filepath)
+    if 'error' in index:
+        raise ValueError(f"Could not index flight segments: {index['error']}")
+    segment = select_segment(index['segments'], selector)
+
+    if segment['start_s'] is not None:
+        start = segment['start_s'] if start is None else max(start, segment['start_s'])
+    if segment['end_s'] is not None:
+        end = segment['end_s'] if end is None else min(end, segment['end_s'])
+    if start is not None and end is not None and start > end:
+        raise ValueError(f"The time window does not overlap segment '{segment['name']}'")
+    return start, end
+
+def add_segment_arguments(parser):
+    parser.add_argument("--segment", metavar="SELECTOR",
+                        help="Only decode one flight segment: a row number from flight_segments.py, "
+                             "armed[:N], airborne[:N] or mode:NAME[:N]")
+
+def _format_time(value):
+    return "log start" if value is None else f"{value:.2f}"
+
+if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
+    parser = argparse.ArgumentParser(description="List the flight segments of a .bin or .ulg log")
+    parser.add_argument("input_file", help="Path to .bin or .ulg log file")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the cached index beside the log")
+    parser.add_argument("--json", action="store_true", help="Print the index as JSON")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with profile_session(args):
+        result = load_segment_index(args.input_file, rebuild=args.rebuild)
+    if 'error' in result:
+        print(f"❌ {result['error']}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(result, indent=1))
+        sys.exit(0)
+
+    print(f"📄 Flight segments for {result['filename']}")
+    print(f"{'#':>3}  {'kind':<9}{'name':<22}{'start s':>12}{'end s':>12}")
+    for row in result['segments']:
+        end = "log end" if row['end_s'] is None else f"{row['end_s']:.2f}"
+        print(f"{row['index']:>3}  {row['kind']:<9}{row['name']:<22}{_format_time(row['start_s']):>12}{end:>12}")
+    print(f"✅ {len(result['segments'])} segments from {len(result['events'])} events")
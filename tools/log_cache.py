@@ -0,0 +1,74 @@
+"""
+log_cache.py
+Helpers for derived data cached beside a log (segment index, field pyramids, ...).
+Cache entries record the log's size and mtime and are rebuilt when either changes.
+A log inside a .zip bundle is stamped with the bundle, and its caches sit beside the bundle.
+
+Set FLIGHT_TOOLS_NO_CACHE=1 to leave log directories untouched (read-only media, shared fleet
+folders): caches then go to a private temporary directory that is removed when the process exits.
+"""
+
+import os
+import sys
+import json
+import atexit
+import shutil
+import hashlib
+import tempfile
+
+from tools.compressed_logs import split_member
+
+_private_dir = None
+
+def caching_beside_logs():
+    return os.environ.get('FLIGHT_TOOLS_NO_CACHE', '') in ('', '0')
+
+def _private_cache_dir():
+    global _private_dir
+    if _private_dir is None:
+        _private_dir = tempfile.mkdtemp(prefix="flight-tools-cache-")
+        atexit.register(shutil.rmtree, _private_dir, True)
+    return _private_dir
+
+def cache_base(filepath):
+    """The path a log's caches are named after: the log itself, or bundle.zip.<member> for a bundled log."""
+    archive, member = split_member(filepath)
+    base = filepath if member is None else f"{archive}.{member.replace('/', '_')}"
+    if caching_beside_logs():
+        return base
+    # ✅ Opted out: same names, in a throwaway directory
+    key = hashlib.sha1(os.path.abspath(base).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(_private_cache_dir(), f"{key}-{os.path.basename(base)}")
+
+def source_stamp(filepath):
+    st = os.stat(split_member(filepath)[0])
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+def is_current(entry, filepath, version):
+    """True if a cached entry was built from this exact log by this cache version."""
+    try:
+        return entry.get('version') == version and entry.get('source') == source_stamp(filepath)
+    except OSError:
+        return False
+
+def read_json(path):
+    """The cached JSON document at path, or None if it is missing or unreadable."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_json(path, document):
+    """Atomically replace path; a read-only log directory only costs a warning."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(document, f, indent=1)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        print(f"[WARNING] Could not write cache {path}: {e}", file=sys.stderr)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+log_index.py
+Everything the pages ask for after an upload, prepared in one pass over the log and cached
+beside it as <log>.index.json:
+    summary     message types, message count and duration (as bin_info / ulg_info)
+    catalog     every message type / topic with its record count and field names (the
+                explorers' type and field lists), and the time span of timed types
+    stats       min / max / mean of every numeric field
+Building the index also fills the log's other caches: the zoom pyramids of every numeric field,
+the segment table, the parameter set and the power chart series.
+
+While it is built the file holds {'state': 'building', 'step', 'progress'}, so every web worker
+can show how far it got; 'ready' once complete, 'error' if the log could not be read. Numeric
+fields are decoded a batch of types at a time (about BATCH_VALUES values), so memory stays
+bounded on long logs; a compressed log is decompressed to a temporary file once for the build.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import timed_stage, stage, add_profile_arguments, profile_session
+from tools.log_cache import cache_base, source_stamp, is_current, read_json, write_json
+from tools.compressed_logs import log_exists, log_extension, decompressed_log
+
+INDEX_SUFFIX = ".index.json"
+CACHE_VERSION = 1
+BATCH_VALUES = 2_000_000
+ULG_FIELDS_GUESS = 16  # fields per topic, for batching before the formats are read
+STALE_BUILD_SECONDS = 600  # a build that has not reported for this long was abandoned
+
+def index_path(filepath):
+    return cache_base(filepath) + INDEX_SUFFIX
+
+def read_index_status(filepath):
+    """The index document of this exact log (in any state), or None."""
+    entry = read_json(index_path(filepath))
+    return entry if entry is not None and is_current(entry, filepath, CACHE_VERSION) else None
+
+def load_log_index(filepath):
+    """The complete index, or None while it is missing or still being built."""
+    entry = read_index_status(filepath)
+    return entry if entry is not None and entry['state'] == 'ready' else None
+
+def is_pending(entry):
+    """True for an index another job is building (or has queued) right now."""
+    return (entry is not None and entry['state'] in ('queued', 'building')
+            and time.time() - entry.get('updated', 0) < STALE_BUILD_SECONDS)
+
+def _status(filepath, state, **extra):
+    now = time.time()
+    return dict({
+        'version': CACHE_VERSION,
+        'filename': os.path.basename(filepath),
+        'log_type': log_extension(filepath)[1:],
+        'source': source_stamp(filepath),
+        'state': state,
+        'step': None,
+        'progress': 0.0,
+        'updated': now,
+    }, **extra)
+
+def mark_queued(filepath):
+    """Record that a build was queued, so other workers wait for it instead of starting their own."""
+    write_json(index_path(filepath), _status(filepath, 'queued'))
+
+def _batches(weights):
+    """Message types grouped so each group holds about BATCH_VALUES values."""
+    batches, batch, size = [], [], 0
+    for name, weight in weights.items():
+        if batch and size + weight > BATCH_VALUES:
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(name)
+        size += weight
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _field_stats(fields):
+    """{field: {'min', 'max', 'mean'}} over the finite values of each numeric field."""
+    import numpy as np
+
+    stats = {}
+    for name, values in fields.items():
+        finite = values[np.isfinite(values)]
+        if len(finite):
+            stats[name] = {'min': float(finite.min()), 'max': float(finite.max()), 'mean': float(finite.mean())}
+    return stats
+
+def _span(times):
+    return {'first_s': round(float(times.min()), 6), 'last_s': round(float(times.max()), 6)} if len(times) else {}
+
+def _bin_catalog(filepath):
+    """(summary, catalog) of a .bin log from one pass of the stream decoder."""
+    from tools.bin_stream_decoder import BinStreamDecoder, decode_bin_file
+
+    decoder = BinStreamDecoder(filepath)
+    summary = decode_bin_file(filepath, decoder=decoder)
+    if 'error' in summary:
+        raise ValueError(summary['error'])
+    summary.pop('parameters', None)
+    columns = decoder.field_names()
+    # ✅ Same field list as the explorer's DFMessage.to_dict()
+    catalog = {name: {'count': count, 'fields': ['mavpackettype'] + columns.get(name, [])}
+               for name, count in sorted(decoder.counts.items())}
+    return summary, catalog
+
+def _bin_batch(filepath, batch, catalog):
+    """{type: (times, numeric fields)} of a batch of .bin types."""
+    from tools.field_pyramid import collect_fields
+
+    return collect_fields(filepath, batch)
+
+def _ulg_batch(filepath, batch, catalog):
+    """{topic: (times, numeric fields)} of a batch of .ulg topics; fills in their catalog fields."""
+    from tools.time_window import read_ulg_window
+    from tools.field_pyramid import ulog_numeric_fields
+
+    ulog = read_ulg_window(filepath, message_name_filter_list=batch)
+    for dataset in ulog.data_list:
+        if dataset.multi_id == 0 and dataset.name in catalog:
+            catalog[dataset.name]['fields'] = list(dataset.data)
+    return ulog_numeric_fields(ulog)
+
+@timed_stage
+def build_log_index(filepath):
+    """Build the index (and the caches it covers); returns it, or {'error': ...}."""
+    if not log_exists(filepath):
+        return {'error': f"File not found: {filepath}"}
+    ext = log_extension(filepath)
+    if ext not in ('.bin', '.ulg'):
+        return {'error': f"Expected a .bin or .ulg file, but got '{ext}'"}
+    with decompressed_log(filepath):  # ✅ A compressed log is decompressed once, not for every batch and cache
+        return _build(filepath, ext)
+
+def build_log_index_status(filepath):
+    """build_log_index() for a background worker: {} or {'error': ...}; the index stays in its file, not pickled back."""
+    result = build_log_index(filepath)
+    return {'error': result['error']} if 'error' in result else {}
+
+def _build(filepath, ext):
+    path = index_path(filepath)
+    entry = _status(filepath, 'building', step='catalog', started=time.time())
+    write_json(path, entry)
+
+    def report(step, done, total):
+        entry.update(step=step, progress=round(done / total, 3), updated=time.time())
+        write_json(path, entry)
+
+    try:
+        with stage("catalog"):
+            if ext == '.bin':
+                summary, catalog = _bin_catalog(filepath)
+                weights = {name: item['count'] * len(item['fields']) for name, item in catalog.items()}
+                collect = _bin_batch
+            else:
+                from tools.ulg_info import extract_ulg_info
+                from tools.ulg_reader import scan_ulog
+
+                summary = extract_ulg_info(filepath)
+                if 'error' in summary:
+                    raise ValueError(summary['error'])
+                counts = scan_ulog(filepath)['message_counts']
+                catalog = {name: {'count': count, 'fields': []} for name, count in counts.items()}
+                weights = {name: count * ULG_FIELDS_GUESS for name, count in counts.items()}
+                collect = _ulg_batch
+
+        from tools.field_pyramid import store_pyramids
+
+        batches = _batches(weights)
+        total = len(batches) + 4
+        stats = {}
+        for i, batch in enumerate(batches, 1):
+            report(f"fields {i}/{len(batches)}", i, total)
+            with stage("fields"):
+                collected = collect(filepath, batch, catalog)
+                for name, (times, fields) in collected.items():
+                    catalog[name].update(_span(times))
+                    stats[name] = _field_stats(fields)
+            store_pyramids(filepath, collected)  # ✅ Zoom tiles are ready too
+            del collected
+
+        report("segments", len(batches) + 1, total)
+        from tools.flight_segments import load_segment_index
+        load_segment_index(filepath)
+
+        report("parameters", len(batches) + 2, total)
+        from tools.parameter_sets import load_parameter_set
+        load_parameter_set(filepath)
+
+        report("power", len(batches) + 3, total)
+        from tools.chart_data import power_chart_data
+        try:
+            power_chart_data(filepath)
+        except ValueError:
+            pass  # no battery data
+    except Exception as e:
+        entry.update(state='error', error=str(e), updated=time.time())
+        write_json(path, entry)
+        return {'error': str(e)}
+
+    entry.update(state='ready', step=None, progress=1.0, updated=time.time(),
+                 summary=summary, catalog=catalog, stats=stats)
+    write_json(path, entry)
+    return entry
+
+def load_or_build_index(filepath, rebuild=False):
+    """The cached index beside the log if it is current and complete, else a freshly built one."""
+    if not rebuild:
+        index = load_log_index(filepath)
+        if index is not None:
+            return index
+    return build_log_index(filepath)
+
+def _format_stats(stats):
+    return f"min {stats['min']:.6g}, max {stats['max']:.6g}, mean {stats['mean']:.6g}"
+
+def explorer_step(index, msg_type=None):
+    """
+    The explorers' type list, or the fields of msg_type ({'Field', 'Description'} with the field's
+    statistics as its description), answered from a complete index.
+    """
+    if msg_type is None:
+        return sorted(index['catalog'])
+    item = index['catalog'].get(msg_type)
+    if item is None:
+        return []
+    stats = index['stats'].get(msg_type, {})
+    return [{"Field": field, "Description": _format_stats(stats[field]) if field in stats else ""}
+            for field in item['fields']]
+
+if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
+    parser = argparse.ArgumentParser(description="Index a .bin or .ulg log: message catalog, field statistics and caches")
+    parser.add_argument("input_file", help="Path to .bin or .ulg log file (or compressed / .zip)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the cached index beside the log")
+    parser.add_argument("--json", action="store_true", help="Print the index as JSON")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with profile_session(args):
+        result = load_or_build_index(args.input_file, rebuild=args.rebuild)
+    if 'error' in result:
+        print(f"❌ {result['error']}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(result, indent=1))
+        sys.exit(0)
+
+    print(f"📄 Index of {result['filename']}")
+    print(f"{'type':<28}{'records':>10}{'fields':>8}")
+    for name, item in result['catalog'].items():
+        print(f"{name:<28}{item['count']:>10}{len(item['fields']):>8}")
+    numeric = sum(len(fields) for fields in result['stats'].values())
+    print(f"✅ {len(result['catalog'])} types, {numeric} numeric fields with statistics")
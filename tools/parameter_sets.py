@@ -0,0 +1,211 @@
+"""
+parameter_sets.py
+Cached parameters of a log, for tools that compare many logs or audit changes over time.
+
+Every parameter record of a .bin or .ulg log is read once and cached beside the log as
+<log>.params.json:
+    initial     the first value of each parameter
+    changes     {name: [[time_s, value], ...]} for every later record that changed the value
+    parameters  the values in effect at the end of the log, with a hash of the whole set so
+                logs with identical configurations can be grouped without comparing values
+    firmware    the firmware version banner
+Times are seconds since boot. Logs may be compressed or inside a .zip bundle (the cache of a
+bundled log sits beside the bundle). Reference configurations can also be read from parameter
+files (.param / .parm / .params).
+"""
+
+import os
+import json
+import hashlib
+
+from tools.profiling import timed_stage
+from tools.log_cache import cache_base, source_stamp, is_current, read_json, write_json
+from tools.worker_pool import run_parallel
+from tools.compressed_logs import log_exists, log_extension, is_log_name, zip_log_members
+
+CACHE_SUFFIX = ".params.json"
+CACHE_VERSION = 3
+
+PARAM_FILE_EXTENSIONS = ('.param', '.parm', '.params')
+
+def cache_path(filepath):
+    return cache_base(filepath) + CACHE_SUFFIX
+
+def parameter_hash(parameters):
+    """Stable hash of a {name: value} set (name order and int/float spelling of equal values ignored)."""
+    canonical = json.dumps(sorted((name, float(value)) for name, value in parameters.items()),
+                           separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def bin_firmware_version(messages):
+    """The ArduPilot version banner among a log's MSG texts, or None."""
+    return next((text for text in messages if text.startswith('Ardu')), None)
+
+def ulg_firmware_version(info):
+    """'PX4 vX.Y.Z (git hash)' from a .ulg log's info messages, or None."""
+    release = info.get('ver_sw_release')
+    git_hash = info.get('ver_sw')
+    if isinstance(release, int) and release:
+        version = f"PX4 v{(release >> 24) & 0xff}.{(release >> 16) & 0xff}.{(release >> 8) & 0xff}"
+        return version + (f" ({git_hash[:8]})" if git_hash else "")
+    return f"PX4 {git_hash[:8]}" if git_hash else None
+
+def _bin_parameter_records(filepath):
+    from tools.bin_stream_decoder import BinStreamDecoder, decode_bin_file
+
+    decoder = BinStreamDecoder(filepath, collect_types=('MSG',))
+    result = decode_bin_file(filepath, decoder=decoder)
+    if 'error' in result:
+        raise ValueError(result['error'])
+    columns = decoder.formats['MSG'].columns if 'MSG' in decoder.formats else []
+    text_index = columns.index('Message') if 'Message' in columns else None
+    messages = [values[text_index].split(b'\0', 1)[0].decode('ascii', 'ignore')
+                for _, values in decoder.records if text_index is not None]
+    records = [(time_us / 1e6, name, value) for time_us, name, value in decoder.parameter_records]
+    return records, bin_firmware_version(messages)
+
+def _ulg_parameter_records(filepath):
+    from tools.time_window import read_ulg_window
+
+    ulog = read_ulg_window(filepath, message_name_filter_list=[])  # ✅ Definitions and parameters only
+    start_s = ulog.start_timestamp / 1e6
+    records = [(start_s, name, value) for name, value in ulog.initial_parameters.items()]
+    records.extend((timestamp / 1e6, name, value) for timestamp, name, value in ulog.changed_parameters)
+    return records, ulg_firmware_version(ulog.msg_info_dict)
+
+def summarize_records(records):
+    """(initial, changes, final) from (time_s, name, value) records in log order."""
+    initial, changes, final = {}, {}, {}
+    for time_s, name, value in records:
+        if name not in initial:
+            initial[name] = value
+        elif value != final[name]:
+            changes.setdefault(name, []).append([round(time_s, 6), value])
+        final[name] = value
+    return dict(sorted(initial.items())), dict(sorted(changes.items())), dict(sorted(final.items()))
+
+@timed_stage
+def build_parameter_set(filepath):
+    """Decode a log's parameter records; returns the cache entry or {'error': ...}."""
+    if not log_exists(filepath):
+        return {'error': f"File not found: {filepath}"}
+    ext = log_extension(filepath)
+    try:
+        if ext == '.bin':
+            records, firmware = _bin_parameter_records(filepath)
+        elif ext == '.ulg':
+            records, firmware = _ulg_parameter_records(filepath)
+        else:
+            return {'error': f"Expected a .bin or .ulg file, but got '{ext}'"}
+    except Exception as e:
+        return {'error': str(e)}
+    if not records:
+        return {'error': f"No parameters found in {ext} file"}
+
+    initial, changes, parameters = summarize_records(records)
+    return {
+        'version': CACHE_VERSION,
+        'filename': os.path.basename(filepath),
+        'log_type': ext[1:],
+        'source': source_stamp(filepath),
+        'firmware': firmware,
+        'hash': parameter_hash(parameters),
+        'parameters': parameters,
+        'initial': initial,
+        'changes': changes,
+    }
+
+def load_parameter_set(filepath, rebuild=False):
+    """The cached parameter set beside the log if it is still current, else a freshly built (and cached) one."""
+    path = cache_path(filepath)
+    if not rebuild:
+        entry = read_json(path)
+        if entry is not None and is_current(entry, filepath, CACHE_VERSION):
+            return entry
+
+    entry = build_parameter_set(filepath)
+    if 'error' not in entry:
+        write_json(path, entry)
+    return entry
+
+def _cached_parameter_set(filepath):
+    entry = read_json(cache_path(filepath))
+    return entry if entry is not None and is_current(entry, filepath, CACHE_VERSION) else None
+
+@timed_stage
+def load_parameter_sets(paths, workers=None, rebuild=False):
+    """
+    load_parameter_set() of every path, in order. Logs without a current cache are decoded
+    concurrently, one per worker process (default: up to the CPU count).
+    """
+    entries = {} if rebuild else {path: entry for path in paths
+                                  if (entry := _cached_parameter_set(path)) is not None}
+    missing = [path for path in dict.fromkeys(paths) if path not in entries]
+    if missing:
+        workers = min(len(missing), workers or os.cpu_count() or 1)
+        entries.update(run_parallel('parameter_sets', load_parameter_set,
+                                    {path: (path, rebuild) for path in missing}, workers, preload=[__name__]))
+    return [entries[path] for path in paths]
+
+def read_parameter_file(filepath):
+    """
+    {name: value} from a saved parameter file: ArduPilot "NAME,VALUE" / "NAME VALUE" lines, or a
+    QGroundControl file (tab-separated "vehicle component NAME VALUE type"). '#' starts a comment.
+    """
+    parameters = {}
+    with open(filepath) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            fields = line.split('\t') if line.count('\t') >= 3 else line.replace(',', ' ').split()
+            name, value = (fields[2], fields[3]) if len(fields) >= 5 else (fields[0], fields[-1])
+            try:
+                parameters[name.strip()] = float(value)
+            except ValueError:
+                raise ValueError(f"{os.path.basename(filepath)}: unreadable line '{line}'") from None
+    if not parameters:
+        raise ValueError(f"No parameters found in {os.path.basename(filepath)}")
+    return dict(sorted(parameters.items()))
+
+def reference_parameter_set(path, rebuild=False):
+    """Parameter set of a reference log or parameter file, in load_parameter_set() form."""
+    if path.lower().endswith(PARAM_FILE_EXTENSIONS):
+        if not log_exists(path):
+            return {'error': f"File not found: {path}"}
+        try:
+            parameters = read_parameter_file(path)
+        except (OSError, ValueError) as e:
+            return {'error': str(e)}
+        return {'filename': os.path.basename(path), 'log_type': 'param', 'firmware': None,
+                'hash': parameter_hash(parameters), 'parameters': parameters, 'initial': parameters, 'changes': {}}
+    return load_parameter_set(path, rebuild)
+
+def _bundle_logs(path):
+    """A .zip bundle's logs as bundle.zip/<member> paths; any other path as it is."""
+    import zipfile
+
+    if not path.lower().endswith('.zip') or not os.path.isfile(path):
+        return [path]
+    try:
+        return [f"{path}/{member}" for member in zip_log_members(path)]
+    except (OSError, zipfile.BadZipFile) as e:
+        print(f"⚠️  {path}: {e}")
+        return []
+
+def find_logs(paths):
+    """
+    The .bin/.ulg logs (plain or compressed, see compressed_logs.py) named in paths, with
+    directories searched recursively and .zip bundles opened, in sorted order.
+    """
+    logs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = [d for d in dirs if not d.endswith('.pyramid')]
+                for name in files:
+                    if is_log_name(name):
+                        logs.extend(_bundle_logs(os.path.join(root, name)))
+        else:
+            logs.extend(_bundle_logs(path))
+    return sorted(dict.fromkeys(logs))
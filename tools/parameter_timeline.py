@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+parameter_timeline.py
+Every parameter change in a .bin or .ulg log, with its time, and "value of X at time T" lookups.
+
+The change records come from the parameter cache beside the log (<log>.params.json, see
+parameter_sets.py), so auditing a tuning session does not re-read the log. Each changed
+parameter keeps its change times sorted; a lookup is a binary search.
+"""
+
+import os
+import sys
+import argparse
+from bisect import bisect_left, bisect_right
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import add_profile_arguments, profile_session
+from tools.parameter_sets import load_parameter_set
+from tools.time_window import add_time_window_arguments, check_time_window_args
+from tools.flight_segments import add_segment_arguments, segment_window
+
+class ParameterTimeline:
+    """
+    Parameter values over time for one log. Before a parameter's first change its initial value
+    applies; times are seconds since boot.
+    """
+
+    def __init__(self, entry):
+        self.filename = entry['filename']
+        self.initial = entry['initial']
+        self.final = entry['parameters']
+        self._times = {name: [t for t, _ in changes] for name, changes in entry['changes'].items()}
+        self._values = {name: [v for _, v in changes] for name, changes in entry['changes'].items()}
+
+    @property
+    def names(self):
+        return sorted(self.final)
+
+    @property
+    def changed_names(self):
+        return sorted(self._times)
+
+    def value_at(self, name, time_s):
+        """Value of a parameter at time_s; raises KeyError for a parameter the log does not have."""
+        if name not in self.initial:
+            raise KeyError(name)
+        times = self._times.get(name)
+        i = bisect_right(times, time_s) if times else 0
+        return self._values[name][i - 1] if i else self.initial[name]
+
+    def snapshot(self, time_s):
+        """{name: value} of every parameter at time_s."""
+        return {name: self.value_at(name, time_s) for name in self.names}
+
+    def history(self, name):
+        """[(time_s or None for the initial value, value)] of one parameter."""
+        if name not in self.initial:
+            raise KeyError(name)
+        return [(None, self.initial[name])] + list(zip(self._times.get(name, []), self._values.get(name, [])))
+
+    def changes(self, start=None, end=None, names=None):
+        """[(time_s, name, old, new)] of every change in [start, end], in time order."""
+        events = []
+        for name in (names if names is not None else self._times):
+            times = self._times.get(name)
+            if not times:
+                continue
+            lo = 0 if start is None else bisect_left(times, start)
+            hi = len(times) if end is None else bisect_right(times, end)
+            values = self._values[name]
+            for i in range(lo, hi):
+                events.append((times[i], name, values[i - 1] if i else self.initial[name], values[i]))
+        events.sort(key=lambda event: (event[0], event[1]))
+        return events
+
+def load_parameter_timeline(filepath, rebuild=False):
+    """ParameterTimeline of a log (from the cache when current); raises ValueError."""
+    entry = load_parameter_set(filepath, rebuild)
+    if 'error' in entry:
+        raise ValueError(entry['error'])
+    return ParameterTimeline(entry)
+
+def fmt(val):
+    if val is None:
+        return "missing"
+    if isinstance(val, float):
+        return f"{val:.6f}"
+    return str(val)
+
+if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
+    parser = argparse.ArgumentParser(description="List parameter changes in a .bin or .ulg log, or values at a time")
+    parser.add_argument("input_file", help="Path to .bin or .ulg log file")
+    parser.add_argument("--param", action="append", dest="params", metavar="NAME",
+                        help="Only this parameter (repeatable)")
+    parser.add_argument("--at", type=float, metavar="SECONDS",
+                        help="Print every parameter's value in effect at this time (or only --param ones) instead of the changes")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the cached parameters beside the log")
+    add_time_window_arguments(parser)
+    add_segment_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    check_time_window_args(parser, args)
+
+    with profile_session(args):
+        try:
+            timeline = load_parameter_timeline(args.input_file, rebuild=args.rebuild)
+            start, end = segment_window(args.input_file, args.segment, args.start, args.end)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+    unknown = [name for name in args.params or [] if name not in timeline.initial]
+    if unknown:
+        print(f"❌ Not in {timeline.filename}: {', '.join(unknown)}")
+        sys.exit(1)
+
+    if args.at is not None:
+        values = ({name: timeline.value_at(name, args.at) for name in args.params} if args.params
+                  else timeline.snapshot(args.at))
+        print(f"📄 Parameters at {args.at:.2f} s in {timeline.filename}:")
+        for name, value in values.items():
+            print(f"  {name}: {fmt(value)}")
+        print(f"✅ {len(values)} of {len(timeline.initial)} parameters")
+        sys.exit(0)
+
+    changes = timeline.changes(start, end, args.params)
+    print(f"📄 Parameter changes in {timeline.filename}:")
+    print(f"{'time s':>10}  {'parameter':<18}{'from':>14}{'to':>14}")
+    for time_s, name, old, new in changes:
+        print(f"{time_s:>10.2f}  {name:<18}{fmt(old):>14}{fmt(new):>14}")
+    print(f"✅ {len(changes)} changes to {len({c[1] for c in changes})} of {len(timeline.initial)} parameters")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+profiling.py
+Shared per-stage timing instrumentation for Flight-Tools scripts and Flask routes.
+
+Tools mark their stages with the @timed_stage decorator or the stage() context manager.
+Timings are only collected while a recorder is active (--profile on the CLI, or a Flask
+request), so instrumented code costs a thread-local lookup otherwise.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+
+_local = threading.local()
+
+class StageRecorder:
+    """Collects nested stage timings for one CLI run or one web request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.events = []  # (path tuple, start offset s, duration s)
+        self._stack = []
+
+    def _enter(self, name):
+        self._stack.append(name)
+        return tuple(self._stack), time.perf_counter()
+
+    def _exit(self, path, start):
+        self._stack.pop()
+        self.events.append((path, start - self.started, time.perf_counter() - start))
+
+    def record(self, name, seconds):
+        """Add a stage that was timed elsewhere (e.g. spread across upload chunks)."""
+        path = tuple(self._stack) + (name,)
+        self.events.append((path, time.perf_counter() - self.started - seconds, seconds))
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def summary(self):
+        """Aggregate events by stage path: [{'stage', 'depth', 'seconds', 'calls'}] in first-seen order."""
+        totals = {}
+        first_seen = {}
+        for path, start, seconds in self.events:
+            calls, total = totals.get(path, (0, 0.0))
+            totals[path] = (calls + 1, total + seconds)
+            first_seen[path] = min(first_seen.get(path, start), start)
+        ordered = sorted(totals, key=lambda path: (first_seen[path], len(path)))
+        return [{
+            'stage': path[-1],
+            'path': '/'.join(path),
+            'depth': len(path) - 1,
+            'seconds': totals[path][1],
+            'calls': totals[path][0],
+        } for path in ordered]
+
+    def format_breakdown(self, total=None):
+        total = self.elapsed() if total is None else total
+        lines = [f"⏱️  Stage breakdown (total {total:.3f} s)"]
+        for entry in self.summary():
+            label = "  " * entry['depth'] + entry['stage']
+            calls = f" x{entry['calls']}" if entry['calls'] > 1 else ""
+            share = 100.0 * entry['seconds'] / total if total else 0.0
+            lines.append(f"  {label + calls:<40}{entry['seconds']:>9.3f} s {share:>6.1f}%")
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Events in Chrome trace format (load in chrome://tracing or Perfetto)."""
+        pid = os.getpid()
+        return {'traceEvents': [{
+            'name': path[-1],
+            'cat': 'stage',
+            'ph': 'X',
+            'ts': round(start * 1e6, 1),
+            'dur': round(seconds * 1e6, 1),
+            'pid': pid,
+            'tid': len(path),
+        } for path, start, seconds in self.events]}
+
+def current_recorder():
+    return getattr(_local, 'recorder', None)
+
+@contextmanager
+def recording():
+    """Activate a fresh StageRecorder for the current thread and yield it."""
+    previous = current_recorder()
+    recorder = StageRecorder()
+    _local.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _local.recorder = previous
+
+def start_recording():
+    """Non-context-manager form of recording(), for request hooks."""
+    _local.recorder = StageRecorder()
+    return _local.recorder
+
+def stop_recording():
+    recorder = current_recorder()
+    _local.recorder = None
+    return recorder
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as a named stage when a recorder is active."""
+    recorder = current_recorder()
+    if recorder is None:
+        yield
+        return
+    path, start = recorder._enter(name)
+    try:
+        yield
+    finally:
+        recorder._exit(path, start)
+
+def timed_stage(func=None, name=None):
+    """Decorator form of stage(); the stage is named after the function by default."""
+    if func is None:
+        return lambda f: timed_stage(f, name=name)
+    stage_name = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if current_recorder() is None:
+            return func(*args, **kwargs)
+        with stage(stage_name):
+            return func(*args, **kwargs)
+    return wrapper
+
+def add_profile_arguments(parser):
+    """Add --profile, --profile-output and --trace-output to a tool's argparse parser."""
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile", action="store_true", help="Print a per-stage timing breakdown")
+    group.add_argument("--profile-output", metavar="PATH",
+                       help="Also run cProfile and write stats to PATH (view with snakeviz or pstats)")
+    group.add_argument("--trace-output", metavar="PATH",
+                       help="Write stage timings as a Chrome trace JSON file")
+
+@contextmanager
+def profile_session(args):
+    """Wrap a CLI run; reports according to the flags added by add_profile_arguments()."""
+    enabled = getattr(args, 'profile', False)
+    profile_output = getattr(args, 'profile_output', None)
+    trace_output = getattr(args, 'trace_output', None)
+    if not (enabled or profile_output or trace_output):
+        yield None
+        return
+
+    profiler = None
+    if profile_output:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    with recording() as recorder:
+        if profiler:
+            profiler.enable()
+        try:
+            yield recorder
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(profile_output)
+                print(f"[PROFILE] cProfile stats written to {profile_output}", file=sys.stderr)
+            if trace_output:
+                with open(trace_output, "w") as f:
+                    json.dump(recorder.chrome_trace(), f)
+                print(f"[PROFILE] Chrome trace written to {trace_output}", file=sys.stderr)
+            print(recorder.format_breakdown(), file=sys.stderr)
@@ -0,0 +1,120 @@
+"""
+report_charts.py
+Chart rendering for flight_report.py. render_chart() runs in the report's worker processes:
+it takes the series of the one decode pass (NumPy columns arrive in shared memory, see
+shared_columns.py) and returns a base64 PNG.
+
+The worker pool (see worker_pool.py) is started from here rather than from the CLI module, so
+jobs pickle by an importable module path and every run in the warm daemon reuses it.
+"""
+
+import os
+import base64
+from io import BytesIO
+
+from tools.profiling import timed_stage
+from tools.worker_pool import run_parallel
+
+def warm_worker():
+    """Process pool initializer: pay the matplotlib import once per worker, not per chart."""
+    import matplotlib
+    matplotlib.use("Agg")  # ✅ Use non-GUI backend in worker processes
+    import matplotlib.pyplot  # noqa: F401
+
+def _encode(fig):
+    import matplotlib.pyplot as plt
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png')
+    plt.close(fig)
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+def generate_vibration_chart(timestamps, series, clips=None, title='Vibration'):
+    """Vibration levels per axis, plus the cumulative accelerometer clip count when logged."""
+    import matplotlib.pyplot as plt
+
+    fig, ax1 = plt.subplots(figsize=(14, 6))
+    for (label, values), color in zip(series.items(), ('blue', 'green', 'red')):
+        ax1.plot(timestamps, values, color=color, label=label)
+    ax1.set_xlabel('Time (s)')
+    ax1.set_ylabel('Vibration')
+    ax1.grid(True)
+    ax1.legend(loc='upper left')
+
+    if clips is not None and len(clips):
+        ax2 = ax1.twinx()
+        ax2.step(timestamps, clips, color='black', where='post', alpha=0.6, label='Clipping')
+        ax2.set_ylabel('Accelerometer clip count')
+
+    plt.title(title, fontsize=14)
+    fig.tight_layout()
+    return fig
+
+def generate_gps_track_chart(lat, lng, timestamps, title='GPS Track'):
+    """Ground track coloured by time, with equal metres per degree on both axes."""
+    import numpy as np
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 8))
+    points = ax.scatter(lng, lat, c=timestamps, cmap='viridis', s=6)
+    ax.plot(lng[:1], lat[:1], marker='o', color='green', markersize=10, label='Start')
+    ax.plot(lng[-1:], lat[-1:], marker='s', color='red', markersize=10, label='End')
+    ax.set_aspect(1.0 / max(np.cos(np.radians(np.mean(lat))), 1e-6))
+    ax.set_xlabel('Longitude (deg)')
+    ax.set_ylabel('Latitude (deg)')
+    ax.ticklabel_format(useOffset=False)
+    ax.grid(True)
+    ax.legend(loc='best')
+    fig.colorbar(points, ax=ax, label='Time (s)')
+    plt.title(title, fontsize=14)
+    fig.tight_layout()
+    return fig
+
+def render_chart(name, payload):
+    """Draw one report chart and return it as base64 PNG."""
+    import numpy as np
+    import matplotlib
+    matplotlib.use("Agg")
+
+    log_type = payload['log_type']
+    if name == 'power':
+        if log_type == 'bin':
+            from tools.bin_power_plot import generate_power_chart
+            fig = generate_power_chart(payload['timestamps'], payload['current'], payload['voltage'])
+        else:
+            from tools.ulg_power_plot import generate_power_chart
+            timestamps = np.asarray(payload['timestamps'])
+            fig = generate_power_chart(timestamps - timestamps[0], payload['voltage'], payload['current'],
+                                       payload['watt_hours'][1:])
+    elif name == 'range_signal':
+        if log_type == 'bin':
+            from tools.bin_range_signal import generate_range_signal_chart
+        else:
+            from tools.ulg_range_signal import generate_range_signal_chart
+        fig = generate_range_signal_chart(payload['ctrl_rssi'], payload['ctrl_lq'], payload['telem_rssi'])
+    elif name == 'vibration':
+        fig = generate_vibration_chart(payload['timestamps'], payload['series'], payload.get('clips'),
+                                       payload['title'])
+    elif name == 'gps_track':
+        fig = generate_gps_track_chart(payload['lat'], payload['lng'], payload['timestamps'], payload['title'])
+    else:
+        raise ValueError(f"Unknown chart: {name}")
+    return _encode(fig)
+
+def _render_job(name, payload):
+    """render_chart() for the pool: failures come back as values so one chart cannot sink the rest."""
+    try:
+        return render_chart(name, payload)
+    except Exception as e:
+        return RuntimeError(f"{type(e).__name__}: {e}")
+
+@timed_stage(name="render_charts")
+def render_charts(jobs, workers=None):
+    """
+    {chart: base64 PNG or Exception} for {chart: payload}, one worker process per chart up to
+    the CPU count. workers=1 (or a single CPU) draws in-process.
+    """
+    if workers is None:
+        workers = min(len(jobs), os.cpu_count() or 1)
+    return run_parallel('report_charts', _render_job, {name: (name, payload) for name, payload in jobs.items()},
+                        workers, initializer=warm_worker, preload=[__name__])
@@ -0,0 +1,151 @@
+"""
+shared_columns.py
+Hands decoded columns (NumPy arrays) to worker processes, and back, without pickling them.
+
+share_columns() writes the large arrays in a set of job arguments once, into one file in shared
+memory (/dev/shm where there is one, else the temp directory), and replaces each with a ColumnRef:
+the file, offset, dtype and shape. Workers map the file read-only (resolve_columns), so every job
+reads the same physical copy and only the descriptors cross the process boundary. The file is
+removed as soon as the jobs are done; mappings that are still open keep its pages until they close.
+
+Results travel the same way in the other direction: the parent reserves a file per job with
+result_file(), the worker writes its result's large arrays there with export_columns(), and the
+parent maps them with resolve_columns() before the file is removed. Resolved arrays are read-only.
+
+Small arrays and everything else are passed as they are. If the file cannot be written (no space),
+the arrays are pickled as before.
+"""
+
+import os
+import sys
+import mmap
+import tempfile
+from collections import namedtuple
+from contextlib import contextmanager
+
+MIN_SHARED_BYTES = 64 << 10  # below this, pickling is cheaper than a mapping
+ALIGN = 64
+FILE_PREFIX = 'flight-tools-columns-'
+
+ColumnRef = namedtuple('ColumnRef', 'path offset dtype shape')
+
+def shared_dir():
+    """Where shared column files go: RAM-backed /dev/shm when writable, else the temp directory."""
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+def _map_leaves(value, func):
+    """value with func applied to every leaf of its dicts, lists and tuples."""
+    if isinstance(value, ColumnRef):
+        return func(value)
+    if isinstance(value, dict):
+        return {key: _map_leaves(item, func) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_map_leaves(item, func) for item in value)
+    return func(value)
+
+def _large_arrays(value):
+    import numpy as np
+
+    found = {}
+
+    def visit(leaf):
+        if isinstance(leaf, np.ndarray) and leaf.nbytes >= MIN_SHARED_BYTES and not leaf.dtype.hasobject:
+            found[id(leaf)] = leaf
+        return leaf
+
+    _map_leaves(value, visit)
+    return list(found.values())
+
+def _write_arrays(arrays, path=None):
+    """Write arrays into path, or a new shared file; returns ({id(array): ColumnRef}, path)."""
+    import numpy as np
+
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix=FILE_PREFIX, dir=shared_dir())
+    else:
+        fd = os.open(path, os.O_WRONLY | os.O_TRUNC)
+    refs = {}
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            offset = 0
+            for array in arrays:
+                pad = -offset % ALIGN
+                f.write(b'\0' * pad)
+                offset += pad
+                data = np.ascontiguousarray(array)
+                f.write(data.data)
+                refs[id(array)] = ColumnRef(path, offset, data.dtype.str, data.shape)
+                offset += data.nbytes
+    except OSError:
+        os.remove(path)
+        raise
+    return refs, path
+
+@contextmanager
+def share_columns(value):
+    """
+    value (any nesting of dicts, lists and tuples) with its large arrays replaced by ColumnRefs into
+    a shared file, valid for the block.
+    """
+    arrays = _large_arrays(value)
+    refs, path = {}, None
+    if arrays:
+        try:
+            refs, path = _write_arrays(arrays)
+        except OSError as e:
+            print(f"⚠️  Columns not shared ({e}); passing copies", file=sys.stderr)
+    try:
+        yield _map_leaves(value, lambda leaf: refs.get(id(leaf), leaf)) if refs else value
+    finally:
+        if path is not None:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+@contextmanager
+def result_file():
+    """An empty shared file for one job's result (see export_columns()), removed after the block."""
+    fd, path = tempfile.mkstemp(prefix=FILE_PREFIX, dir=shared_dir())
+    os.close(fd)
+    try:
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def export_columns(value, path):
+    """
+    value with its large arrays written into path (from the parent's result_file()) and replaced by
+    ColumnRefs, for a worker to return; value as it is when it has none or the file cannot be written.
+    """
+    arrays = _large_arrays(value)
+    if not arrays:
+        return value
+    try:
+        refs, _ = _write_arrays(arrays, path)
+    except OSError as e:
+        print(f"⚠️  Result columns not shared ({e}); returning copies", file=sys.stderr)
+        return value
+    return _map_leaves(value, lambda leaf: refs.get(id(leaf), leaf))
+
+def resolve_columns(value):
+    """value with its ColumnRefs replaced by read-only arrays mapped from the shared file."""
+    import numpy as np
+
+    maps = {}
+
+    def resolve(leaf):
+        if not isinstance(leaf, ColumnRef):
+            return leaf
+        mapped = maps.get(leaf.path)
+        if mapped is None:
+            with open(leaf.path, 'rb') as f:
+                mapped = maps[leaf.path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return np.ndarray(leaf.shape, dtype=np.dtype(leaf.dtype), buffer=mapped, offset=leaf.offset)
+
+    return _map_leaves(value, resolve)
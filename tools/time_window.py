@@ -0,0 +1,258 @@
+"""
+time_window.py
+Time-window pushdown shared by the .bin and .ulg tools (--start/--end, in seconds since boot:
+TimeUS for .bin, the ULog timestamp for .ulg).
+
+.bin: FMT records are located with a byte search, then record offsets are bisected on TimeUS,
+      so only the records inside the window are decoded (no full DFReader pass).
+.ulg: every message is located from its header (see ulg_reader.py); data messages of other
+      topics or outside the window are never copied out of the memory-mapped log.
+Compressed logs are searched the same way in their decompressed bytes (see compressed_logs.py).
+
+Every .bin message these functions yield has _timestamp = TimeUS in seconds. DFReader's own
+_timestamp follows the GPS clock once the log has a fix; boot_time() puts the messages of a full
+DFReader pass on the same time base, so a step with a window and one without agree.
+"""
+
+import array
+import struct
+
+from tools import decode_cache
+from tools.compressed_logs import log_buffer
+
+BIN_HEAD = b'\xa3\x95'
+BIN_FMT_HEAD = b'\xa3\x95\x80'
+BIN_FMT_LEN = 89
+BIN_FMT_STRUCT = struct.Struct('<BB4s16s64s')
+UINT64 = struct.Struct('<Q')
+
+# Log timestamps are not strictly ordered across message types; search and stop with this margin
+ORDER_SLACK_US = 500_000
+# Below this span the bisection hands over to a linear walk
+BISECT_MIN_SPAN = 4096
+# Rough in-memory size of a decoded DFMessage, for the decode cache's budget
+DFMESSAGE_BYTES = 400
+FIELD_BYTES = 40
+
+def add_time_window_arguments(parser):
+    parser.add_argument("--start", type=float, metavar="SECONDS",
+                        help="Only decode records at or after this time (seconds since boot)")
+    parser.add_argument("--end", type=float, metavar="SECONDS",
+                        help="Only decode records at or before this time (seconds since boot)")
+
+def check_time_window_args(parser, args):
+    """Reject an invalid --start/--end combination with the usual argparse error."""
+    try:
+        parse_time_window(args.start, args.end)
+    except ValueError as e:
+        parser.error(str(e))
+
+def parse_time_window(start=None, end=None):
+    """
+    Normalise a window given as numbers or form strings ('' means unbounded).
+    Returns (start, end) in seconds, either may be None; raises ValueError if invalid.
+    """
+    bounds = []
+    for label, value in (("start", start), ("end", end)):
+        if isinstance(value, str):
+            value = value.strip() or None
+        if value is not None:
+            try:
+                value = float(value)
+            except ValueError:
+                raise ValueError(f"Invalid {label} time: {value!r}")
+            if value < 0:
+                raise ValueError(f"The {label} time must not be negative")
+        bounds.append(value)
+    if None not in bounds and bounds[0] > bounds[1]:
+        raise ValueError("The start time must not be after the end time")
+    return tuple(bounds)
+
+def is_windowed(start=None, end=None):
+    return start is not None or end is not None
+
+def _window_us(start, end):
+    start_us = 0 if start is None else int(start * 1e6)
+    end_us = None if end is None else int(end * 1e6)
+    return start_us, end_us
+
+# ---------------------------------------------------------------- .bin
+
+def _cstr(raw):
+    return raw.split(b'\0', 1)[0].decode('ascii', 'ignore')
+
+def _read_bin_formats(data):
+    """Every FMT record in the log, found by byte search; returns {type_id: DFFormat}."""
+    from pymavlink.DFReader import DFFormat  # ✅ Deferred: importing pymavlink loads the full MAVLink dialect
+
+    formats = {}
+    size = len(data)
+    pos = data.find(BIN_FMT_HEAD)
+    while pos >= 0:
+        end = pos + BIN_FMT_LEN
+        if end <= size and (end == size or data[end:end + 2] == BIN_HEAD):
+            msg_type, length, name, fmt, columns = BIN_FMT_STRUCT.unpack_from(data, pos + 3)
+            try:
+                formats[msg_type] = DFFormat(msg_type, _cstr(name), length, _cstr(fmt), _cstr(columns))
+            except Exception:
+                pass  # corrupt or unsupported definition: records of this type are skipped
+        pos = data.find(BIN_FMT_HEAD, pos + 1)
+    return formats
+
+def _next_bin_record(data, formats, pos):
+    """First well-framed record at or after pos: (offset, DFFormat), or (None, None) at the end."""
+    size = len(data)
+    while True:
+        pos = data.find(BIN_HEAD, pos)
+        if pos < 0 or pos + 3 > size:
+            return None, None
+        fmt = formats.get(data[pos + 2])
+        if fmt is not None and fmt.len >= 3:
+            end = pos + fmt.len
+            if end == size or (end < size and data[end:end + 2] == BIN_HEAD):
+                return pos, fmt
+        pos += 1
+
+def _is_timed(fmt):
+    return bool(fmt.columns) and fmt.columns[0] == 'TimeUS' and fmt.format[:1] == 'Q'
+
+def _next_bin_time(data, formats, pos):
+    """Offset and TimeUS of the first timed record at or after pos, or (None, None)."""
+    while True:
+        pos, fmt = _next_bin_record(data, formats, pos)
+        if pos is None:
+            return None, None
+        if _is_timed(fmt):
+            return pos, UINT64.unpack_from(data, pos + 3)[0]
+        pos += fmt.len
+
+def _bisect_bin_offset(data, formats, target_us):
+    """Offset from which a forward walk reaches every record with TimeUS >= target_us."""
+    lo, hi = 0, len(data)
+    while hi - lo > BISECT_MIN_SPAN:
+        mid = (lo + hi) // 2
+        pos, time_us = _next_bin_time(data, formats, mid)
+        if pos is None or time_us >= target_us:
+            hi = mid
+        else:
+            lo = pos + 1
+    return lo
+
+def _decode_bin_record(data, pos, fmt, unpackers):
+    from pymavlink.DFReader import DFMessage
+
+    unpack = unpackers.get(fmt.type)
+    if unpack is None:
+        unpack = unpackers[fmt.type] = struct.Struct(fmt.msg_struct).unpack_from
+    elements = list(unpack(data, pos + 3))
+    for a_index in fmt.a_indexes:
+        elements[a_index] = array.array('h', elements[a_index])
+    return DFMessage(fmt, elements, True, None)
+
+def boot_time(messages):
+    """
+    The DFMessages of a log in order, each with _timestamp = its TimeUS in seconds; records without
+    a TimeUS column (FMT, UNIT, ...) get the time of the record before them (0 at the start).
+    """
+    last_s = 0.0
+    for msg in messages:
+        time_us = getattr(msg, 'TimeUS', None) if 'TimeUS' in msg.fmt.columns else None
+        if time_us is not None:
+            last_s = time_us / 1e6
+        msg._timestamp = last_s
+        yield msg
+
+def _messages_bytes(messages):
+    return sum(DFMESSAGE_BYTES + FIELD_BYTES * len(msg.fmt.columns) for msg in messages)
+
+def iter_bin_window(filepath, types=None, start=None, end=None, untimed=False):
+    """
+    DFMessage objects of the given types (None = all) whose TimeUS lies in [start, end], in log
+    order. Records without a TimeUS column (FMT, UNIT, ...) are only included with untimed=True,
+    timed as in boot_time(): those before the first timed record count as time 0, so a window
+    open at the start keeps all of them.
+    Each message's _timestamp is TimeUS in seconds. A warm process keeps the decoded messages
+    for the next caller (see decode_cache.py).
+    """
+    if not decode_cache.is_enabled():
+        return _iter_bin_window(filepath, types, start, end, untimed)
+    wanted = None if types is None else tuple(sorted(types))
+    return iter(decode_cache.cached('bin', filepath, (wanted, start, end, untimed),
+                                    lambda: list(_iter_bin_window(filepath, types, start, end, untimed)),
+                                    _messages_bytes))
+
+def _iter_bin_window(filepath, types, start, end, untimed):
+    start_us, end_us = _window_us(start, end)
+    wanted = set(types) if types is not None else None
+    # ✅ Untimed records take the time of the timed record before them; unknown after a bisection
+    last_us = None if start_us > 0 else 0
+
+    with log_buffer(filepath) as data:
+        if not data:
+            return
+        formats = _read_bin_formats(data)
+        unpackers = {}
+        pos = _bisect_bin_offset(data, formats, start_us - ORDER_SLACK_US) if start_us > 0 else 0
+        while True:
+            pos, fmt = _next_bin_record(data, formats, pos)
+            if pos is None:
+                break
+            if _is_timed(fmt):
+                time_us = last_us = UINT64.unpack_from(data, pos + 3)[0]
+                if end_us is not None and time_us > end_us + ORDER_SLACK_US:
+                    break
+            elif untimed and last_us is not None:
+                time_us = last_us
+            else:
+                pos += fmt.len
+                continue
+            if (start_us <= time_us and (end_us is None or time_us <= end_us)
+                    and (wanted is None or fmt.name in wanted)):
+                msg = _decode_bin_record(data, pos, fmt, unpackers)
+                msg._timestamp = time_us / 1e6
+                yield msg
+            pos += fmt.len
+
+def iter_bin_sparse(filepath, types):
+    """
+    Yield messages of a few rarely logged types (EV, MODE, MSG, ...) in log order by searching
+    for their record headers directly, without walking the records in between.
+    Timed messages get _timestamp = TimeUS in seconds.
+    """
+    with log_buffer(filepath) as data:
+        if not data:
+            return
+        formats = _read_bin_formats(data)
+        by_name = {fmt.name: fmt for fmt in formats.values()}
+        size = len(data)
+        found = []
+        for name in types:
+            fmt = by_name.get(name)
+            if fmt is None or fmt.len < 3:
+                continue
+            head = BIN_HEAD + bytes([fmt.type])
+            pos = data.find(head)
+            while pos >= 0:
+                end = pos + fmt.len
+                if end == size or (end < size and data[end:end + 2] == BIN_HEAD):
+                    found.append((pos, fmt))
+                pos = data.find(head, pos + 1)
+        found.sort(key=lambda item: item[0])
+
+        unpackers = {}
+        for pos, fmt in found:
+            msg = _decode_bin_record(data, pos, fmt, unpackers)
+            if _is_timed(fmt):
+                msg._timestamp = UINT64.unpack_from(data, pos + 3)[0] / 1e6
+            yield msg
+
+# ---------------------------------------------------------------- .ulg
+
+def read_ulg_window(filepath, start=None, end=None, message_name_filter_list=None):
+    """Decode only the data messages with a timestamp in [start, end] (seconds since boot)."""
+    from tools.ulg_reader import read_ulog
+    return read_ulog(filepath, start, end, message_name_filter_list)
+
+def load_ulog(filepath, start=None, end=None, message_name_filter_list=None):
+    """The log (or just the window, when one is given) as a ULog-compatible UlgLog."""
+    return read_ulg_window(filepath, start, end, message_name_filter_list)
@@ -1,17 +1,43 @@
 #!/usr/bin/env python3
 
 import os
-from pyulog import ULog
+import sys
 
-def extract_ulg_info(filepath):
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import timed_stage, add_profile_arguments, profile_session
+from tools.ulg_reader import read_ulog, scan_ulog
+from tools.ulg_stream_decoder import decode_ulg_file
+from tools.compressed_logs import log_exists, is_compressed
+
+@timed_stage
+def extract_ulg_info(filepath, full=False):
+    """
+    Topic names, data message count and duration. By default only the message headers are
+    walked (scan_ulog); full=True decodes every topic instead, skipping corrupt messages as pyulog does.
+    """
     try:
-        if not os.path.exists(filepath):
+        if not log_exists(filepath):
             return {'error': f"File not found: {filepath}"}
 
-        ulog = ULog(filepath)
-        message_types = sorted(set(entry.name for entry in ulog.data_list))
-        total_messages = sum(len(entry.data['timestamp']) for entry in ulog.data_list)
-        duration = (ulog.last_timestamp - ulog.start_timestamp) / 1e6
+        if is_compressed(filepath) and not full:
+            # ✅ Decompressed as a stream: same summary, bounded memory
+            summary = decode_ulg_file(filepath)
+            summary.pop('parameters', None)
+            return summary
+
+        if full:
+            ulog = read_ulog(filepath)
+            message_types = sorted(set(entry.name for entry in ulog.data_list))
+            total_messages = sum(len(entry.data['timestamp']) for entry in ulog.data_list)
+            start_timestamp, last_timestamp = ulog.start_timestamp, ulog.last_timestamp
+        else:
+            scan = scan_ulog(filepath)  # ✅ Headers only: I/O time, constant memory
+            message_types = list(scan['message_counts'])
+            total_messages = sum(scan['message_counts'].values())
+            start_timestamp, last_timestamp = scan['start_timestamp'], scan['last_timestamp']
+        duration = (last_timestamp - start_timestamp) / 1e6
 
         return {
             'filename': os.path.basename(filepath),
@@ -23,8 +49,8 @@ def extract_ulg_info(filepath):
     except Exception as e:
         return {'error': str(e)}
 
-def generate_ulg_info(filepath, mode="cli"):
-    result = extract_ulg_info(filepath)
+def generate_ulg_info(filepath, mode="cli", full=False):
+    result = extract_ulg_info(filepath, full)
     if mode == "cli":
         if 'error' in result:
             print(f"❌ {result['error']}")
@@ -38,10 +64,17 @@ def generate_ulg_info(filepath, mode="cli"):
     return result
 
 if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
     import argparse
 
     parser = argparse.ArgumentParser(description="Extract summary info from PX4 .ulg log")
-    parser.add_argument("input_file", help="Path to .ulg log file")
+    parser.add_argument("input_file", help="Path to .ulg log file (or .ulg.gz / .ulg.xz / .ulg.zst / .zip)")
+    parser.add_argument("--full", action="store_true",
+                        help="Decode every message instead of only scanning the message headers")
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    generate_ulg_info(args.input_file, mode="cli")
+    with profile_session(args):
+        generate_ulg_info(args.input_file, mode="cli", full=args.full)
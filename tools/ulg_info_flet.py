@@ -5,27 +5,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import flet as ft
-from pyulog import ULog
-
-def extract_ulg_info(filepath):
-    try:
-        if not os.path.exists(filepath):
-            return {'error': f"File not found: {filepath}"}
-
-        ulog = ULog(filepath)
-        message_types = sorted(set(entry.name for entry in ulog.data_list))
-        total_messages = sum(len(entry.data['timestamp']) for entry in ulog.data_list)
-        duration = (ulog.last_timestamp - ulog.start_timestamp) / 1e6
-
-        return {
-            'filename': os.path.basename(filepath),
-            'message_types': message_types,
-            'total_messages': total_messages,
-            'log_duration': f"{duration:.2f} seconds",
-        }
-
-    except Exception as e:
-        return {'error': str(e)}
+from tools.ulg_info import extract_ulg_info  # ✅ Header scan: returns in I/O time
 
 # --- Flet UI wrapper ---
 def main(page: ft.Page):
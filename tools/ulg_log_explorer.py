@@ -1,14 +1,16 @@
 import os
-import pandas as pd
-from pyulog import ULog
+from tools.profiling import timed_stage
+from tools.time_window import load_ulog
 
 # Parse the uploaded .ulg file and return ULog object + message types
-def parse_ulg_file(filepath):
-    ulog = ULog(filepath)
+@timed_stage
+def parse_ulg_file(filepath, start=None, end=None):
+    ulog = load_ulog(filepath, start, end)
     message_types = sorted(set(msg.name for msg in ulog.data_list))
     return ulog, message_types
 
 # Dynamically extract fields from the log for a given message type
+@timed_stage
 def get_fields_from_log(ulog, msg_type):
     try:
         dataset = ulog.get_dataset(msg_type).data
@@ -17,19 +19,42 @@ def get_fields_from_log(ulog, msg_type):
         return []
 
 # Extract timestamped data for a specific field
+@timed_stage
 def extract_field_data(ulog, msg_type, field_name):
     try:
         dataset = ulog.get_dataset(msg_type).data
-        timestamps = dataset["timestamp"]
+        timestamps = dataset["timestamp"] / 1e6  # ✅ Seconds since boot, the unit of the time window
         values = dataset[field_name]
         return list(zip(timestamps, values))
     except KeyError:
         return []
 
+# The same values as two NumPy columns, which cross to another process in shared memory
+@timed_stage
+def extract_field_columns(ulog, msg_type, field_name):
+    import numpy as np
+
+    try:
+        dataset = ulog.get_dataset(msg_type).data
+        return {'time': dataset["timestamp"] / 1e6, 'value': dataset[field_name]}
+    except KeyError:
+        return {'time': np.empty(0), 'value': np.empty(0)}
+
 # Check if field values are numeric
 def is_field_numeric(ulog, msg_type, field_name):
     try:
         values = ulog.get_dataset(msg_type).data[field_name]
-        return pd.Series(values).apply(lambda x: isinstance(x, (int, float))).all()
+        return all(isinstance(x, (int, float)) for x in values.tolist())
     except KeyError:
         return False
+
+# One explorer step as plain data (message types, a type's fields or a field's values as columns),
+# so the web app can run it in a memory-limited worker process
+@timed_stage
+def explore_ulg_file(filepath, start=None, end=None, msg_type=None, field_name=None):
+    ulog, message_types = parse_ulg_file(filepath, start, end)
+    if msg_type is None:
+        return message_types
+    if field_name is None:
+        return get_fields_from_log(ulog, msg_type)
+    return extract_field_columns(ulog, msg_type, field_name)
@@ -3,60 +3,54 @@
 ulg_parameter_compare.py
 Compare parameters between two PX4 .ulg log files.
 Reports parameter values in CSV format, with options to use first or last values.
+Parameters come from the cache beside each log (see parameter_sets.py).
 """
 
 import os
+import sys
 import argparse
-from pyulog import ULog
 
-def extract_parameters(filepath, mode="last"):
-    """Extract parameter values from a PX4 .ulg file."""
-    try:
-        if not os.path.exists(filepath):
-            return {'error': f"File not found: {filepath}"}
-
-        ulog = ULog(filepath)
-        param_dict = {}
-
-        # Handle initial_parameters (dict OR list of tuples)
-        if isinstance(ulog.initial_parameters, dict):
-            for name, value in ulog.initial_parameters.items():
-                param_dict[name] = value
-        elif isinstance(ulog.initial_parameters, list):
-            for entry in ulog.initial_parameters:
-                if isinstance(entry, tuple) and len(entry) == 2:
-                    name, value = entry
-                    param_dict[name] = value
-
-        # Handle changed_parameters (dict of lists of ParameterChange objects)
-        if isinstance(ulog.changed_parameters, dict):
-            for name, changes in ulog.changed_parameters.items():
-                if isinstance(changes, list) and changes:
-                    if mode == "last":
-                        param_dict[name] = changes[-1].parameter_value
-                    elif mode == "first":
-                        param_dict[name] = changes[0].parameter_value
-
-        if not param_dict:
-            return {'error': "No parameters found in .ulg file"}
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-        return {
-            'filename': os.path.basename(filepath),
-            'parameters': dict(sorted(param_dict.items()))
-        }
+from tools.profiling import timed_stage, add_profile_arguments, profile_session
+from tools.parameter_sets import load_parameter_set, load_parameter_sets
+from tools.compressed_logs import log_exists
 
-    except Exception as e:
-        return {'error': str(e)}
+@timed_stage
+def extract_parameters(filepath, mode="last"):
+    """Extract parameter values from a PX4 .ulg file ('first' = at boot, 'last' = after the last change)."""
+    if not log_exists(filepath):
+        return {'error': f"File not found: {filepath}"}
+    entry = load_parameter_set(filepath)
+    if 'error' in entry:
+        return entry
+    return _summary(entry, mode)
+
+def _summary(entry, mode):
+    return {
+        'filename': entry['filename'],
+        'firmware': entry['firmware'] or "Unknown version",
+        'parameters': entry['initial'] if mode == "first" else entry['parameters'],
+    }
 
+@timed_stage
 def compare_parameters(file1, file2, mode1="last", mode2="last"):
-    """Compare parameters between two .ulg files with mode options."""
-    params1 = extract_parameters(file1, mode=mode1)
-    params2 = extract_parameters(file2, mode=mode2)
-
-    if 'error' in params1:
-        return {'error': f"{file1}: {params1['error']}"}
-    if 'error' in params2:
-        return {'error': f"{file2}: {params2['error']}"}
+    """
+    Compare parameters between two .ulg files with mode options.
+    Both logs are read in one pass each (parameters and version info), concurrently.
+    """
+    for path in (file1, file2):
+        if not log_exists(path):
+            return {'error': f"File not found: {path}"}
+
+    entry1, entry2 = load_parameter_sets([file1, file2])
+    if 'error' in entry1:
+        return {'error': f"{file1}: {entry1['error']}"}
+    if 'error' in entry2:
+        return {'error': f"{file2}: {entry2['error']}"}
+    params1 = _summary(entry1, mode1)
+    params2 = _summary(entry2, mode2)
 
     diffs = {}
     all_keys = set(params1['parameters'].keys()) | set(params2['parameters'].keys())
@@ -69,6 +63,8 @@ def compare_parameters(file1, file2, mode1="last", mode2="last"):
     return {
         'file1': params1['filename'],
         'file2': params2['filename'],
+        'version1': params1['firmware'],
+        'version2': params2['firmware'],
         'differences': diffs,
         'total': len(all_keys)
     }
@@ -81,15 +77,19 @@ def main():
                         help="Use 'first' or 'last' values for file1 (default: last)")
     parser.add_argument("--file2_mode", choices=["first", "last"], default="last",
                         help="Use 'first' or 'last' values for file2 (default: last)")
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    result = compare_parameters(args.log1, args.log2,
-                                mode1=args.file1_mode,
-                                mode2=args.file2_mode)
+    with profile_session(args):
+        result = compare_parameters(args.log1, args.log2,
+                                    mode1=args.file1_mode,
+                                    mode2=args.file2_mode)
 
     if 'error' in result:
         print(f"❌ {result['error']}")
     else:
+        print(f"📄 {result['file1']}: {result['version1']}")
+        print(f"📄 {result['file2']}: {result['version2']}")
         if result['differences']:
             print("Parameter,File1,File2")  # CSV header
             for key, (val1, val2) in sorted(result['differences'].items()):
@@ -105,4 +105,7 @@ def main():
             print("✅ No parameter differences found.")
 
 if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
     main()
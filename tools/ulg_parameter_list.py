@@ -1,14 +1,22 @@
 #!/usr/bin/env python3
 
-from pyulog import ULog
 import os
+import sys
 
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import timed_stage, add_profile_arguments, profile_session
+from tools.ulg_reader import read_ulog
+from tools.compressed_logs import log_exists
+
+@timed_stage
 def extract_parameters(filepath):
     try:
-        if not os.path.exists(filepath):
+        if not log_exists(filepath):
             return {'error': f"File not found: {filepath}"}
 
-        ulog = ULog(filepath)
+        ulog = read_ulog(filepath, message_name_filter_list=[])  # ✅ Definitions and parameters only
         param_dict = {}
 
         # Handle initial_parameters (dict OR list of tuples)
@@ -21,12 +29,9 @@ def extract_parameters(filepath):
                     name, value = entry
                     param_dict[name] = value
 
-        # Handle changed_parameters (dict of lists of ParameterChange objects)
-        if isinstance(ulog.changed_parameters, dict):
-            for name, changes in ulog.changed_parameters.items():
-                if isinstance(changes, list) and changes:
-                    last_change = changes[-1]
-                    param_dict[name] = last_change.parameter_value
+        # changed_parameters is a list of (timestamp, name, value) in log order: last change wins
+        for _, name, value in ulog.changed_parameters:
+            param_dict[name] = value
 
         if not param_dict:
             return {'error': "No parameters found in .ulg file"}
@@ -53,10 +58,15 @@ def generate_parameter_list(filepath, mode="cli"):
     return summary
 
 if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
     import argparse
 
     parser = argparse.ArgumentParser(description="Extract last parameter values from PX4 .ulg log")
     parser.add_argument("input_file", help="Path to .ulg log file")
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    generate_parameter_list(args.input_file, mode="cli")
+    with profile_session(args):
+        generate_parameter_list(args.input_file, mode="cli")
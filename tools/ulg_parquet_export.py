@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+ulg_parquet_export.py
+Export every topic in a PX4 .ulg log to a directory of Parquet files.
+One file per topic instance (<topic>_<multi_id>.parquet, as ulog2csv names them), each with a
+shared 'time_s' column (seconds since boot, from the topic timestamp) and the ULog field type
+stored as Parquet field metadata.
+pyulog decodes whole topics at once, so topics are loaded a few at a time to bound memory.
+"""
+
+import os
+import sys
+import argparse
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyulog import ULog
+from tools.profiling import timed_stage, add_profile_arguments, profile_session
+from tools.time_window import add_time_window_arguments, check_time_window_args, load_ulog
+from tools.ulg_reader import read_ulog
+from tools.compressed_logs import log_exists, log_extension, log_stem, is_compressed
+
+DEFAULT_TOPICS_PER_PASS = 16
+DEFAULT_BATCH_ROWS = 65536
+
+def _topic_table(entry, source_name):
+    fields = [pa.field('time_s', pa.float64(), metadata={'unit': 's'})]
+    arrays = [pa.array(entry.data['timestamp'] / 1e6)]
+
+    for field in entry.field_data:
+        values = entry.data[field.field_name]
+        if field.type_str == 'bool':
+            values = values.astype(np.bool_)
+        arrays.append(pa.array(values))
+        fields.append(pa.field(field.field_name, arrays[-1].type,
+                               metadata={'type': field.type_str}))
+
+    schema = pa.schema(fields, metadata={
+        'source': source_name,
+        'log_type': 'ulg',
+        'message_type': entry.name,
+        'multi_id': str(entry.multi_id),
+    })
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+@timed_stage
+def export_ulg_to_parquet(filepath, output_dir=None, topics_per_pass=DEFAULT_TOPICS_PER_PASS,
+                          batch_rows=DEFAULT_BATCH_ROWS, compression="zstd", start=None, end=None):
+    """
+    Export a .ulg log into one Parquet file per topic instance.
+    topics_per_pass limits how many topics are decoded at once (0 = all in one pass).
+    With start/end (seconds since boot) only the data inside that window is exported.
+    Returns {'output_dir': ..., 'files': {topic_multi_id: row_count}} or {'error': ...}.
+    """
+    if not log_exists(filepath):
+        return {'error': f"File not found: {filepath}"}
+
+    if output_dir is None:
+        output_dir = log_stem(filepath) + "_parquet"
+
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        source_name = os.path.basename(filepath)
+
+        # Definitions only: gives every format name without decoding any data
+        if is_compressed(filepath):
+            header = read_ulog(filepath, message_name_filter_list=[])  # ✅ pyulog seeks back over the header
+        else:
+            header = ULog(filepath, parse_header_only=True)
+        names = sorted(header.message_formats.keys())
+        if topics_per_pass <= 0:
+            batches = [None]
+        else:
+            batches = [names[i:i + topics_per_pass] for i in range(0, len(names), topics_per_pass)]
+
+        files = {}
+        for batch in batches:
+            ulog = load_ulog(filepath, start, end, batch)
+            for entry in ulog.data_list:
+                stem = f"{entry.name}_{entry.multi_id}"
+                table = _topic_table(entry, source_name)
+                pq.write_table(table, os.path.join(output_dir, f"{stem}.parquet"),
+                               row_group_size=batch_rows, compression=compression)
+                files[stem] = table.num_rows
+            del ulog
+
+        return {
+            'output_dir': os.path.abspath(output_dir),
+            'files': files,
+        }
+
+    except Exception as e:
+        return {'error': str(e)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a PX4 .ulg log to Parquet files (one per topic)")
+    parser.add_argument("input_file", help="Path to .ulg log file")
+    parser.add_argument("-o", "--output-dir", help="Output directory (default: <log>_parquet next to the log)")
+    parser.add_argument("--topics-per-pass", type=int, default=DEFAULT_TOPICS_PER_PASS,
+                        help=f"Topics decoded per pass over the log, 0 for all at once (default: {DEFAULT_TOPICS_PER_PASS})")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS,
+                        help=f"Rows per Parquet row group (default: {DEFAULT_BATCH_ROWS})")
+    parser.add_argument("--compression", choices=["zstd", "snappy", "gzip", "none"], default="zstd")
+    add_time_window_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    check_time_window_args(parser, args)
+
+    if log_extension(args.input_file) != ".ulg":
+        print(f"❌ Error: Expected a .ulg file, but got '{os.path.splitext(args.input_file)[1]}'")
+        sys.exit(1)
+
+    with profile_session(args):
+        result = export_ulg_to_parquet(args.input_file, args.output_dir,
+                                       topics_per_pass=args.topics_per_pass,
+                                       batch_rows=args.batch_rows, compression=args.compression,
+                                       start=args.start, end=args.end)
+    if 'error' in result:
+        print(f"❌ {result['error']}")
+        sys.exit(1)
+
+    for name, rows in sorted(result['files'].items()):
+        print(f"  {name}: {rows} rows")
+    print(f"✅ {len(result['files'])} Parquet files written to {result['output_dir']}")
+
+if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
+    main()
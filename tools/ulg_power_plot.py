@@ -5,78 +5,118 @@ import sys
 import argparse
 import subprocess
 import numpy as np
-import matplotlib.pyplot as plt
-from pyulog import ULog
 from io import BytesIO
 import base64
 
-def build_power_plot(filepath):
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import stage, timed_stage, add_profile_arguments, profile_session
+from tools.time_window import add_time_window_arguments, check_time_window_args, load_ulog
+from tools.flight_segments import add_segment_arguments, segment_window
+from tools.compressed_logs import log_exists, log_extension
+
+@timed_stage
+def extract_power_series(filepath, start=None, end=None):
+    """
+    (timestamps, voltage, current, watt_hours, error): timestamps in seconds since boot,
+    watt_hours accumulated from the first sample (so watt_hours[0] == 0).
+    """
+    try:
+        with stage("parse_ulog"):
+            ulog = load_ulog(filepath, start, end, ['battery_status'])  # ✅ Window decoded only
+        return power_series_from_ulog(ulog)
+    except Exception as e:
+        return None, None, None, None, f"❌ Failed to parse .ulg file: {e}"
+
+def power_series_from_ulog(ulog):
+    """extract_power_series() for an already loaded ULog / UlgWindow."""
     try:
-        ulog = ULog(filepath)
         battery_data = ulog.get_dataset('battery_status')
 
         voltage = np.array(battery_data.data['voltage_v'])
         current = np.array(battery_data.data['current_a'])
-        timestamps = np.array(battery_data.data['timestamp'])
+        timestamps = np.array(battery_data.data['timestamp']) / 1e6  # seconds
 
         if len(timestamps) == 0:
-            return None, "No battery telemetry found in log file."
+            return None, None, None, None, "No battery telemetry found in log file."
 
-        timestamps = (timestamps - timestamps[0]) / 1e6  # seconds
         power = voltage * current
         dt_hours = np.diff(timestamps) / 3600.0
-        watt_hours = np.cumsum(power[:-1] * dt_hours)
+        watt_hours = np.concatenate(([0.0], np.cumsum(power[:-1] * dt_hours)))
+        return timestamps, voltage, current, watt_hours, None
 
-        fig, ax1 = plt.subplots(figsize=(14, 6))
+    except Exception as e:
+        return None, None, None, None, f"❌ Failed to parse .ulg file: {e}"
+
+@timed_stage
+def build_power_plot(filepath, start=None, end=None):
+    timestamps, voltage, current, watt_hours, error = extract_power_series(filepath, start, end)
+    if error:
+        return None, error
+
+    try:
+        fig = generate_power_chart(timestamps - timestamps[0], voltage, current, watt_hours[1:])
+        return fig, None
+    except Exception as e:
+        return None, f"❌ Failed to parse .ulg file: {e}"
 
-        ax1.plot(timestamps, voltage, color='blue', label='Voltage (V)')
-        ax1.set_xlabel('Time (s)')
-        ax1.set_ylabel('Voltage (V)', color='blue')
-        ax1.tick_params(axis='y', labelcolor='blue')
-        ax1.grid(True)
+@timed_stage
+def generate_power_chart(timestamps, voltage, current, watt_hours):
+    import matplotlib.pyplot as plt  # ✅ Deferred until a chart is actually drawn
 
-        ax2 = ax1.twinx()
-        ax2.plot(timestamps, current, color='red', label='Current (A)')
-        ax2.set_ylabel('Current (A)', color='red')
-        ax2.tick_params(axis='y', labelcolor='red')
+    fig, ax1 = plt.subplots(figsize=(14, 6))
 
-        ax3 = ax1.twinx()
-        ax3.spines.right.set_position(("axes", 1.1))
-        ax3.plot(timestamps[1:], watt_hours, color='green', label='Watt-Hours (Wh)')
-        ax3.set_ylabel('Watt-Hours (Wh)', color='green', fontsize=12)
-        ax3.tick_params(axis='y', labelcolor='green')
+    ax1.plot(timestamps, voltage, color='blue', label='Voltage (V)')
+    ax1.set_xlabel('Time (s)')
+    ax1.set_ylabel('Voltage (V)', color='blue')
+    ax1.tick_params(axis='y', labelcolor='blue')
+    ax1.grid(True)
 
-        plt.title('PX4 Power Metrics', fontsize=14)
-        fig.tight_layout()
+    ax2 = ax1.twinx()
+    ax2.plot(timestamps, current, color='red', label='Current (A)')
+    ax2.set_ylabel('Current (A)', color='red')
+    ax2.tick_params(axis='y', labelcolor='red')
 
-        return fig, None
+    ax3 = ax1.twinx()
+    ax3.spines.right.set_position(("axes", 1.1))
+    ax3.plot(timestamps[1:], watt_hours, color='green', label='Watt-Hours (Wh)')
+    ax3.set_ylabel('Watt-Hours (Wh)', color='green', fontsize=12)
+    ax3.tick_params(axis='y', labelcolor='green')
 
-    except Exception as e:
-        return None, f"❌ Failed to parse .ulg file: {e}"
+    plt.title('PX4 Power Metrics', fontsize=14)
+    fig.tight_layout()
+    return fig
 
-def flask_entry(input_path):
+def flask_entry(input_path, start=None, end=None):
     import matplotlib
     matplotlib.use("Agg")  # ✅ Use non-GUI backend for Flask
 
     print("🧪 flask_entry() triggered")
 
-    if not os.path.exists(input_path):
+    if not log_exists(input_path):
         return {'error': f"File not found: {input_path}"}
 
-    fig, error = build_power_plot(input_path)
+    fig, error = build_power_plot(input_path, start, end)
     if error:
         return {'error': error}
 
     buffer = BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-    plt.close()  # ✅ Clean up figure after saving
+    with stage("savefig"):
+        fig.savefig(buffer, format='png')
+    with stage("encode"):
+        buffer.seek(0)
+        image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
+    close_chart(fig)  # ✅ Clean up figure after saving
 
     result = {'image_data': image_base64}
     print("[DEBUG] Chart image generated and encoded successfully.")
     return result
 
+def close_chart(fig):
+    import matplotlib.pyplot as plt
+    plt.close(fig)
+
 def open_image(path):
     try:
         abs_path = os.path.abspath(path)
@@ -98,13 +138,16 @@ def get_temp_chart_path(logfile_path, script_name):
 
 def validate_input_file(path_str):
     path = os.path.abspath(path_str)
-    if not os.path.exists(path):
+    if not log_exists(path):
         return None, f"❌ Error: File '{path}' does not exist."
-    if not path.lower().endswith(".ulg"):
+    if log_extension(path) != ".ulg":
         return None, f"❌ Error: Expected a .ulg file, but got '{os.path.splitext(path)[1]}'"
     return path, None
 
 if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
     import matplotlib
     matplotlib.use("Agg")  # ✅ Use non-GUI backend for CLI mode
 
@@ -113,31 +156,43 @@ if __name__ == "__main__":
     parser.add_argument("--output", help="Path to save PNG chart")
     parser.add_argument("--nogui", action="store_true", help="Suppress GUI display")
     parser.add_argument("--view", action="store_true", help="Open chart after saving")
+    add_time_window_arguments(parser)
+    add_segment_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
-
-    path, error = validate_input_file(args.input_file)
-    if error:
-        print(error)
-        exit(1)
-
-    fig, error = build_power_plot(path)
-    if error:
-        print(error)
-        exit(1)
-
-    if args.output:
-        output_path = os.path.abspath(args.output)
-        if not output_path.lower().endswith(".png"):
-            output_path += ".png"
-    elif args.nogui:
-        print("❌ Headless mode requires --output to save chart.")
-        exit(1)
-    else:
-        output_path = get_temp_chart_path(args.input_file, __file__)
-
-    fig.savefig(output_path)
-    print(f"✅ Chart saved to: {output_path}")
-    plt.close()  # ✅ Clean up figure after saving
-
-    if not args.nogui and (not args.output or args.view):
-        open_image(output_path)
+    check_time_window_args(parser, args)
+
+    with profile_session(args):
+        path, error = validate_input_file(args.input_file)
+        if error:
+            print(error)
+            exit(1)
+
+        try:
+            start, end = segment_window(str(path), args.segment, args.start, args.end)  # ✅ Decode only this part
+        except ValueError as e:
+            print(f"❌ {e}")
+            exit(1)
+
+        fig, error = build_power_plot(path, start, end)
+        if error:
+            print(error)
+            exit(1)
+
+        if args.output:
+            output_path = os.path.abspath(args.output)
+            if not output_path.lower().endswith(".png"):
+                output_path += ".png"
+        elif args.nogui:
+            print("❌ Headless mode requires --output to save chart.")
+            exit(1)
+        else:
+            output_path = get_temp_chart_path(args.input_file, __file__)
+
+        with stage("savefig"):
+            fig.savefig(output_path)
+        print(f"✅ Chart saved to: {output_path}")
+        close_chart(fig)  # ✅ Clean up figure after saving
+
+        if not args.nogui and (not args.output or args.view):
+            open_image(output_path)
@@ -8,18 +8,31 @@ import base64
 import subprocess
 from io import BytesIO
 from pathlib import Path
-import matplotlib.pyplot as plt
-from pyulog import ULog
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import stage, timed_stage, add_profile_arguments, profile_session
+from tools.time_window import add_time_window_arguments, check_time_window_args, load_ulog
+from tools.flight_segments import add_segment_arguments, segment_window
+from tools.compressed_logs import log_exists, log_extension
+
+SIGNAL_TOPICS = ['vehicle_local_position_setpoint', 'input_rc', 'radio_status']
 
 def compute_range(x, y, z):
     return math.sqrt(x**2 + y**2 + z**2)
 
-def parse_ulg_log(filepath):
+@timed_stage
+def parse_ulg_log(filepath, start=None, end=None):
     try:
-        ulog = ULog(filepath)
+        with stage("parse_ulog"):
+            ulog = load_ulog(filepath, start, end, SIGNAL_TOPICS)  # ✅ Window decoded only
     except Exception as e:
         return None, None, None, f"❌ Failed to parse .ulg file: {e}"
+    return range_signal_from_ulog(ulog)
 
+def range_signal_from_ulog(ulog):
+    """parse_ulg_log() for an already loaded ULog / UlgWindow."""
     def extract(msg_name, field):
         msg = next((m for m in ulog.data_list if m.name == msg_name), None)
         return msg.data[field] if msg and field in msg.data else []
@@ -40,7 +53,10 @@ def parse_ulg_log(filepath):
 
     return range_ctrl_rssi, range_ctrl_lq, range_telem_rssi, None
 
+@timed_stage
 def generate_range_signal_chart(ctrl_rssi, ctrl_lq, telem_rssi):
+    import matplotlib.pyplot as plt  # ✅ Deferred until a chart is actually drawn
+
     fig, ax1 = plt.subplots(figsize=(14, 6))
     ax2 = ax1.twinx()
     ax3 = None
@@ -70,6 +86,10 @@ def generate_range_signal_chart(ctrl_rssi, ctrl_lq, telem_rssi):
     fig.tight_layout()
     return fig
 
+def close_chart(fig):
+    import matplotlib.pyplot as plt
+    plt.close(fig)
+
 def open_image(path):
     try:
         abs_path = os.path.abspath(path)
@@ -91,13 +111,13 @@ def get_temp_chart_path(logfile_path, script_name):
 
 def validate_input_file(path_str):
     path = Path(path_str)
-    if not path.exists():
+    if not log_exists(path_str):
         return None, f"❌ Error: File '{path}' does not exist."
-    if path.suffix.lower() != ".ulg":
+    if log_extension(path_str) != ".ulg":
         return None, f"❌ Error: Expected a .ulg file, but got '{path.suffix}'"
     return path, None
 
-def flask_entry(input_path):
+def flask_entry(input_path, start=None, end=None):
     import matplotlib
     matplotlib.use("Agg")  # ✅ Use non-GUI backend for Flask
 
@@ -107,7 +127,7 @@ def flask_entry(input_path):
     if error:
         return {'error': error}
 
-    ctrl_rssi, ctrl_lq, telem_rssi, parse_error = parse_ulg_log(str(path))
+    ctrl_rssi, ctrl_lq, telem_rssi, parse_error = parse_ulg_log(str(path), start, end)
     if parse_error:
         return {'error': parse_error}
     if not (ctrl_rssi or ctrl_lq or telem_rssi):
@@ -115,16 +135,21 @@ def flask_entry(input_path):
 
     fig = generate_range_signal_chart(ctrl_rssi, ctrl_lq, telem_rssi)
     buffer = BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-    plt.close()  # ✅ Clean up figure after saving
+    with stage("savefig"):
+        fig.savefig(buffer, format='png')
+    with stage("encode"):
+        buffer.seek(0)
+        image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
+    close_chart(fig)  # ✅ Clean up figure after saving
 
     result = {'figure': f'<img src="data:image/png;base64,{image_base64}"/>'}
     print("[DEBUG] Chart image generated and encoded successfully.")
     return result
 
 if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
     import matplotlib
     matplotlib.use("Agg")  # ✅ Use non-GUI backend for CLI mode
 
@@ -133,37 +158,49 @@ if __name__ == "__main__":
     parser.add_argument("--output", help="Path to save PNG plot")
     parser.add_argument("--nogui", action="store_true", help="Suppress GUI display")
     parser.add_argument("--view", action="store_true", help="Open chart after saving")
+    add_time_window_arguments(parser)
+    add_segment_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
-
-    path, error = validate_input_file(args.input_file)
-    if error:
-        print(error)
-        exit(1)
-
-    ctrl_rssi, ctrl_lq, telem_rssi, parse_error = parse_ulg_log(str(path))
-    if parse_error:
-        print(parse_error)
-        exit(1)
-    if not (ctrl_rssi or ctrl_lq or telem_rssi):
-        print("❌ No valid signal data found in log.")
-        exit(0)
-
-    fig = generate_range_signal_chart(ctrl_rssi, ctrl_lq, telem_rssi)
-
-    if args.output:
-        output_path = args.output
-        if not output_path.lower().endswith(".png"):
-            output_path += ".png"
-        output_path = os.path.abspath(output_path)
-    elif args.nogui:
-        print("❌ Headless mode requires --output to save chart.")
-        exit(1)
-    else:
-        output_path = get_temp_chart_path(args.input_file, __file__)
-
-    fig.savefig(output_path)
-    print(f"✅ Chart saved to: {output_path}")
-    plt.close()  # ✅ Clean up figure after saving
-
-    if not args.nogui and (not args.output or args.view):
-        open_image(output_path)
+    check_time_window_args(parser, args)
+
+    with profile_session(args):
+        path, error = validate_input_file(args.input_file)
+        if error:
+            print(error)
+            exit(1)
+
+        try:
+            start, end = segment_window(str(path), args.segment, args.start, args.end)  # ✅ Decode only this part
+        except ValueError as e:
+            print(f"❌ {e}")
+            exit(1)
+
+        ctrl_rssi, ctrl_lq, telem_rssi, parse_error = parse_ulg_log(str(path), start, end)
+        if parse_error:
+            print(parse_error)
+            exit(1)
+        if not (ctrl_rssi or ctrl_lq or telem_rssi):
+            print("❌ No valid signal data found in log.")
+            exit(0)
+
+        fig = generate_range_signal_chart(ctrl_rssi, ctrl_lq, telem_rssi)
+
+        if args.output:
+            output_path = args.output
+            if not output_path.lower().endswith(".png"):
+                output_path += ".png"
+            output_path = os.path.abspath(output_path)
+        elif args.nogui:
+            print("❌ Headless mode requires --output to save chart.")
+            exit(1)
+        else:
+            output_path = get_temp_chart_path(args.input_file, __file__)
+
+        with stage("savefig"):
+            fig.savefig(output_path)
+        print(f"✅ Chart saved to: {output_path}")
+        close_chart(fig)  # ✅ Clean up figure after saving
+
+        if not args.nogui and (not args.output or args.view):
+            open_image(output_path)
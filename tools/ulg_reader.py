@@ -0,0 +1,297 @@
+"""
+ulg_reader.py
+NumPy reader for PX4 .ulg logs, used by the tools in place of pyulog.ULog.
+
+The log is memory-mapped (a compressed one through its decompressed copy on disk, see
+compressed_logs.py) and walked once, header by header, only to note where every message starts;
+a corrupt header is skipped up to the next valid one, as pyulog recovers. The few non-data
+messages (formats, subscriptions, parameters, info) are then parsed with pyulog's own message classes, so field names and dtypes match ULog exactly, and each
+topic's data messages are gathered into one structured array with a single vectorized copy
+instead of being parsed one by one.
+
+read_ulog() keeps the part of ULog the tools use: data_list, get_dataset(), start_timestamp,
+last_timestamp, message_formats, initial_parameters, changed_parameters and msg_info_dict.
+scan_ulog() is the header-only variant for summaries: message counts and the time span,
+in constant memory.
+"""
+
+import array
+import struct
+
+from tools.compressed_logs import log_buffer
+from tools.decode_cache import cached
+
+ULG_HEADER_MAGIC = b'ULog\x01\x12\x35'
+ULG_HEADER_SIZE = 16
+ULG_MSG_HEADER = struct.Struct('<HB')
+ULG_DATA_HEADER = struct.Struct('<HBH')  # message header + msg_id
+UINT64 = struct.Struct('<Q')
+
+MSG_DATA = 0x44  # 'D'
+MSG_FORMAT = 0x46  # 'F'
+MSG_ADD_LOGGED = 0x41  # 'A'
+MSG_PARAMETER = 0x50  # 'P'
+MSG_INFO = 0x49  # 'I'
+MSG_LOGGING = (0x4C, 0x43)  # 'L' / 'C'
+MSG_TYPES = frozenset(b'ABCDFILMOPQRS')  # every message type pyulog knows
+SYNC_BYTES = b'\x2F\x73\x13\x20\x25\x0C\xBB\x12'  # payload of the sync messages written for recovery
+
+class UlgDataset:
+    """One topic instance, with the attributes of pyulog.ULog.Data."""
+
+    def __init__(self, subscription, values):
+        self.multi_id = subscription.multi_id
+        self.msg_id = subscription.msg_id
+        self.name = subscription.message_name
+        self.field_data = subscription.field_data
+        self.timestamp_idx = subscription.timestamp_idx
+        self.data = {name: values[name] for name in values.dtype.names}
+
+class UlgLog:
+    """
+    The part of pyulog.ULog the tools use (data_list, get_dataset, timestamps, formats,
+    parameters, info).
+    """
+
+    def __init__(self, start_timestamp, message_formats, data_list, last_timestamp,
+                 initial_parameters=None, changed_parameters=None, msg_info_dict=None):
+        self.start_timestamp = start_timestamp
+        self.last_timestamp = last_timestamp
+        self.message_formats = message_formats
+        self.data_list = data_list
+        self.initial_parameters = initial_parameters or {}
+        self.changed_parameters = changed_parameters or []
+        self.msg_info_dict = msg_info_dict or {}
+
+    def get_dataset(self, name, multi_instance=0):
+        """Same semantics as ULog.get_dataset(); raises IndexError if not found."""
+        return [elem for elem in self.data_list
+                if elem.name == name and elem.multi_id == multi_instance][0]
+
+def _is_header(data, pos, size):
+    """True if a plausible message starts at pos: a known type, a size that fits, and a plausible next header."""
+    unpack = ULG_MSG_HEADER.unpack_from
+    for _ in range(2):
+        if size - pos < 3:
+            return size == pos
+        msg_size, msg_type = unpack(data, pos)
+        pos += 3 + msg_size
+        if msg_type not in MSG_TYPES or not msg_size or pos > size:
+            return False
+    return True
+
+def _resync(data, pos, size, state):
+    """
+    Offset of the next valid message header at or after pos, after a corrupt one: just past the
+    next sync sequence when the log has them (as pyulog recovers), else found byte by byte.
+    """
+    if state['sync']:
+        found = data.find(SYNC_BYTES, pos)
+        if found >= 0:
+            return found + len(SYNC_BYTES)
+        state['sync'] = False  # ✅ None left: the byte-by-byte scan from here on
+    while size - pos >= 3 and not _is_header(data, pos, size):
+        pos += 1
+    return pos
+
+def _iter_message_offsets(data):
+    """
+    Offset of every complete message after the file header, in log order. A header with an unknown
+    type or an empty size is corrupt: the walk resumes at the next valid header (see _resync())
+    instead of following garbage lengths to the end of the log.
+    """
+    unpack = ULG_MSG_HEADER.unpack_from
+    size = len(data)
+    pos = ULG_HEADER_SIZE
+    state = {'sync': True}
+    while size - pos >= 3:
+        msg_size, msg_type = unpack(data, pos)
+        if msg_type in MSG_TYPES and msg_size:
+            end = pos + 3 + msg_size
+            if end > size:
+                break  # truncated final message
+            yield pos
+            pos = end
+        else:
+            pos = _resync(data, pos + 1, size, state)
+
+def _message_offsets(data):
+    """Offset of every complete message after the file header, in log order (see _iter_message_offsets())."""
+    return array.array('Q', _iter_message_offsets(data))
+
+def _ulog_bytes(ulog):
+    return sum(values.nbytes for dataset in ulog.data_list for values in dataset.data.values())
+
+def read_ulog(filepath, start=None, end=None, message_name_filter_list=None):
+    """
+    Decode a .ulg log, optionally only the data messages of the named topics and/or with a
+    timestamp in [start, end] (seconds since boot). Raises ValueError for a file that is not a ULog.
+    A warm process keeps the result for the next caller (see decode_cache.py).
+    """
+    topics = None if message_name_filter_list is None else tuple(sorted(message_name_filter_list))
+    return cached('ulg', filepath, (start, end, topics),
+                  lambda: _read_ulog(filepath, start, end, message_name_filter_list), _ulog_bytes)
+
+def _read_ulog(filepath, start=None, end=None, message_name_filter_list=None):
+    import numpy as np
+    from numpy.lib.stride_tricks import as_strided
+    from pyulog import ULog
+
+    start_us = 0 if start is None else int(start * 1e6)
+    end_us = None if end is None else int(end * 1e6)
+    wanted = set(message_name_filter_list) if message_name_filter_list is not None else None
+
+    with log_buffer(filepath) as data:
+        buf = None
+        try:
+            if len(data) < ULG_HEADER_SIZE or data[:7] != ULG_HEADER_MAGIC:
+                raise ValueError("Invalid file format (Failed to parse header)")
+            start_timestamp = UINT64.unpack_from(data, 8)[0]
+
+            buf = np.frombuffer(data, dtype=np.uint8)
+            offsets = np.frombuffer(_message_offsets(data), dtype=np.uint64).astype(np.int64)
+            types = buf[offsets + 2]
+            is_data = types == MSG_DATA
+
+            # ✅ Only the definitions, parameters and info are parsed message by message
+            formats = {}
+            subscriptions = {}
+            initial_parameters = {}
+            parameter_changes = []  # (offset, name, value), stamped below
+            msg_info = {}
+            in_definitions = True
+            sizes = buf[offsets + 1].astype(np.int64) << 8 | buf[offsets]
+            for pos, msg_type, msg_size in zip(offsets[~is_data].tolist(), types[~is_data].tolist(),
+                                               sizes[~is_data].tolist()):
+                body = data[pos + 3:pos + 3 + msg_size]
+                if msg_type == MSG_FORMAT:
+                    msg_format = ULog.MessageFormat(body, None)
+                    formats[msg_format.name] = msg_format
+                elif msg_type == MSG_ADD_LOGGED:
+                    in_definitions = False
+                    sub = ULog._MessageAddLogged(body, None, formats)
+                    subscriptions[sub.msg_id] = sub
+                elif msg_type == MSG_PARAMETER:
+                    param = ULog._MessageInfo(body, None)
+                    if in_definitions:
+                        initial_parameters[param.key] = param.value
+                    else:
+                        parameter_changes.append((pos, param.key, param.value))
+                elif msg_type == MSG_INFO:
+                    info = ULog._MessageInfo(body, None)
+                    msg_info[info.key] = info.value
+                elif msg_type in MSG_LOGGING:
+                    in_definitions = False
+
+            # Data messages grouped by msg_id, each group still in log order
+            data_offsets = offsets[is_data]
+            data_sizes = sizes[is_data] - 2
+            msg_ids = buf[data_offsets + 4].astype(np.int64) << 8 | buf[data_offsets + 3]
+            order = np.argsort(msg_ids, kind='stable')
+            ids, first = np.unique(msg_ids[order], return_index=True)
+            groups = dict(zip(ids.tolist(), np.split(order, first[1:])))
+
+            def gather(body_offsets, width):
+                """(len(body_offsets), width) uint8 copy of the bytes at each offset: one strided fancy-index copy."""
+                windows = as_strided(buf, shape=(len(buf) - width + 1, width), strides=(1, 1), writeable=False)
+                return windows[body_offsets]
+
+            data_list = []
+            last_timestamp = start_timestamp
+            clocks = []
+            for msg_id, index in groups.items():
+                sub = subscriptions.get(msg_id)
+                skipped = wanted is not None and sub is not None and sub.message_name not in wanted
+                if sub is None or (skipped and not parameter_changes):
+                    continue
+                item_size = sub.dtype.itemsize
+                keep = (data_sizes[index] >= item_size) & (data_sizes[index] <= sub.max_data_size)  # ✅ Corrupt ones skipped, as pyulog does
+                body_offsets = data_offsets[index[keep]] + 5
+                if not len(body_offsets):
+                    continue
+                timestamps = gather(body_offsets + sub.timestamp_offset, 8).view('<u8')[:, 0]
+                if parameter_changes:
+                    clocks.append((data_offsets[index[keep]], np.maximum.accumulate(timestamps)))
+                if skipped:
+                    continue  # ✅ Only its timestamps were needed, to stamp parameter changes
+                in_window = timestamps >= start_us
+                if end_us is not None:
+                    in_window &= timestamps <= end_us
+                if not in_window.all():
+                    body_offsets, timestamps = body_offsets[in_window], timestamps[in_window]
+                    if not len(body_offsets):
+                        continue
+                values = gather(body_offsets, item_size).view(sub.dtype)[:, 0]
+                data_list.append(UlgDataset(sub, values))
+                last_timestamp = max(last_timestamp, int(timestamps.max()))
+
+            # Changes are stamped like pyulog, with the latest data timestamp before them
+            changed_parameters = []
+            if parameter_changes:
+                positions = np.array([pos for pos, _, _ in parameter_changes], dtype=np.int64)
+                stamps = np.full(len(positions), start_timestamp, dtype=np.uint64)
+                for topic_offsets, running_max in clocks:
+                    before = np.searchsorted(topic_offsets, positions)
+                    seen = before > 0
+                    stamps[seen] = np.maximum(stamps[seen], running_max[before[seen] - 1])
+                changed_parameters = [(stamp, name, value) for stamp, (_, name, value)
+                                      in zip(stamps.tolist(), parameter_changes)]
+        finally:
+            buf = None  # ✅ Release the NumPy view before the memory map closes
+
+    data_list.sort(key=lambda ds: (ds.name, ds.multi_id))
+    return UlgLog(start_timestamp, formats, data_list, last_timestamp,
+                  initial_parameters, changed_parameters, msg_info)
+
+def scan_ulog(filepath):
+    """
+    {'start_timestamp', 'last_timestamp', 'message_counts': {topic: data messages}} from the
+    message headers alone: data messages are counted per msg_id, and only the last one of each
+    topic is decoded, for its timestamp. Raises ValueError for a file that is not a ULog.
+    """
+    from pyulog import ULog
+
+    with log_buffer(filepath) as data:
+        if len(data) < ULG_HEADER_SIZE or data[:7] != ULG_HEADER_MAGIC:
+            raise ValueError("Invalid file format (Failed to parse header)")
+        start_timestamp = UINT64.unpack_from(data, 8)[0]
+
+        formats = {}
+        subscriptions = {}
+        counts = {}
+        last_offsets = {}
+        unpack = ULG_DATA_HEADER.unpack_from
+        size = len(data)
+        for pos in _iter_message_offsets(data):
+            if size - pos < 5:
+                continue
+            msg_size, msg_type, msg_id = unpack(data, pos)
+            body = pos + 3
+            pos = body + msg_size
+            if msg_type == MSG_DATA:
+                counts[msg_id] = counts.get(msg_id, 0) + 1
+                last_offsets[msg_id] = body
+            elif msg_type == MSG_FORMAT:
+                msg_format = ULog.MessageFormat(data[body:pos], None)
+                formats[msg_format.name] = msg_format
+            elif msg_type == MSG_ADD_LOGGED:
+                sub = ULog._MessageAddLogged(data[body:pos], None, formats)
+                subscriptions[sub.msg_id] = sub
+
+        message_counts = {}
+        last_timestamp = start_timestamp
+        for msg_id, count in counts.items():
+            sub = subscriptions.get(msg_id)
+            if sub is None:
+                continue
+            name = sub.message_name
+            message_counts[name] = message_counts.get(name, 0) + count
+            body = last_offsets[msg_id]
+            if body + 2 + sub.timestamp_offset + 8 <= size:
+                last_timestamp = max(last_timestamp, UINT64.unpack_from(data, body + 2 + sub.timestamp_offset)[0])
+
+    return {
+        'start_timestamp': start_timestamp,
+        'last_timestamp': last_timestamp,
+        'message_counts': dict(sorted(message_counts.items())),
+    }
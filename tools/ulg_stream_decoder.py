@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+ulg_stream_decoder.py
+Incremental PX4 .ulg decoder that accepts the log as a sequence of byte chunks.
+Used by the webapp to decode uploads while they are still arriving; it produces the same summary
+as ulg_info.py plus the parameters ulg_parameter_list.py reports, without needing the whole file.
+Only message framing, timestamps and parameters are decoded; topic payloads are skipped.
+"""
+
+import os
+import sys
+import struct
+import argparse
+
+# ✅ Enables CLI execution from tools/ by patching sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.profiling import timed_stage, add_profile_arguments, profile_session
+from tools.compressed_logs import log_exists, iter_log_chunks
+
+HEADER_MAGIC = b'ULog\x01\x12\x35'
+HEADER_SIZE = 16
+MSG_HEADER = struct.Struct('<HB')
+UINT64 = struct.Struct('<Q')
+UINT16 = struct.Struct('<H')
+
+# ULog basic types -> (struct code, size), as in pyulog
+BASIC_TYPES = {
+    'int8_t': ('b', 1), 'uint8_t': ('B', 1), 'int16_t': ('h', 2), 'uint16_t': ('H', 2),
+    'int32_t': ('i', 4), 'uint32_t': ('I', 4), 'int64_t': ('q', 8), 'uint64_t': ('Q', 8),
+    'float': ('f', 4), 'double': ('d', 8), 'bool': ('?', 1), 'char': ('c', 1),
+}
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+def _split_type(type_str):
+    """'float[4]' -> ('float', 4); 'uint8_t' -> ('uint8_t', 1)"""
+    if '[' in type_str:
+        base, count = type_str[:-1].split('[')
+        return base, int(count)
+    return type_str, 1
+
+class _Subscription:
+    __slots__ = ('name', 'multi_id', 'min_size', 'timestamp_offset', 'count')
+
+    def __init__(self, name, multi_id, min_size, timestamp_offset):
+        self.name = name
+        self.multi_id = multi_id
+        self.min_size = min_size
+        self.timestamp_offset = timestamp_offset
+        self.count = 0
+
+class UlgStreamDecoder:
+    """
+    Feed .ulg bytes in any chunk sizes with feed(), then call finish() for the summary.
+    Parameters in the definitions section are the initial values; later ones are recorded
+    as (timestamp, name, value) changes, matching pyulog's changed_parameters.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.bytes_fed = 0
+        self.start_timestamp = None
+        self.last_timestamp = 0
+        self.initial_parameters = {}
+        self.changed_parameters = []
+        self.info = {}
+        self._formats = {}  # name -> [(type, array_len, field_name)]
+        self._sizes = {}
+        self._subscriptions = {}
+        self._in_definitions = True
+        self._buf = bytearray()
+        self._error = None
+
+    def feed(self, chunk):
+        self.bytes_fed += len(chunk)
+        if self._error:
+            return
+        buf = self._buf
+        buf += chunk
+        pos = 0
+        if self.start_timestamp is None:
+            if len(buf) < HEADER_SIZE:
+                return
+            if bytes(buf[:7]) != HEADER_MAGIC:
+                self._error = "Invalid file format (Failed to parse header)"
+                return
+            self.start_timestamp = UINT64.unpack_from(buf, 8)[0]
+            self.last_timestamp = self.start_timestamp
+            pos = HEADER_SIZE
+        pos = self._parse(buf, pos)
+        del buf[:pos]
+
+    def _parse(self, buf, pos):
+        end = len(buf)
+        subscriptions = self._subscriptions
+        while end - pos >= 3:
+            msg_size, msg_type = MSG_HEADER.unpack_from(buf, pos)
+            body = pos + 3
+            if end - body < msg_size:
+                break  # wait for the rest of this message
+
+            if msg_type == 0x44:  # 'D'
+                sub = subscriptions.get(UINT16.unpack_from(buf, body)[0])
+                if sub is not None and msg_size - 2 >= sub.min_size:
+                    sub.count += 1
+                    timestamp = UINT64.unpack_from(buf, body + 2 + sub.timestamp_offset)[0]
+                    if timestamp > self.last_timestamp:
+                        self.last_timestamp = timestamp
+            else:
+                self._handle(msg_type, bytes(buf[body:body + msg_size]))
+            pos = body + msg_size
+        return pos
+
+    def _handle(self, msg_type, data):
+        if msg_type == 0x46:  # 'F' format definition
+            name, fields = data.decode('utf-8', 'ignore').rstrip('\0').split(':', 1)
+            self._formats[name] = [(*_split_type(f.split(' ')[0]), f.split(' ')[1])
+                                   for f in fields.split(';') if f]
+        elif msg_type == 0x41:  # 'A' add logged message
+            self._in_definitions = False
+            multi_id = data[0]
+            msg_id = UINT16.unpack_from(data, 1)[0]
+            name = data[3:].decode('utf-8', 'ignore')
+            self._subscribe(msg_id, name, multi_id)
+        elif msg_type == 0x50:  # 'P' parameter
+            key, value = self._key_value(data)
+            if self._in_definitions:
+                self.initial_parameters[key] = value
+            else:
+                self.changed_parameters.append((self.last_timestamp, key, value))
+        elif msg_type == 0x49:  # 'I' info
+            key, value = self._key_value(data)
+            self.info[key] = value
+        elif msg_type in (0x4C, 0x43):  # 'L' / 'C' logging ends the definitions section
+            self._in_definitions = False
+
+    def _key_value(self, data):
+        key_len = data[0]
+        type_str, key = data[1:1 + key_len].decode('utf-8', 'ignore').split(' ', 1)
+        raw = data[1 + key_len:]
+        if type_str.startswith('char['):
+            return key, raw.decode('utf-8', 'ignore').rstrip('\0')
+        if type_str in BASIC_TYPES:
+            return key, struct.unpack('<' + BASIC_TYPES[type_str][0], raw)[0]
+        return key, raw
+
+    def _type_size(self, type_name):
+        if type_name in BASIC_TYPES:
+            return BASIC_TYPES[type_name][1]
+        if type_name not in self._sizes:
+            self._sizes[type_name] = sum(self._type_size(t) * n for t, n, _ in self._formats[type_name])
+        return self._sizes[type_name]
+
+    def _subscribe(self, msg_id, name, multi_id):
+        fields = self._formats.get(name)
+        if fields is None:
+            return
+        offset = 0
+        timestamp_offset = 0
+        for type_name, count, field_name in fields:
+            if field_name == 'timestamp':
+                timestamp_offset = offset
+            offset += self._type_size(type_name) * count
+        # Trailing padding may be dropped by the logger, as pyulog allows
+        while fields and fields[-1][2].startswith('_padding'):
+            offset -= self._type_size(fields[-1][0]) * fields[-1][1]
+            fields = fields[:-1]
+        self._subscriptions[msg_id] = _Subscription(name, multi_id, offset, timestamp_offset)
+
+    @timed_stage
+    def finish(self):
+        """Return the ulg_info-style summary plus 'parameters' for everything fed so far."""
+        if self._error:
+            return {'error': self._error}
+        if self.start_timestamp is None:
+            return {'error': "Invalid file format (Header too short)"}
+
+        with_data = [sub for sub in self._subscriptions.values() if sub.count]
+        duration = (self.last_timestamp - self.start_timestamp) / 1e6
+        return {
+            'filename': os.path.basename(self.filename) if self.filename else None,
+            'message_types': sorted(set(sub.name for sub in with_data)),
+            'total_messages': sum(sub.count for sub in with_data),
+            'log_duration': f"{duration:.2f} seconds",
+            'parameters': dict(sorted(self.initial_parameters.items())),
+        }
+
+@timed_stage
+def decode_ulg_file(filepath, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Run the stream decoder over a plain or compressed file on disk (CLI, benchmarking, compressed logs)."""
+    if not log_exists(filepath):
+        return {'error': f"File not found: {filepath}"}
+    try:
+        decoder = UlgStreamDecoder(filepath)
+        for chunk in iter_log_chunks(filepath, chunk_size):
+            decoder.feed(chunk)
+        return decoder.finish()
+    except Exception as e:
+        return {'error': str(e)}
+
+if __name__ == "__main__":
+    from tools.daemon import forward_to_daemon
+    forward_to_daemon(__file__)  # ✅ Runs in the warm daemon when one is listening
+
+    parser = argparse.ArgumentParser(description="Decode a PX4 .ulg log chunk by chunk")
+    parser.add_argument("input_file", help="Path to .ulg log file (or .ulg.gz / .ulg.xz / .ulg.zst / .zip)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Bytes fed per chunk")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with profile_session(args):
+        result = decode_ulg_file(args.input_file, chunk_size=args.chunk_size)
+    if 'error' in result:
+        print(f"❌ {result['error']}")
+        sys.exit(1)
+
+    print(f"📄 Log Summary for {result['filename']}")
+    print(f"Total Messages: {result['total_messages']}")
+    print(f"Log Duration: {result['log_duration']}")
+    print(f"Parameters: {len(result['parameters'])}")
+    print("Message Types:")
+    for msg_type in result['message_types']:
+        print(f"  - {msg_type}")
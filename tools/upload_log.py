@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+upload_log.py
+Upload a large log to the web app in verified chunks, several at a time, resuming where an
+interrupted upload stopped (see webapp/utils/chunked_upload.py for the protocol).
+
+The log's sha256 is computed first: a log the server already has is not sent again, and
+re-running the same command after a failure only sends the chunks the server is missing.
+The printed name can then be given to any upload form field in place of a file.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_SERVER = "http://localhost:5000"
+DEFAULT_CHUNK_MB = 8
+DEFAULT_JOBS = 4
+RETRIES = 5
+HASH_CHUNK_SIZE = 1 << 20
+
+def _call(method, url, body=None, headers=None, timeout=300):
+    """JSON reply of one request; raises RuntimeError with the server's error message."""
+    if isinstance(body, dict):
+        body = json.dumps(body).encode('utf-8')
+        headers = dict(headers or {}, **{'Content-Type': 'application/json'})
+    req = urllib.request.Request(url, data=body, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read()).get('error', e.reason)
+        except ValueError:
+            message = e.reason
+        raise RuntimeError(f"HTTP {e.code}: {message}") from None
+
+def file_sha256(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _send_chunk(api, filepath, status, index):
+    offset = index * status['chunk_size']
+    with open(filepath, 'rb') as f:
+        f.seek(offset)
+        data = f.read(status['chunk_size'])
+    headers = {'X-Chunk-SHA256': hashlib.sha256(data).hexdigest(), 'Content-Type': 'application/octet-stream'}
+    for attempt in range(RETRIES):
+        try:
+            return _call('PUT', f"{api}/{status['upload_id']}/chunks/{index}", data, headers)
+        except (OSError, RuntimeError) as e:
+            if attempt == RETRIES - 1:
+                raise
+            print(f"⚠️  Chunk {index}: {e}; retrying")
+            time.sleep(2 ** attempt)
+
+def upload_log(filepath, server=DEFAULT_SERVER, chunk_size=DEFAULT_CHUNK_MB << 20, jobs=DEFAULT_JOBS):
+    """Upload filepath in chunks; returns the server's completion reply or {'error': ...}."""
+    if not os.path.isfile(filepath):
+        return {'error': f"File not found: {filepath}"}
+    api = server.rstrip('/') + "/api/uploads"
+    try:
+        print(f"🔎 Hashing {os.path.basename(filepath)}...")
+        status = _call('POST', api, {'filename': os.path.basename(filepath), 'size': os.path.getsize(filepath),
+                                     'chunk_size': chunk_size, 'sha256': file_sha256(filepath)})
+        if status['complete']:
+            print("✅ The server already has this log; nothing to send")
+            return status
+
+        missing = status['missing']
+        if len(missing) < status['chunks']:
+            print(f"↩️  Resuming: {status['chunks'] - len(missing)} of {status['chunks']} chunks already received")
+        done = [0]
+        lock = threading.Lock()
+
+        def send(index):
+            _send_chunk(api, filepath, status, index)
+            with lock:
+                done[0] += 1
+                print(f"\r📤 {done[0]}/{len(missing)} chunks", end='', flush=True)
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:  # ✅ Chunks go up in parallel
+            list(pool.map(send, missing))
+        if missing:
+            print()
+        return _call('POST', f"{api}/{status['upload_id']}/complete")
+    except (OSError, RuntimeError) as e:
+        return {'error': str(e)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload a large log to the web app in resumable chunks")
+    parser.add_argument("input_file", help="Log to upload (.bin/.ulg, optionally .gz/.xz/.zst, or a .zip bundle)")
+    parser.add_argument("--server", default=DEFAULT_SERVER, help=f"Web app address (default: {DEFAULT_SERVER})")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_MB, help=f"Chunk size in MB (default: {DEFAULT_CHUNK_MB})")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS, help=f"Chunks sent at once (default: {DEFAULT_JOBS})")
+    args = parser.parse_args()
+
+    result = upload_log(args.input_file, args.server, args.chunk_size << 20, args.jobs)
+    if 'error' in result:
+        print(f"❌ {result['error']}")
+        print("   Run the same command again to resume.")
+        sys.exit(1)
+    print(f"✅ Uploaded as {result['filename']} (sha256 {result['sha256'][:12]})")
+    print(f"   Give '{result['filename']}' to any upload form field in place of the file.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+worker_pool.py
+Named process pools that live for the whole process, so the Flask app and the warm daemon pay
+worker start-up once rather than per request or per run.
+
+Workers come from a forkserver that has already imported the modules the jobs need (spawn where
+there is no forkserver), so they start quickly and do not inherit the parent's threads.
+run_isolated() runs one job in its own such process under a resident memory limit.
+Large NumPy arrays in pool jobs' arguments and in the results of pool and isolated jobs are
+handed over in shared memory (see shared_columns.py) rather than pickled through a pipe; arrays in
+results come back read-only.
+"""
+
+import os
+import sys
+import threading
+from contextlib import ExitStack
+
+RSS_POLL_SECONDS = 0.1
+
+_pools = {}
+_lock = threading.Lock()
+
+def _mp_context(preload):
+    import multiprocessing
+
+    try:
+        ctx = multiprocessing.get_context('forkserver')
+        ctx.set_forkserver_preload(list(preload))
+        return ctx
+    except ValueError:
+        return multiprocessing.get_context('spawn')  # ✅ No forkserver on Windows
+
+def get_pool(name, workers, initializer=None, preload=()):
+    """The process-wide pool called name, (re)created when the requested size changes."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _lock:
+        pool, size = _pools.get(name, (None, 0))
+        if pool is None or size != workers:
+            if pool is not None:
+                pool.shutdown(wait=False)
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context(preload),
+                                       initializer=initializer)
+            _pools[name] = (pool, workers)
+        return pool
+
+def discard_pool(name):
+    with _lock:
+        pool, _ = _pools.pop(name, (None, 0))
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+def _call_shared(func, args, result_path):
+    from tools.shared_columns import resolve_columns, export_columns
+
+    return export_columns(func(*resolve_columns(args)), result_path)
+
+def run_parallel(name, func, jobs, workers, initializer=None, preload=()):
+    """
+    {key: func(*args)} for jobs {key: args} on the named pool, or in-process when workers <= 1
+    or the pool cannot be started. func must be importable (module-level) and must not raise.
+    """
+    from concurrent.futures.process import BrokenProcessPool
+    from tools.shared_columns import share_columns, result_file, resolve_columns
+
+    if workers <= 1 or len(jobs) <= 1:
+        return {key: func(*args) for key, args in jobs.items()}
+    try:
+        pool = get_pool(name, workers, initializer, preload)
+        # ✅ Workers map the arrays, and write their results' arrays back; only descriptors are pickled
+        with share_columns(jobs) as shared, ExitStack() as results:
+            futures = {key: pool.submit(_call_shared, func, args, results.enter_context(result_file()))
+                       for key, args in shared.items()}
+            return {key: resolve_columns(future.result()) for key, future in futures.items()}
+    except (BrokenProcessPool, OSError) as e:
+        print(f"⚠️  {name} workers unavailable ({e}); running in-process", file=sys.stderr)
+        discard_pool(name)
+        return {key: func(*args) for key, args in jobs.items()}
+
+def _isolated_child(conn, func, args, result_path):
+    from tools.shared_columns import export_columns
+
+    try:
+        result = (True, export_columns(func(*args), result_path))
+    except Exception as e:
+        result = (False, e)
+    try:
+        conn.send(result)
+    except Exception as e:  # an unpicklable result or exception
+        conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+    conn.close()
+
+def _process_rss(pid):
+    with open(f'/proc/{pid}/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def can_limit_rss():
+    """True where a child's resident memory can be watched (Linux /proc)."""
+    try:
+        _process_rss(os.getpid())
+        return True
+    except (OSError, ValueError, AttributeError):
+        return False
+
+class MemoryLimitExceeded(MemoryError):
+    """An isolated job went over its resident memory limit and was killed."""
+
+def run_isolated(func, args, rss_limit, preload=()):
+    """
+    func(*args) in a fresh worker process that is killed as soon as its resident memory passes
+    rss_limit bytes (MemoryLimitExceeded), so one job cannot take the host down. Exceptions raised
+    by func are re-raised here. Runs in-process where memory cannot be watched.
+    """
+    from tools.shared_columns import result_file, resolve_columns
+
+    if not can_limit_rss():
+        return func(*args)
+    with result_file() as result_path:
+        ok, value = _run_child(_mp_context(preload), func, args, rss_limit, result_path)
+        if not ok:
+            raise value
+        return resolve_columns(value)  # ✅ Large arrays are mapped from the file the worker wrote
+
+def _run_child(ctx, func, args, rss_limit, result_path):
+    """(ok, result or exception) of _isolated_child() in a new process watched against rss_limit."""
+    receiver, sender = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_isolated_child, args=(sender, func, args, result_path), daemon=True)
+    process.start()
+    sender.close()
+    try:
+        while not receiver.poll(RSS_POLL_SECONDS):
+            if not process.is_alive():
+                raise RuntimeError(f"Worker process exited unexpectedly (code {process.exitcode})")
+            try:
+                rss = _process_rss(process.pid)
+            except (OSError, ValueError):
+                continue  # exiting
+            if rss > rss_limit:
+                process.kill()
+                raise MemoryLimitExceeded(f"Job stopped at {rss >> 20} MB, over its {rss_limit >> 20} MB memory limit")
+        try:
+            ok, value = receiver.recv()
+        except EOFError:
+            process.join()
+            raise RuntimeError(f"Worker process exited unexpectedly (code {process.exitcode})") from None
+    finally:
+        receiver.close()
+        if process.is_alive():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+        process.join()
+    return ok, value
@@ -1,15 +1,117 @@
 import os
-from flask import Flask
+import time
+import logging
+from flask import Flask, request, g, Response, jsonify
 from webapp.routes.bin_routes import bin_bp
 from webapp.routes.ulg_routes import ulg_bp  # ✅ Add this line
+from webapp.routes.metrics_routes import metrics_bp
+from webapp.routes.pyramid_routes import pyramid_bp
+from webapp.routes.chart_routes import chart_bp
+from webapp.routes.report_routes import report_bp
+from webapp.routes.upload_routes import upload_bp
+from webapp.routes.api_routes import api_bp
+from webapp.utils import metrics
+from webapp.utils.streaming_upload import StreamingRequest
+from webapp.utils.upload_store import start_janitor
+from webapp.utils.admission import AdmissionRejected
+from webapp.utils.compression import compress_response
+from tools.profiling import start_recording, stop_recording
+from tools.compressed_logs import log_extension
 
 app = Flask(__name__)
+app.request_class = StreamingRequest  # ✅ Decode uploads while they arrive
+app.logger.setLevel(logging.INFO)
 
 # Ensure the upload folder is correctly resolved
 app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), 'uploads')
+# ✅ Uploads are stored once per content and evicted least recently used beyond this
+app.config['UPLOAD_QUOTA_BYTES'] = int(os.environ.get('FLIGHT_TOOLS_UPLOAD_QUOTA_MB', 2048)) << 20
+# ✅ Largest log a chunked upload may announce (never more than the quota)
+if os.environ.get('FLIGHT_TOOLS_UPLOAD_MAX_MB'):
+    app.config['UPLOAD_MAX_BYTES'] = int(os.environ['FLIGHT_TOOLS_UPLOAD_MAX_MB']) << 20
+# ✅ Memory budget and concurrency for the jobs that hold a whole log in memory (per worker process)
+if os.environ.get('FLIGHT_TOOLS_MEMORY_BUDGET_MB'):
+    app.config['ADMISSION_MEMORY_BYTES'] = int(os.environ['FLIGHT_TOOLS_MEMORY_BUDGET_MB']) << 20
+app.config['ADMISSION_HEAVY_JOBS'] = int(os.environ.get('FLIGHT_TOOLS_HEAVY_JOBS', 2))
+app.config['ADMISSION_QUEUE_SECONDS'] = float(os.environ.get('FLIGHT_TOOLS_QUEUE_SECONDS', 30))
+# ✅ A compressed upload is decompressed once into the store (counted by its quota), not per job into /tmp;
+# set before any worker process starts, so they all inherit it
+os.environ.setdefault('FLIGHT_TOOLS_KEEP_DECOMPRESSED', '1')
 
 app.register_blueprint(bin_bp)
 app.register_blueprint(ulg_bp)  # ✅ Register the PX4 route
+app.register_blueprint(metrics_bp)
+app.register_blueprint(pyramid_bp)  # ✅ Zoom tiles for the explorers
+app.register_blueprint(chart_bp)  # ✅ Data for the interactive charts
+app.register_blueprint(report_bp)  # ✅ Full flight report
+app.register_blueprint(upload_bp)  # ✅ Resumable chunked uploads
+app.register_blueprint(api_bp)  # ✅ Versioned JSON API
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+def _log_type():
+    if request.blueprint == 'api_bp':
+        return request.view_args.get('log_type', 'other')
+    if request.blueprint in ('pyramid_bp', 'chart_bp'):
+        return log_extension(request.view_args.get('filename', ''))[1:] or 'other'
+    if request.blueprint == 'report_bp':
+        file = request.files.get('logfile')
+        return log_extension(file.filename if file else request.form.get('logfile', ''))[1:] or 'other'
+    return {'bin_bp': 'bin', 'ulg_bp': 'ulg'}.get(request.blueprint, 'other')
+
+# ✅ The upload janitor runs in each worker process that serves requests, started with its first one
+@app.before_request
+def ensure_upload_janitor():
+    start_janitor(app)
+
+# ✅ Per-request stage timings (same stages the CLI --profile flag reports)
+@app.before_request
+def start_stage_timing():
+    g.request_started = time.perf_counter()
+    metrics.REQUESTS_IN_PROGRESS.inc()
+    start_recording()
+
+# ✅ Request counts, latency and upload volume for /metrics
+@app.after_request
+def record_request_metrics(response):
+    if request.endpoint == 'metrics_bp.metrics':
+        return response
+    route = _route_label()
+    method = request.method
+    started = g.get('request_started', time.perf_counter())
+    metrics.HTTP_REQUESTS.inc(route=route, method=method, status=response.status_code)
+    # ✅ Observed once the body is sent: streamed pages are still rendering at this point
+    response.call_on_close(lambda: metrics.HTTP_LATENCY.observe(time.perf_counter() - started,
+                                                                route=route, method=method))
+    if request.method in ('POST', 'PUT') and request.content_length:
+        metrics.UPLOAD_BYTES.inc(request.content_length, route=route)
+    return response
+
+# ✅ gzip/brotli as the client accepts; streamed pages are compressed chunk by chunk
+app.after_request(compress_response)
+
+# ✅ Jobs turned away by admission control: 503 (retry later) or 413 (too large for this server)
+@app.errorhandler(AdmissionRejected)
+def admission_rejected(e):
+    if request.path.startswith('/api/'):
+        response = jsonify({'error': str(e)})
+        response.status_code = e.status
+    else:
+        response = Response(str(e), status=e.status, mimetype='text/plain')
+    if e.retry_after:
+        response.headers['Retry-After'] = str(max(1, round(e.retry_after)))
+    return response
+
+@app.teardown_request
+def log_stage_timing(exc):
+    recorder = stop_recording()
+    if 'request_started' in g:
+        metrics.REQUESTS_IN_PROGRESS.dec()
+    if recorder is None or not recorder.events:
+        return
+    metrics.observe_stages(_log_type(), recorder)
+    app.logger.info("%s %s\n%s", request.method, request.path, recorder.format_breakdown())
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,183 @@
+import os
+from flask import Blueprint, jsonify, request, current_app
+from werkzeug.utils import secure_filename
+from tools.bin_info import generate_bin_info
+from tools.ulg_info import generate_ulg_info
+from tools.bin_log_explorer import explore_bin_file
+from tools.ulg_log_explorer import explore_ulg_file
+from tools.bin_parameter_compare import compare_parameters as compare_bin_parameters
+from tools.ulg_parameter_compare import compare_parameters as compare_ulg_parameters
+from tools.parameter_sets import load_parameter_set
+from tools.flight_segments import load_segment_index
+from tools.chart_data import power_chart_data, range_signal_chart_data
+from tools.field_pyramid import TILE_SIZE
+from tools.log_index import load_log_index
+from tools.compressed_logs import log_extension
+from webapp.utils import metrics
+from webapp.utils.indexing import start_indexing, index_progress, explore, field_rows
+from webapp.utils.streaming_upload import save_upload, streamed_result, uploaded_file, decode_uploads
+from webapp.utils.form_utils import time_window_from_form, is_log_upload, uploaded_log_path
+
+# ✅ Versioned JSON API: the tool results behind the pages, without the HTML around them.
+# A log is named with ?log=<stored name> (GET) or uploaded in the 'file' form field (POST).
+api_bp = Blueprint('api_bp', __name__, url_prefix='/api/v1')
+
+LOG_TYPES = '<any(bin, ulg):log_type>'
+INFO = {'bin': generate_bin_info, 'ulg': generate_ulg_info}
+EXPLORERS = {'bin': explore_bin_file, 'ulg': explore_ulg_file}
+COMPARISONS = {'bin': (compare_bin_parameters, ('initial', 'final')),
+               'ulg': (compare_ulg_parameters, ('first', 'last'))}
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+@api_bp.errorhandler(ApiError)
+def api_error(e):
+    return jsonify({'error': str(e)}), e.status
+
+def _request_log(log_type, field='file', arg='log'):
+    """(stored path, upload or None) of the log a request names; raises ApiError."""
+    if request.method == 'POST':
+        upload = uploaded_file(field)
+        if not upload:
+            raise ApiError(f"No log uploaded in '{field}'")
+        if not is_log_upload(upload.filename, ('.' + log_type,)):
+            raise ApiError(f"Expected a .{log_type} log, got {upload.filename}")
+        filename = secure_filename(upload.filename)
+        filepath = save_upload(upload, os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
+    else:
+        upload = None
+        name = request.args.get(arg)
+        if not name:
+            raise ApiError(f"Name a stored log with ?{arg}=, or POST one as '{field}'")
+        filepath = uploaded_log_path(name)
+        if filepath is None:
+            raise ApiError(f"Unknown log: {name}", 404)
+    if log_extension(filepath) != '.' + log_type:
+        raise ApiError(f"{os.path.basename(filepath)} is not a .{log_type} log")
+    return filepath, upload
+
+def _window(filepath):
+    """(start, end) from start/end/segment in the query or form; raises ApiError."""
+    start, end, error = time_window_from_form(request.values, filepath)
+    if error:
+        raise ApiError(error)
+    return start, end
+
+def _result(result):
+    """A tool's result dict as the response, its {'error': ...} as a 422."""
+    if 'error' in result:
+        raise ApiError(result['error'], 422)
+    return jsonify(result)
+
+def _plain(value):
+    """A decoded field value JSON can carry (NumPy scalars, undecoded byte strings)."""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, bytes):
+        value = value.split(b'\0', 1)[0].decode('utf-8', 'replace')
+    return value
+
+# ✅ Message types, message count and duration (from the upload's streamed decode when there is one)
+@api_bp.route(f'/{LOG_TYPES}/info', methods=['GET', 'POST'])
+@decode_uploads
+def log_info(log_type):
+    filepath, upload = _request_log(log_type)
+    result = upload is not None and streamed_result(upload)
+    if result:
+        result = {key: value for key, value in result.items() if key != 'parameters'}
+    else:
+        result = INFO[log_type](filepath, mode="flask")
+    return _result(result)
+
+# ✅ Parameter values at the end of the log (?changes=1 adds the initial values and every change),
+# from the parameter cache beside the log
+@api_bp.route(f'/{LOG_TYPES}/parameters', methods=['GET', 'POST'])
+def log_parameters(log_type):
+    filepath, _ = _request_log(log_type)
+    entry = load_parameter_set(filepath)
+    if 'error' in entry:
+        raise ApiError(entry['error'], 422)
+    result = {key: entry[key] for key in ('filename', 'firmware', 'hash', 'parameters')}
+    if request.values.get('changes', type=int):
+        result.update(initial=entry['initial'], changes=entry['changes'])
+    return jsonify(result)
+
+# ✅ Two logs' parameters side by side: ?log1=&log2= (or files file1/file2), ?mode1=&mode2=
+@api_bp.route(f'/{LOG_TYPES}/compare', methods=['GET', 'POST'])
+def log_compare(log_type):
+    compare, modes = COMPARISONS[log_type]
+    path1, _ = _request_log(log_type, 'file1', 'log1')
+    path2, _ = _request_log(log_type, 'file2', 'log2')
+    mode1 = request.values.get('mode1', modes[1])
+    mode2 = request.values.get('mode2', modes[1])
+    if mode1 not in modes or mode2 not in modes:
+        raise ApiError(f"Modes are {' or '.join(modes)}")
+    return _result(compare(path1, path2, mode1=mode1, mode2=mode2))
+
+# ✅ Armed/mode segments and events, from the segment cache beside the log
+@api_bp.route(f'/{LOG_TYPES}/segments', methods=['GET', 'POST'])
+def log_segments(log_type):
+    filepath, _ = _request_log(log_type)
+    index = load_segment_index(filepath)
+    if 'error' in index:
+        raise ApiError(index['error'], 422)
+    return jsonify({key: index[key] for key in ('filename', 'log_type', 'segments', 'events')})
+
+def _chart(log_type, cache, build, **extra):
+    filepath, _ = _request_log(log_type)
+    start, end = _window(filepath)
+    points = request.values.get('points', TILE_SIZE, type=int)
+    try:
+        data, hit = build(filepath, start, end, points=points, **extra)
+    except ValueError as e:
+        raise ApiError(str(e), 422)
+    metrics.record_cache_lookup(cache, hit)
+    return jsonify(data)
+
+# ✅ Voltage, current and Wh, decimated to ?points= buckets (from the zoom pyramids)
+@api_bp.route(f'/{LOG_TYPES}/power', methods=['GET', 'POST'])
+def log_power(log_type):
+    return _chart(log_type, 'pyramid', power_chart_data)
+
+# ✅ Signal vs range points, thinned to ?points= columns of the ?xmin=&xmax= view
+@api_bp.route(f'/{LOG_TYPES}/range-signal', methods=['GET', 'POST'])
+def log_range_signal(log_type):
+    return _chart(log_type, 'range_signal', range_signal_chart_data,
+                  x_min=request.values.get('xmin', type=float),
+                  x_max=request.values.get('xmax', type=float))
+
+# ✅ The log's index (catalog, field statistics), 200 once built; while it is being built, 202
+# with its state, step and progress. Starts the build if nothing started it yet.
+@api_bp.route(f'/{LOG_TYPES}/index', methods=['GET', 'POST'])
+def log_index(log_type):
+    filepath, _ = _request_log(log_type)
+    index = load_log_index(filepath)
+    if index is not None:
+        return jsonify(index)
+    start_indexing(filepath)
+    status = index_progress(filepath)
+    if status['state'] == 'error':
+        raise ApiError(status['error'], 422)
+    return jsonify(dict(status, filename=os.path.basename(filepath))), 202
+
+# ✅ Explorer steps: message types; ?type= for its fields; ?type=&field= for the values.
+# Answered from the log's index when it is ready, else admitted against the memory budget like the explorer pages.
+@api_bp.route(f'/{LOG_TYPES}/explorer', methods=['GET', 'POST'])
+def log_explorer(log_type):
+    filepath, _ = _request_log(log_type)
+    start, end = _window(filepath)
+    msg_type = request.values.get('type') or None
+    field_name = (request.values.get('field') or None) if msg_type else None
+    result = explore(EXPLORERS[log_type], filepath, start, end, msg_type, field_name)
+    response = {'filename': os.path.basename(filepath), 'window_start': start, 'window_end': end}
+    if msg_type is None:
+        response['message_types'] = result
+    elif field_name is None:
+        response.update(type=msg_type, fields=[field['Field'] for field in result])
+    else:
+        response.update(type=msg_type, field=field_name,
+                        data=[[_plain(t), _plain(value)] for t, value in field_rows(result)])
+    return jsonify(response)
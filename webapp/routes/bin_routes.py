@@ -1,16 +1,16 @@
-from flask import Blueprint, request, render_template, current_app, redirect, url_for, flash
+from flask import Blueprint, request, render_template, stream_template, current_app, redirect, url_for, flash
 import os
 from werkzeug.utils import secure_filename
 from tools.bin_info import generate_bin_info
 from tools.bin_parameter_list import generate_parameter_list
 from tools.bin_range_signal import flask_entry as generate_range_chart
 from tools.bin_power_plot import flask_entry as generate_power_plot
-from tools.bin_log_explorer import (
-    parse_bin_file,
-    get_fields_from_bin,
-    extract_field_data_bin
-)
+from tools.bin_log_explorer import explore_bin_file
 from tools.bin_parameter_compare import compare_parameters
+from tools.log_index import load_log_index
+from webapp.utils.streaming_upload import save_upload, streamed_result, uploaded_file, decode_uploads
+from webapp.utils.form_utils import time_window_from_form, is_log_upload, uploaded_log_path
+from webapp.utils.indexing import start_indexing, explore, field_rows
 
 bin_bp = Blueprint('bin_bp', __name__)
 
@@ -18,29 +18,21 @@ bin_bp = Blueprint('bin_bp', __name__)
 def get_message_types(messages):
     return sorted(set(msg.get_type() for msg in messages if hasattr(msg, 'get_type')))
 
-def get_firmware_version(messages_by_type):
-    msg_list = messages_by_type.get('MSG', [])
-    for msg in msg_list:
-        try:
-            message = getattr(msg, 'Message', None) or getattr(msg, 'message', None)
-            if message and message.startswith('Ardu'):
-                return message
-        except Exception:
-            continue
-    return "Unknown version"
-
 @bin_bp.route('/bin-info', methods=['GET', 'POST'])
+@decode_uploads
 def bin_info():
     summary = None
     filename = None
     if request.method == 'POST':
-        file = request.files.get('file')
-        if file and file.filename.lower().endswith('.bin'):
+        file = uploaded_file('file')
+        if file and is_log_upload(file.filename, ('.bin',)):
             filename = secure_filename(file.filename)
             upload_dir = current_app.config['UPLOAD_FOLDER']
             filepath = os.path.join(upload_dir, filename)
-            file.save(filepath)
-            result = generate_bin_info(filepath, mode="flask")
+            filepath = save_upload(file, filepath)
+            start_indexing(filepath)  # ✅ The explorer and charts find this log prepared
+            # ✅ Decoded while the upload streamed in; re-parse only if that failed
+            result = streamed_result(file) or generate_bin_info(filepath, mode="flask")
             if 'error' in result:
                 print("❌ Error returned:", result['error'])
             else:
@@ -48,17 +40,22 @@ def bin_info():
     return render_template('bin_info.html', summary=summary, filename=filename)
 
 @bin_bp.route('/bin-parameter-list', methods=['GET', 'POST'])
+@decode_uploads
 def bin_parameter_list():
     if request.method == 'POST':
-        file = request.files.get('logfile')
+        file = uploaded_file('logfile')
         if not file:
             return render_template('bin_parameter_list.html', summary={'error': 'No file uploaded'})
         
         filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], file.filename)
-        file.save(filepath)
+        filepath = save_upload(file, filepath)
 
-        summary = generate_parameter_list(filepath, mode="flask")
-        return render_template('bin_parameter_list.html', summary=summary)
+        streamed = streamed_result(file)
+        if streamed and streamed['parameters']:
+            summary = {'filename': streamed['filename'], 'parameters': streamed['parameters']}
+        else:
+            summary = generate_parameter_list(filepath, mode="flask")
+        return stream_template('bin_parameter_list.html', summary=summary)  # ✅ Rows are sent as they render
 
     return render_template('bin_parameter_list.html')
 
@@ -67,16 +64,23 @@ def bin_range_signal():
     chart_data = None
     filename = None
     if request.method == 'POST':
-        file = request.files.get('logfile')
+        file = uploaded_file('logfile')
         if not file:
             return render_template('bin_range_signal.html', summary={'error': 'No file uploaded'})
 
         filename = secure_filename(file.filename)
         upload_dir = current_app.config['UPLOAD_FOLDER']
         filepath = os.path.join(upload_dir, filename)
-        file.save(filepath)
+        filepath = save_upload(file, filepath)
+
+        start, end, window_error = time_window_from_form(request.form, filepath)
+        if window_error:
+            return render_template('bin_range_signal.html', summary={'error': window_error})
+        if request.form.get('interactive'):  # ✅ The browser fetches decimated data; no matplotlib here
+            return render_template('bin_range_signal.html', interactive=True, filename=filename,
+                                   window_start=start, window_end=end)
 
-        result = generate_range_chart(filepath)
+        result = generate_range_chart(filepath, start, end)
         if 'error' in result:
             return render_template('bin_range_signal.html', summary={'error': result['error']})
         else:
@@ -89,16 +93,23 @@ def bin_power_plot():
     chart_data = None
     filename = None
     if request.method == 'POST':
-        file = request.files.get('logfile')
+        file = uploaded_file('logfile')
         if not file:
             return render_template('bin_power_plot.html', summary={'error': 'No file uploaded'})
 
         filename = secure_filename(file.filename)
         upload_dir = current_app.config['UPLOAD_FOLDER']
         filepath = os.path.join(upload_dir, filename)
-        file.save(filepath)
+        filepath = save_upload(file, filepath)
 
-        result = generate_power_plot(filepath)
+        start, end, window_error = time_window_from_form(request.form, filepath)
+        if window_error:
+            return render_template('bin_power_plot.html', summary={'error': window_error})
+        if request.form.get('interactive'):  # ✅ The browser fetches decimated data; no matplotlib here
+            return render_template('bin_power_plot.html', interactive=True, filename=filename,
+                                   window_start=start, window_end=end)
+
+        result = generate_power_plot(filepath, start, end)
         if 'error' in result:
             return render_template('bin_power_plot.html', summary={'error': result['error']})
         else:
@@ -120,44 +131,73 @@ def bin_log_explorer():
         filename = request.form.get('filename')
         msg_type = request.form.get('msg_type')
         field_name = request.form.get('field_name')
+        start, end, window_error = time_window_from_form(request.form)
+        if window_error:
+            return render_template('bin_log_explorer.html', error=window_error)
+        window = {'window_start': start, 'window_end': end}
 
         if not filename:
-            file = request.files.get('file')
-            if file and file.filename.lower().endswith('.bin'):
+            file = uploaded_file('file')
+            if file and is_log_upload(file.filename, ('.bin',)):
                 filename = secure_filename(file.filename)
                 filepath = os.path.join(upload_dir, filename)
-                file.save(filepath)
-                message_types, _ = parse_bin_file(filepath)
+                filepath = save_upload(file, filepath)
+                start, end, window_error = time_window_from_form(request.form, filepath)
+                if window_error:
+                    return render_template('bin_log_explorer.html', error=window_error)
+                window = {'window_start': start, 'window_end': end}
+                start_indexing(filepath)
+                if start is None and end is None and load_log_index(filepath) is None:
+                    # ✅ The page follows the index build and continues when it is ready
+                    return render_template('bin_log_explorer.html', filename=filename, indexing=True, **window)
+                message_types = explore(explore_bin_file, filepath, start, end)
                 return render_template('bin_log_explorer.html',
                                        filename=filename,
-                                       message_types=message_types)
+                                       message_types=message_types,
+                                       **window)
+
+        elif filename and not msg_type:
+            filepath = uploaded_log_path(filename)
+            if filepath is None:
+                return render_template('bin_log_explorer.html', error=f"Unknown log: {filename}")
+            message_types = explore(explore_bin_file, filepath, start, end)
+            return render_template('bin_log_explorer.html',
+                                   filename=filename,
+                                   message_types=message_types,
+                                   **window)
 
         elif filename and msg_type and not field_name:
-            filepath = os.path.join(upload_dir, filename)
-            _, messages_by_type = parse_bin_file(filepath)
-            fields = get_fields_from_bin(messages_by_type, msg_type)
+            filepath = uploaded_log_path(filename)
+            if filepath is None:
+                return render_template('bin_log_explorer.html', error=f"Unknown log: {filename}")
+            fields = explore(explore_bin_file, filepath, start, end, msg_type)
             return render_template('bin_log_explorer.html',
                                    filename=filename,
                                    selected_type=msg_type,
-                                   fields=fields)
+                                   fields=fields,
+                                   **window)
 
         elif filename and msg_type and field_name:
-            filepath = os.path.join(upload_dir, filename)
-            _, messages_by_type = parse_bin_file(filepath)
-            report_data = extract_field_data_bin(messages_by_type, msg_type, field_name)
-            return render_template('bin_log_explorer.html',
+            filepath = uploaded_log_path(filename)
+            if filepath is None:
+                return render_template('bin_log_explorer.html', error=f"Unknown log: {filename}")
+            # ✅ Admitted against the memory budget, then decoded in a memory-limited worker
+            report_data = explore(explore_bin_file, filepath, start, end, msg_type, field_name)
+            return stream_template('bin_log_explorer.html',  # ✅ Rows are sent as they render
                                    filename=filename,
                                    selected_type=msg_type,
                                    selected_field=field_name,
-                                   report_data=report_data)
+                                   report_data=report_data,
+                                   report_rows=field_rows(report_data),
+                                   **window)
 
     return render_template('bin_log_explorer.html')
 
 @bin_bp.route('/bin-parameter-compare', methods=['GET', 'POST'])
 def bin_parameter_compare():
     if request.method == 'POST':
-        file1 = request.files.get('logfile1')
-        file2 = request.files.get('logfile2')
+        file1 = uploaded_file('logfile1')
+        file2 = uploaded_file('logfile2')
         file1_mode = request.form.get('file1_mode', 'final')
         file2_mode = request.form.get('file2_mode', 'final')
 
@@ -170,20 +210,14 @@ def bin_parameter_compare():
         filename2 = secure_filename(file2.filename)
         path1 = os.path.join(upload_dir, filename1)
         path2 = os.path.join(upload_dir, filename2)
-        file1.save(path1)
-        file2.save(path2)
+        path1 = save_upload(file1, path1)
+        path2 = save_upload(file2, path2)
 
-        # Compare directly using file paths and modes
+        # ✅ One concurrent pass per file gives the parameters and the firmware versions
         summary = compare_parameters(path1, path2,
                                      mode1=file1_mode,
                                      mode2=file2_mode)
 
-        # Add firmware version info
-        _, messages_by_type1 = parse_bin_file(path1)
-        _, messages_by_type2 = parse_bin_file(path2)
-        summary['version1'] = get_firmware_version(messages_by_type1)
-        summary['version2'] = get_firmware_version(messages_by_type2)
-
-        return render_template('bin_parameter_compare.html', summary=summary)
+        return stream_template('bin_parameter_compare.html', summary=summary)
 
     return render_template('bin_parameter_compare.html')
@@ -0,0 +1,39 @@
+from flask import Blueprint, jsonify, request
+from tools.field_pyramid import TILE_SIZE
+from tools.time_window import parse_time_window
+from tools.chart_data import power_chart_data, range_signal_chart_data, field_chart_data
+from webapp.utils import metrics
+from webapp.utils.form_utils import uploaded_log_path
+
+chart_bp = Blueprint('chart_bp', __name__)
+
+def _chart_response(filename, cache, build, **extra):
+    """Run build(filepath, start, end, points=..., **extra) for an uploaded log and return its JSON."""
+    filepath = uploaded_log_path(filename)
+    if filepath is None:
+        return jsonify({'error': f"Unknown log: {filename}"}), 404
+    try:
+        start, end = parse_time_window(request.args.get('start'), request.args.get('end'))
+        points = request.args.get('points', TILE_SIZE, type=int)
+        data, hit = build(filepath, start, end, points=points, **extra)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    metrics.record_cache_lookup(cache, hit)
+    return jsonify(data)
+
+# ✅ Voltage, current and Wh buckets for the visible time range
+@chart_bp.route('/api/chart/<filename>/power')
+def power_chart(filename):
+    return _chart_response(filename, 'pyramid', power_chart_data)
+
+# ✅ Signal vs range points for the time window, thinned to the visible range (?xmin=&xmax=)
+@chart_bp.route('/api/chart/<filename>/range-signal')
+def range_signal_chart(filename):
+    return _chart_response(filename, 'range_signal', range_signal_chart_data,
+                           x_min=request.args.get('xmin', type=float),
+                           x_max=request.args.get('xmax', type=float))
+
+# ✅ One numeric field of the log explorer, from its message type's zoom pyramid
+@chart_bp.route('/api/chart/<filename>/field/<msg_type>/<field>')
+def field_chart(filename, msg_type, field):
+    return _chart_response(filename, 'pyramid', field_chart_data, msg_type=msg_type, field=field)
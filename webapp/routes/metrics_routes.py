@@ -0,0 +1,9 @@
+from flask import Blueprint, Response
+from webapp.utils.metrics import render_metrics
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+# ✅ Prometheus scrape target
+@metrics_bp.route('/metrics')
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,51 @@
+from flask import Blueprint, jsonify, request
+from tools.field_pyramid import TILE_SIZE, load_pyramid
+from tools.time_window import parse_time_window
+from webapp.utils import metrics
+from webapp.utils.form_utils import uploaded_log_path
+
+pyramid_bp = Blueprint('pyramid_bp', __name__)
+
+def _pyramid(filename, msg_type):
+    """(FieldPyramid, None) for an uploaded log, or (None, error response)."""
+    filepath = uploaded_log_path(filename)
+    if filepath is None:
+        return None, (jsonify({'error': f"Unknown log: {filename}"}), 404)
+    try:
+        pyramid, hit = load_pyramid(filepath, msg_type)
+    except ValueError as e:
+        return None, (jsonify({'error': str(e)}), 404)
+    metrics.record_cache_lookup('pyramid', hit)
+    return pyramid, None
+
+# ✅ Levels and fields of one message type (builds its pyramid on first use)
+@pyramid_bp.route('/api/pyramid/<filename>/<msg_type>')
+def pyramid_info(filename, msg_type):
+    pyramid, error = _pyramid(filename, msg_type)
+    if error:
+        return error
+    return jsonify(pyramid.describe())
+
+# ✅ One tile: TILE_SIZE buckets of one level
+@pyramid_bp.route('/api/pyramid/<filename>/<msg_type>/<field>/<int:level>/<int:tile>')
+def pyramid_tile(filename, msg_type, field, level, tile):
+    pyramid, error = _pyramid(filename, msg_type)
+    if error:
+        return error
+    try:
+        return jsonify(pyramid.tile(field, level, tile))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+
+# ✅ A time range at the finest level that fits in ?points= buckets
+@pyramid_bp.route('/api/pyramid/<filename>/<msg_type>/<field>/range')
+def pyramid_range(filename, msg_type, field):
+    pyramid, error = _pyramid(filename, msg_type)
+    if error:
+        return error
+    try:
+        start, end = parse_time_window(request.args.get('start'), request.args.get('end'))
+        points = request.args.get('points', TILE_SIZE, type=int)
+        return jsonify(pyramid.range(field, start, end, points))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
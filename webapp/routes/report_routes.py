@@ -0,0 +1,32 @@
+from flask import Blueprint, request, render_template, current_app, Response
+import os
+from werkzeug.utils import secure_filename
+from tools.flight_report import generate_flight_report
+from webapp.utils.streaming_upload import save_upload, uploaded_file
+from webapp.utils.form_utils import is_log_upload
+from webapp.utils.admission import run_job
+
+report_bp = Blueprint('report_bp', __name__)
+
+# ✅ One-page HTML report (summary, parameters and every chart) for a .bin or .ulg upload
+@report_bp.route('/flight-report', methods=['GET', 'POST'])
+def flight_report():
+    if request.method == 'POST':
+        file = uploaded_file('logfile')
+        if not file or not is_log_upload(file.filename):
+            return render_template('flight_report.html', summary={'error': 'Upload a .bin or .ulg log file'})
+
+        filename = secure_filename(file.filename)
+        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+        filepath = save_upload(file, filepath)
+
+        result = run_job('report', filepath, generate_flight_report, filepath)  # ✅ Waits for a heavy-job slot
+        if 'error' in result:
+            return render_template('flight_report.html', summary={'error': result['error']})
+
+        response = Response(result['html'], mimetype='text/html')
+        if request.form.get('download'):
+            response.headers['Content-Disposition'] = f'attachment; filename="{filename}_report.html"'
+        return response
+
+    return render_template('flight_report.html')
@@ -1,18 +1,19 @@
 from tools.ulg_parameter_compare import compare_parameters
 
-from flask import Blueprint, request, render_template, current_app
+from flask import Blueprint, request, render_template, stream_template, current_app
 import os
 from werkzeug.utils import secure_filename
+from webapp.utils.streaming_upload import save_upload, streamed_result, uploaded_file, decode_uploads
+from webapp.utils.form_utils import time_window_from_form, is_log_upload, uploaded_log_path
+from webapp.utils.admission import AdmissionRejected
+from webapp.utils.indexing import start_indexing, explore, field_rows
 
 from tools.ulg_power_plot import flask_entry as generate_power_plot
 from tools.ulg_info import generate_ulg_info
 from tools.ulg_parameter_list import generate_parameter_list
 from tools.ulg_range_signal import flask_entry as generate_range_signal
-from tools.ulg_log_explorer import (
-    parse_ulg_file,
-    get_fields_from_log,
-    extract_field_data
-)
+from tools.ulg_log_explorer import explore_ulg_file
+from tools.log_index import load_log_index
 
 ulg_bp = Blueprint('ulg_bp', __name__)
 
@@ -24,30 +25,30 @@ def ulg_parameter_compare():
     filename2 = None
 
     if request.method == 'POST':
-        file1 = request.files.get('logfile1')
-        file2 = request.files.get('logfile2')
+        file1 = uploaded_file('logfile1')
+        file2 = uploaded_file('logfile2')
         mode1 = request.form.get('file1_mode', 'last')
         mode2 = request.form.get('file2_mode', 'last')
 
         if not file1 or not file2:
             summary = {'error': 'Two .ulg files must be uploaded.'}
-        elif not file1.filename.lower().endswith('.ulg') or not file2.filename.lower().endswith('.ulg'):
+        elif not is_log_upload(file1.filename, ('.ulg',)) or not is_log_upload(file2.filename, ('.ulg',)):
             summary = {'error': 'Invalid file type. Please upload .ulg files only.'}
         else:
             upload_dir = current_app.config['UPLOAD_FOLDER']
 
             filename1 = secure_filename(file1.filename)
             filepath1 = os.path.join(upload_dir, filename1)
-            file1.save(filepath1)
+            filepath1 = save_upload(file1, filepath1)
 
             filename2 = secure_filename(file2.filename)
             filepath2 = os.path.join(upload_dir, filename2)
-            file2.save(filepath2)
+            filepath2 = save_upload(file2, filepath2)
 
             result = compare_parameters(filepath1, filepath2, mode1, mode2)
             summary = result
 
-    return render_template('ulg_parameter_compare.html',
+    return stream_template('ulg_parameter_compare.html',
                            summary=summary,
                            filename1=filename1,
                            filename2=filename2)
@@ -63,18 +64,22 @@ def ulg_power_plot():
     summary = None
 
     if request.method == 'POST':
-        file = request.files.get('file')
+        file = uploaded_file('file')
         if not file:
             summary = {'error': 'No file uploaded.'}
-        elif not file.filename.lower().endswith('.ulg'):
+        elif not is_log_upload(file.filename, ('.ulg',)):
             summary = {'error': 'Invalid file type. Please upload a .ULG file.'}
         else:
             filename = secure_filename(file.filename)
             upload_dir = current_app.config['UPLOAD_FOLDER']
             filepath = os.path.join(upload_dir, filename)
-            file.save(filepath)
+            filepath = save_upload(file, filepath)
 
-            result = generate_power_plot(filepath)
+            start, end, window_error = time_window_from_form(request.form, filepath)
+            if not window_error and request.form.get('interactive'):  # ✅ The browser fetches decimated data
+                return render_template('ulg_power_plot.html', interactive=True, filename=filename,
+                                       window_start=start, window_end=end)
+            result = {'error': window_error} if window_error else generate_power_plot(filepath, start, end)
             if 'error' in result:
                 summary = {'error': result['error']}
             elif not result.get("image_data"):
@@ -85,18 +90,21 @@ def ulg_power_plot():
     return render_template('ulg_power_plot.html', chart_data=chart_data, filename=filename, summary=summary)
 
 @ulg_bp.route('/ulg-info', methods=['GET', 'POST'])
+@decode_uploads
 def ulg_info():
     summary = None
     filename = None
     if request.method == 'POST':
-        file = request.files.get('file')
+        file = uploaded_file('file')
         if file:
             filename = secure_filename(file.filename)
-            if filename.lower().endswith('.ulg'):
+            if is_log_upload(filename, ('.ulg',)):
                 upload_dir = current_app.config['UPLOAD_FOLDER']
                 filepath = os.path.join(upload_dir, filename)
-                file.save(filepath)
-                result = generate_ulg_info(filepath)
+                filepath = save_upload(file, filepath)
+                start_indexing(filepath)  # ✅ The explorer and charts find this log prepared
+                # ✅ Decoded while the upload streamed in; re-parse only if that failed
+                result = streamed_result(file) or generate_ulg_info(filepath, mode="flask")
                 summary = result
             else:
                 summary = {'error': 'Invalid file type. Please upload a .ULG file.'}
@@ -105,17 +113,22 @@ def ulg_info():
     return render_template('ulg_info.html', summary=summary, filename=filename)
 
 @ulg_bp.route('/ulg-parameter-list', methods=['GET', 'POST'])
+@decode_uploads
 def ulg_parameter_list():
     if request.method == 'POST':
-        file = request.files.get('logfile')
+        file = uploaded_file('logfile')
         if not file:
             return render_template('ulg_parameter_list.html', summary={'error': 'No file uploaded'})
         
         filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], file.filename)
-        file.save(filepath)
+        filepath = save_upload(file, filepath)
 
-        summary = generate_parameter_list(filepath)
-        return render_template('ulg_parameter_list.html', summary=summary)
+        streamed = streamed_result(file)
+        if streamed and streamed['parameters']:
+            summary = {'filename': streamed['filename'], 'parameters': streamed['parameters']}
+        else:
+            summary = generate_parameter_list(filepath, mode="flask")
+        return stream_template('ulg_parameter_list.html', summary=summary)  # ✅ Rows are sent as they render
 
     return render_template('ulg_parameter_list.html')
 
@@ -124,16 +137,23 @@ def ulg_range_signal():
     chart_data = None
     filename = None
     if request.method == 'POST':
-        file = request.files.get('logfile')
+        file = uploaded_file('logfile')
         if not file:
             return render_template('ulg_range_signal.html', summary={'error': 'No file uploaded'})
 
         filename = secure_filename(file.filename)
         upload_dir = current_app.config['UPLOAD_FOLDER']
         filepath = os.path.join(upload_dir, filename)
-        file.save(filepath)
+        filepath = save_upload(file, filepath)
+
+        start, end, window_error = time_window_from_form(request.form, filepath)
+        if window_error:
+            return render_template('ulg_range_signal.html', summary={'error': window_error})
+        if request.form.get('interactive'):  # ✅ The browser fetches decimated data; no matplotlib here
+            return render_template('ulg_range_signal.html', interactive=True, filename=filename,
+                                   window_start=start, window_end=end)
 
-        result = generate_range_signal(filepath)
+        result = generate_range_signal(filepath, start, end)
         if 'error' in result:
             return render_template('ulg_range_signal.html', summary={'error': result['error']})
         else:
@@ -154,43 +174,78 @@ def ulg_log_explorer():
     upload_dir = current_app.config['UPLOAD_FOLDER']
 
     if request.method == 'POST':
-        file = request.files.get('file')
+        file = uploaded_file('file')
         filename = request.form.get('filename')
         selected_type = request.form.get('msg_type')
         selected_field = request.form.get('field_name')
+        start, end, window_error = time_window_from_form(request.form)
+        if window_error:
+            return render_template('ulg_log_explorer.html', error=window_error)
+        window = {'window_start': start, 'window_end': end}
 
         # Step 1: File upload
-        if file and file.filename.lower().endswith('.ulg'):
+        if file and is_log_upload(file.filename, ('.ulg',)):
             filename = secure_filename(file.filename)
             filepath = os.path.join(upload_dir, filename)
-            file.save(filepath)
+            filepath = save_upload(file, filepath)
+            start, end, window_error = time_window_from_form(request.form, filepath)
+            if window_error:
+                return render_template('ulg_log_explorer.html', error=window_error)
+            window = {'window_start': start, 'window_end': end}
+            start_indexing(filepath)
+            if start is None and end is None and load_log_index(filepath) is None:
+                # ✅ The page follows the index build and continues when it is ready
+                return render_template('ulg_log_explorer.html', filename=filename, indexing=True, **window)
             try:
-                ulog, message_types = parse_ulg_file(filepath)
+                message_types = explore(explore_ulg_file, filepath, start, end)
+            except AdmissionRejected:
+                raise
             except Exception as e:
                 error = f"❌ Failed to parse .ulg file: {e}"
                 return render_template('ulg_log_explorer.html', error=error)
-            return render_template('ulg_log_explorer.html', filename=filename, message_types=message_types)
+            return render_template('ulg_log_explorer.html', filename=filename, message_types=message_types, **window)
+
+        # Step 1 again: the log was indexed (or the user stopped waiting for it)
+        elif filename and not selected_type:
+            filepath = uploaded_log_path(filename)
+            if filepath is None:
+                return render_template('ulg_log_explorer.html', error=f"Unknown log: {filename}")
+            try:
+                message_types = explore(explore_ulg_file, filepath, start, end)
+            except AdmissionRejected:
+                raise
+            except Exception as e:
+                error = f"❌ Failed to parse .ulg file: {e}"
+                return render_template('ulg_log_explorer.html', error=error)
+            return render_template('ulg_log_explorer.html', filename=filename, message_types=message_types, **window)
 
         # Step 2: Message type selected
         elif filename and selected_type and not selected_field:
-            filepath = os.path.join(upload_dir, filename)
+            filepath = uploaded_log_path(filename)
+            if filepath is None:
+                return render_template('ulg_log_explorer.html', error=f"Unknown log: {filename}")
             try:
-                ulog, _ = parse_ulg_file(filepath)
-                fields = get_fields_from_log(ulog, selected_type)
+                fields = explore(explore_ulg_file, filepath, start, end, selected_type)
+            except AdmissionRejected:
+                raise
             except Exception as e:
                 error = f"❌ Failed to extract fields: {e}"
-            return render_template('ulg_log_explorer.html', filename=filename, selected_type=selected_type, fields=fields, error=error)
+            return render_template('ulg_log_explorer.html', filename=filename, selected_type=selected_type, fields=fields, error=error, **window)
 
         # Step 3: Field selected
         elif filename and selected_type and selected_field:
-            filepath = os.path.join(upload_dir, filename)
+            filepath = uploaded_log_path(filename)
+            if filepath is None:
+                return render_template('ulg_log_explorer.html', error=f"Unknown log: {filename}")
             try:
-                ulog, _ = parse_ulg_file(filepath)
-                report_data = extract_field_data(ulog, selected_type, selected_field)
-                if not report_data:
+                # ✅ Admitted against the memory budget, then decoded in a memory-limited worker
+                report_data = explore(explore_ulg_file, filepath, start, end, selected_type, selected_field)
+                if not len(report_data['time']):
                     error = "No data found for selected field."
+            except AdmissionRejected:
+                raise
             except Exception as e:
                 error = f"❌ Failed to extract data: {e}"
-            return render_template('ulg_log_explorer.html', filename=filename, selected_type=selected_type, selected_field=selected_field, report_data=report_data, error=error)
+            return stream_template('ulg_log_explorer.html', filename=filename, selected_type=selected_type, selected_field=selected_field, report_data=report_data, report_rows=report_data and field_rows(report_data), error=error, **window)  # ✅ Rows are sent as they render
 
     return render_template('ulg_log_explorer.html')
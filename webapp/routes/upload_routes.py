@@ -0,0 +1,46 @@
+from flask import Blueprint, jsonify, request, current_app
+from webapp.utils.upload_store import get_store
+from webapp.utils.chunked_upload import create_upload, upload_status, write_chunk, complete_upload
+
+upload_bp = Blueprint('upload_bp', __name__)
+
+def _error(e):
+    return jsonify({'error': str(e)}), 404 if isinstance(e, LookupError) else 400
+
+# ✅ Announce a log: {"filename", "size", "sha256"?, "chunk_size"?} -> upload_id and the missing chunks
+@upload_bp.route('/api/uploads', methods=['POST'])
+def start_upload():
+    body = request.get_json(silent=True) or {}
+    try:
+        status = create_upload(get_store(), body.get('filename'), body.get('size'),
+                               body.get('chunk_size'), body.get('sha256'),
+                               max_size=current_app.config.get('UPLOAD_MAX_BYTES'))
+    except (ValueError, LookupError) as e:
+        return _error(e)
+    return jsonify(status), 200 if status['complete'] else 201
+
+# ✅ Resume: which chunks the server still needs
+@upload_bp.route('/api/uploads/<upload_id>')
+def get_upload(upload_id):
+    try:
+        return jsonify(upload_status(get_store().root, upload_id))
+    except LookupError as e:
+        return _error(e)
+
+# ✅ One chunk, raw body, with X-Chunk-SHA256; any order, in parallel
+@upload_bp.route('/api/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def put_chunk(upload_id, index):
+    try:
+        result = write_chunk(get_store().root, upload_id, index, request.get_data(cache=False),
+                             request.headers.get('X-Chunk-SHA256'))
+    except (ValueError, LookupError) as e:
+        return _error(e)
+    return jsonify(result)
+
+# ✅ Assemble into the upload store; the form pages then take the returned filename
+@upload_bp.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def finish_upload(upload_id):
+    try:
+        return jsonify(complete_upload(get_store(), upload_id))
+    except (ValueError, LookupError) as e:
+        return _error(e)
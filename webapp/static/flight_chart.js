@@ -0,0 +1,374 @@
+/*
+ * flight_chart.js
+ * Small canvas chart for the interactive power and range-vs-signal pages.
+ * Data comes from /api/chart/<log>/...; pan (drag), zoom (wheel) and hover are local,
+ * and finer data is fetched once the view settles. Double-click resets the view.
+ */
+(function () {
+    'use strict';
+
+    const PAD = { left: 70, right: 70, top: 40, bottom: 50 };
+    const AXIS_GAP = 65;
+    const FETCH_DELAY_MS = 150;
+
+    function niceStep(span, count) {
+        const raw = span / Math.max(count, 1);
+        const mag = Math.pow(10, Math.floor(Math.log10(raw)));
+        const norm = raw / mag;
+        return (norm < 1.5 ? 1 : norm < 3 ? 2 : norm < 7 ? 5 : 10) * mag;
+    }
+
+    function ticks(min, max, count) {
+        if (!(max > min)) return [min];
+        const step = niceStep(max - min, count);
+        const out = [];
+        for (let v = Math.ceil(min / step) * step; v <= max + step * 1e-9; v += step) out.push(v);
+        return out;
+    }
+
+    function format(v) {
+        const a = Math.abs(v);
+        return a !== 0 && (a >= 1e5 || a < 1e-3) ? v.toExponential(2) : +v.toFixed(3) + '';
+    }
+
+    // Index of the first element >= x in a sorted array
+    function lowerBound(arr, x) {
+        let lo = 0, hi = arr.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (arr[mid] < x) lo = mid + 1; else hi = mid;
+        }
+        return lo;
+    }
+
+    class FlightChart {
+        /*
+         * options: url, title, series {key: {color}}, start/end (the page's time window),
+         * status (element for loading/error text).
+         */
+        constructor(canvas, options) {
+            this.canvas = canvas;
+            this.ctx = canvas.getContext('2d');
+            this.options = options;
+            this.data = null;
+            this.extent = null;
+            this.view = null;
+            this.hover = null;
+            this.drag = null;
+            this.requestId = 0;
+            this.timer = null;
+
+            canvas.addEventListener('wheel', (e) => this.onWheel(e), { passive: false });
+            canvas.addEventListener('mousedown', (e) => this.onMouseDown(e));
+            canvas.addEventListener('mousemove', (e) => this.onMouseMove(e));
+            canvas.addEventListener('mouseleave', () => { this.hover = null; this.drag = null; this.draw(); });
+            window.addEventListener('mouseup', () => this.onMouseUp());
+            canvas.addEventListener('dblclick', () => this.resetView());
+            window.addEventListener('resize', () => { this.resize(); this.scheduleFetch(); });
+            this.resize();
+            this.fetch();
+        }
+
+        resize() {
+            const ratio = window.devicePixelRatio || 1;
+            this.width = this.canvas.clientWidth;
+            this.height = this.canvas.clientHeight;
+            this.canvas.width = this.width * ratio;
+            this.canvas.height = this.height * ratio;
+            this.ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+            this.draw();
+        }
+
+        seriesKeys() {
+            if (!this.data) return [];
+            return Object.keys(this.options.series).filter((key) => key in this.data.series);
+        }
+
+        plot() {
+            const extraAxes = Math.max(this.seriesKeys().length - 2, 0);
+            const right = PAD.right + extraAxes * AXIS_GAP;
+            return { x: PAD.left, y: PAD.top, w: this.width - PAD.left - right, h: this.height - PAD.top - PAD.bottom };
+        }
+
+        setStatus(text) {
+            if (this.options.status) this.options.status.textContent = text || '';
+        }
+
+        // ---------------------------------------------------------------- data
+
+        fetch() {
+            const params = new URLSearchParams();
+            const kind = this.data ? this.data.kind : null;
+            const p = this.plot();
+            params.set('points', Math.max(Math.round(p.w), 1));
+            if (this.options.start != null) params.set('start', this.options.start);
+            if (this.options.end != null) params.set('end', this.options.end);
+            if (this.view && kind === 'time') {
+                params.set('start', this.view[0]);
+                params.set('end', this.view[1]);
+            } else if (this.view && kind === 'scatter') {
+                params.set('xmin', this.view[0]);
+                params.set('xmax', this.view[1]);
+            }
+
+            const id = ++this.requestId;
+            this.setStatus('Loading…');
+            fetch(this.options.url + '?' + params.toString())
+                .then((response) => response.json())
+                .then((data) => {
+                    if (id !== this.requestId) return;  // a newer view was requested meanwhile
+                    if (data.error) {
+                        this.setStatus('Error: ' + data.error);
+                        return;
+                    }
+                    this.data = data;
+                    if (!this.extent) {
+                        this.extent = data.extent;
+                        this.view = data.kind === 'time'
+                            ? [this.options.start != null ? this.options.start : data.extent[0],
+                               this.options.end != null ? this.options.end : data.extent[1]]
+                            : data.extent.slice();
+                        this.initialView = this.view.slice();
+                    }
+                    this.setStatus('');
+                    this.draw();
+                })
+                .catch((err) => { if (id === this.requestId) this.setStatus('Error: ' + err); });
+        }
+
+        scheduleFetch() {
+            clearTimeout(this.timer);
+            this.timer = setTimeout(() => this.fetch(), FETCH_DELAY_MS);
+        }
+
+        setView(lo, hi) {
+            const [min, max] = this.extent;
+            const span = Math.min(Math.max(hi - lo, (max - min) * 1e-6, 1e-6), max - min || 1);
+            lo = Math.min(Math.max(lo, min), max - span);
+            this.view = [lo, lo + span];
+            this.draw();
+            this.scheduleFetch();
+        }
+
+        resetView() {
+            if (!this.initialView) return;
+            this.setView(this.initialView[0], this.initialView[1]);
+        }
+
+        // ---------------------------------------------------------------- coordinates
+
+        toPx(x) {
+            const p = this.plot();
+            return p.x + (x - this.view[0]) / (this.view[1] - this.view[0]) * p.w;
+        }
+
+        fromPx(px) {
+            const p = this.plot();
+            return this.view[0] + (px - p.x) / p.w * (this.view[1] - this.view[0]);
+        }
+
+        // y range of a series over the visible x range
+        yRange(s) {
+            const time = this.data.kind === 'time';
+            const xs = time ? s.time : s.x;
+            const lows = time ? s.min : s.y;
+            const highs = time ? s.max : s.y;
+            let lo = Infinity, hi = -Infinity;
+            for (let i = 0; i < xs.length; i++) {
+                if (xs[i] < this.view[0] || xs[i] > this.view[1]) continue;
+                if (lows[i] < lo) lo = lows[i];
+                if (highs[i] > hi) hi = highs[i];
+            }
+            if (lo === Infinity) return [0, 1];
+            if (lo === hi) return [lo - 1, hi + 1];
+            const margin = (hi - lo) * 0.05;
+            return [lo - margin, hi + margin];
+        }
+
+        // ---------------------------------------------------------------- events
+
+        offsetX(e) {
+            return e.clientX - this.canvas.getBoundingClientRect().left;
+        }
+
+        onWheel(e) {
+            if (!this.view) return;
+            e.preventDefault();
+            const anchor = this.fromPx(this.offsetX(e));
+            const factor = Math.exp(e.deltaY * 0.002);
+            this.setView(anchor - (anchor - this.view[0]) * factor, anchor + (this.view[1] - anchor) * factor);
+        }
+
+        onMouseDown(e) {
+            if (!this.view) return;
+            this.drag = { px: this.offsetX(e), view: this.view.slice() };
+        }
+
+        onMouseMove(e) {
+            if (!this.view) return;
+            const px = this.offsetX(e);
+            if (this.drag) {
+                const shift = (px - this.drag.px) / this.plot().w * (this.drag.view[1] - this.drag.view[0]);
+                this.setView(this.drag.view[0] - shift, this.drag.view[1] - shift);
+                return;
+            }
+            const rect = this.canvas.getBoundingClientRect();
+            this.hover = { px: px, py: e.clientY - rect.top };
+            this.draw();
+        }
+
+        onMouseUp() {
+            this.drag = null;
+        }
+
+        // ---------------------------------------------------------------- drawing
+
+        draw() {
+            const ctx = this.ctx;
+            ctx.clearRect(0, 0, this.width, this.height);
+            if (!this.data || !this.view) return;
+            const p = this.plot();
+            const keys = this.seriesKeys();
+
+            ctx.font = '12px Arial, sans-serif';
+            ctx.fillStyle = '#000';
+            ctx.textAlign = 'center';
+            ctx.font = '16px Arial, sans-serif';
+            ctx.fillText(this.options.title || '', this.width / 2, 22);
+            ctx.font = '12px Arial, sans-serif';
+
+            // x axis and grid
+            ctx.strokeStyle = '#ddd';
+            ctx.lineWidth = 1;
+            for (const t of ticks(this.view[0], this.view[1], p.w / 90)) {
+                const x = this.toPx(t);
+                ctx.beginPath(); ctx.moveTo(x, p.y); ctx.lineTo(x, p.y + p.h); ctx.stroke();
+                ctx.fillText(format(t), x, p.y + p.h + 16);
+            }
+            ctx.fillText(this.data.x_label, p.x + p.w / 2, p.y + p.h + 36);
+            ctx.strokeStyle = '#888';
+            ctx.strokeRect(p.x, p.y, p.w, p.h);
+
+            const ranges = {};
+            keys.forEach((key, i) => {
+                const s = this.data.series[key];
+                const color = this.options.series[key].color;
+                const range = ranges[key] = this.yRange(s);
+                const toY = (v) => p.y + p.h - (v - range[0]) / (range[1] - range[0]) * p.h;
+                this.drawAxis(i, s.label, color, range, toY);
+
+                ctx.save();
+                ctx.beginPath(); ctx.rect(p.x, p.y, p.w, p.h); ctx.clip();
+                if (this.data.kind === 'time') this.drawBand(s, color, toY);
+                else this.drawPoints(s, color, toY);
+                ctx.restore();
+            });
+
+            this.drawHover(keys, ranges);
+        }
+
+        drawAxis(i, label, color, range, toY) {
+            const ctx = this.ctx;
+            const p = this.plot();
+            const left = i === 0;
+            const x = left ? p.x : p.x + p.w + (i - 1) * AXIS_GAP;
+            ctx.fillStyle = color;
+            ctx.strokeStyle = color;
+            ctx.textAlign = left ? 'right' : 'left';
+            for (const v of ticks(range[0], range[1], p.h / 50)) {
+                const y = toY(v);
+                ctx.beginPath(); ctx.moveTo(x, y); ctx.lineTo(x + (left ? -4 : 4), y); ctx.stroke();
+                ctx.fillText(format(v), x + (left ? -6 : 6), y + 4);
+            }
+            ctx.save();
+            ctx.translate(left ? 14 : x + AXIS_GAP - 8, p.y + p.h / 2);
+            ctx.rotate(-Math.PI / 2);
+            ctx.textAlign = 'center';
+            ctx.fillText(label, 0, 0);
+            ctx.restore();
+        }
+
+        drawBand(s, color, toY) {
+            const ctx = this.ctx;
+            const from = Math.max(lowerBound(s.time, this.view[0]) - 1, 0);
+            const to = Math.min(lowerBound(s.time, this.view[1]) + 1, s.time.length);
+            if (to <= from) return;
+            const half = s.bucket_s / 2;
+
+            ctx.globalAlpha = 0.25;
+            ctx.fillStyle = color;
+            ctx.beginPath();
+            for (let i = from; i < to; i++) ctx.lineTo(this.toPx(s.time[i] + half), toY(s.max[i]));
+            for (let i = to - 1; i >= from; i--) ctx.lineTo(this.toPx(s.time[i] + half), toY(s.min[i]));
+            ctx.closePath();
+            ctx.fill();
+            ctx.globalAlpha = 1;
+
+            ctx.strokeStyle = color;
+            ctx.lineWidth = 1.5;
+            ctx.beginPath();
+            for (let i = from; i < to; i++) ctx.lineTo(this.toPx(s.time[i] + half), toY(s.mean[i]));
+            ctx.stroke();
+        }
+
+        drawPoints(s, color, toY) {
+            const ctx = this.ctx;
+            ctx.fillStyle = color;
+            ctx.globalAlpha = 0.7;
+            for (let i = 0; i < s.x.length; i++) {
+                ctx.fillRect(this.toPx(s.x[i]) - 2, toY(s.y[i]) - 2, 4, 4);
+            }
+            ctx.globalAlpha = 1;
+        }
+
+        drawHover(keys, ranges) {
+            if (!this.hover) return;
+            const ctx = this.ctx;
+            const p = this.plot();
+            const { px, py } = this.hover;
+            if (px < p.x || px > p.x + p.w || py < p.y || py > p.y + p.h) return;
+
+            const lines = [];
+            if (this.data.kind === 'time') {
+                const t = this.fromPx(px);
+                lines.push(this.data.x_label + ': ' + format(t));
+                for (const key of keys) {
+                    const s = this.data.series[key];
+                    const i = Math.min(lowerBound(s.time, t - s.bucket_s), s.time.length - 1);
+                    if (i < 0 || Math.abs(s.time[i] + s.bucket_s / 2 - t) > s.bucket_s * 2) continue;
+                    const spread = s.min[i] === s.max[i] ? '' : ' (' + format(s.min[i]) + ' – ' + format(s.max[i]) + ')';
+                    lines.push(s.label + ': ' + format(s.mean[i]) + spread);
+                }
+                ctx.strokeStyle = '#555';
+                ctx.beginPath(); ctx.moveTo(px, p.y); ctx.lineTo(px, p.y + p.h); ctx.stroke();
+            } else {
+                let best = null;
+                for (const key of keys) {
+                    const s = this.data.series[key];
+                    const range = ranges[key];
+                    for (let i = 0; i < s.x.length; i++) {
+                        const dx = this.toPx(s.x[i]) - px;
+                        const dy = p.y + p.h - (s.y[i] - range[0]) / (range[1] - range[0]) * p.h - py;
+                        const d = dx * dx + dy * dy;
+                        if (d < 100 && (!best || d < best.d)) best = { d: d, s: s, i: i };
+                    }
+                }
+                if (!best) return;
+                lines.push(this.data.x_label + ': ' + format(best.s.x[best.i]));
+                lines.push(best.s.label + ': ' + format(best.s.y[best.i]));
+            }
+
+            const width = Math.max(...lines.map((line) => ctx.measureText(line).width)) + 12;
+            const x = px + width + 12 > p.x + p.w ? px - width - 8 : px + 8;
+            ctx.fillStyle = 'rgba(255, 255, 255, 0.9)';
+            ctx.strokeStyle = '#888';
+            ctx.fillRect(x, p.y + 8, width, lines.length * 16 + 8);
+            ctx.strokeRect(x, p.y + 8, width, lines.length * 16 + 8);
+            ctx.fillStyle = '#000';
+            ctx.textAlign = 'left';
+            lines.forEach((line, i) => ctx.fillText(line, x + 6, p.y + 24 + i * 16));
+        }
+    }
+
+    window.FlightChart = FlightChart;
+})();
@@ -0,0 +1,213 @@
+"""
+Admission control for the jobs that hold a whole log in memory.
+
+The log explorers keep every decoded message of a log in memory (a DFMessage costs ~500 bytes,
+more than ten times its size in the .bin), so a few concurrent explorer requests on large logs
+can push the server into swap. Before such a job starts, its memory is estimated from the log's
+size and message mix (for the whole log, even when a time window is selected), and the job waits
+until the worker's memory budget has room for it and a heavy-job slot is free. A job that is still waiting after ADMISSION_QUEUE_SECONDS is turned away
+with 503 and Retry-After; one that could never fit the budget is refused with 413.
+
+A compressed log is read through its decompressed copy, kept in the upload store beside the log
+(see compressed_logs.py). When a job is about to make that copy, its size is estimated too and the
+store evicts older logs to make room for it first; a copy that could never fit the store's quota
+is refused with 413.
+
+The explorers then run in a worker process that is killed if its resident memory goes well past
+the estimate, so a log the estimate got wrong cannot take the host down either.
+
+Budgets are per Flask worker process, like the metrics: size them for the number of workers.
+"""
+
+import os
+import time
+import threading
+from functools import lru_cache
+from contextlib import contextmanager
+from flask import current_app
+from tools.compressed_logs import (iter_log_chunks, log_extension, is_compressed, split_member, member_size,
+                                   keeping_copies, has_current_copy)
+from tools.worker_pool import run_isolated, MemoryLimitExceeded
+from webapp.utils import metrics
+from webapp.utils.upload_store import get_store
+
+BASE_JOB_BYTES = 64 << 20  # interpreter, pymavlink/pyulog and the request around the decode
+DFMESSAGE_BYTES = 260  # one pymavlink DFMessage with an empty field dict ...
+DFMESSAGE_FIELD_BYTES = 24  # ... and per field
+ULG_BYTES_PER_LOG_BYTE = 3  # decoded .ulg topics against the log's size
+COMPRESSION_RATIO = 4  # assumed for compressed logs that are longer than the sample
+SAMPLE_BYTES = 1 << 20
+
+# kind: (share of a full in-memory decode held at once, uses a heavy-job slot, runs isolated)
+JOB_KINDS = {
+    'explorer': (1.0, True, True),
+    'report': (0.5, True, False),  # charts render in the worker pool
+}
+
+DEFAULT_HEAVY_JOBS = 2
+DEFAULT_QUEUE_SECONDS = 30
+RSS_LIMIT_FACTOR = 2  # an isolated job is killed past this multiple of its estimate ...
+RSS_LIMIT_SLACK = 256 << 20  # ... or its estimate plus this, whichever is larger
+
+ADMISSIONS = metrics.Counter('flight_tools_admissions_total',
+                             'Heavy-job admission decisions by kind and result (admitted/queued/rejected/killed)',
+                             ('kind', 'result'))
+RESERVED_BYTES = metrics.Gauge('flight_tools_admission_reserved_bytes', 'Estimated memory of the jobs running now')
+RESERVED_BYTES.set(0)
+
+class AdmissionRejected(Exception):
+    """A job the server cannot take now (status 503, retry later) or at all (status 413)."""
+
+    def __init__(self, message, status=503, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+def default_memory_budget():
+    """Half of physical memory, or 4 GB where it cannot be read."""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // 2
+    except (ValueError, OSError, AttributeError):
+        return 4 << 30
+
+@lru_cache(maxsize=256)
+def _decoded_bytes(path, size, mtime):
+    """Estimated memory of every message of the log decoded at once (size and mtime key the cache)."""
+    if log_extension(path) != '.bin':
+        if is_compressed(path):
+            size *= COMPRESSION_RATIO
+        return size * ULG_BYTES_PER_LOG_BYTE
+
+    from tools.bin_stream_decoder import BinStreamDecoder
+
+    # ✅ The message mix of the first MB: how many messages per byte, and how many fields each
+    decoder = BinStreamDecoder()
+    chunks = iter_log_chunks(path, SAMPLE_BYTES)
+    sample = next(chunks, b'')
+    decoder.feed(sample)
+    whole_log = next(chunks, None) is None
+    chunks.close()
+    if not decoder.total_messages:
+        return size * DFMESSAGE_BYTES // 40  # no readable records; assume ~40-byte messages
+    fields = decoder.field_names()
+    per_message = sum(count * (DFMESSAGE_BYTES + DFMESSAGE_FIELD_BYTES * len(fields.get(name, ())))
+                      for name, count in decoder.counts.items()) / decoder.total_messages
+    if whole_log:
+        messages = decoder.total_messages
+    else:
+        log_bytes = size * COMPRESSION_RATIO if is_compressed(path) else size
+        messages = decoder.total_messages * log_bytes / len(sample)
+    return int(messages * per_message)
+
+def estimate_job_memory(kind, filepath):
+    """Estimated peak memory in bytes of a job of kind on filepath."""
+    share = JOB_KINDS[kind][0]
+    st = os.stat(split_member(filepath)[0])
+    return BASE_JOB_BYTES + int(share * _decoded_bytes(filepath, st.st_size, st.st_mtime))
+
+def estimate_job_disk(filepath):
+    """Estimated bytes a job on filepath writes to the upload store: a compressed log's decompressed copy."""
+    if not is_compressed(filepath) or not keeping_copies() or has_current_copy(filepath):
+        return 0
+    size = member_size(filepath)
+    return size if size is not None else os.path.getsize(filepath) * COMPRESSION_RATIO
+
+def make_room(filepath):
+    """Evict older logs so the store has room for the copy a job on filepath makes; raises AdmissionRejected."""
+    disk = estimate_job_disk(filepath)
+    if not disk:
+        return
+    store = get_store()
+    if disk > store.quota_bytes:
+        raise AdmissionRejected(f"This log decompresses to about {_mb(disk)}, more than the upload store's "
+                                f"{_mb(store.quota_bytes)}; use the command-line tools for it.", status=413)
+    store.enforce_quota(reserve=disk)
+
+def rss_limit(estimate, budget):
+    """Resident memory an isolated job may reach before it is killed."""
+    return min(max(estimate * RSS_LIMIT_FACTOR, estimate + RSS_LIMIT_SLACK), budget)
+
+def _mb(n):
+    return f"{n / (1 << 20):.0f} MB"
+
+class AdmissionController:
+    """Memory reservations and heavy-job slots of one worker process; see the module docstring."""
+
+    def __init__(self, memory_bytes, heavy_jobs=DEFAULT_HEAVY_JOBS, queue_seconds=DEFAULT_QUEUE_SECONDS):
+        self.memory_bytes = memory_bytes
+        self.heavy_jobs = heavy_jobs
+        self.queue_seconds = queue_seconds
+        self.reserved = 0
+        self.running = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def _fits(self, estimate, heavy):
+        return self.reserved + estimate <= self.memory_bytes and (not heavy or self.running < self.heavy_jobs)
+
+    @contextmanager
+    def admit(self, kind, estimate):
+        """Reserve estimate bytes (and a heavy-job slot) for the block; raises AdmissionRejected."""
+        heavy = JOB_KINDS[kind][1]
+        if estimate > self.memory_bytes:
+            ADMISSIONS.inc(kind=kind, result='rejected')
+            raise AdmissionRejected(f"This log needs about {_mb(estimate)} of memory, more than the server's "
+                                    f"{_mb(self.memory_bytes)} budget; use the command-line tools for it.", status=413)
+        deadline = time.monotonic() + self.queue_seconds
+        with self._cond:
+            if not self._fits(estimate, heavy):
+                ADMISSIONS.inc(kind=kind, result='queued')
+                self.waiting += 1
+                metrics.JOB_QUEUE_DEPTH.set(self.waiting)
+                try:
+                    while not self._fits(estimate, heavy):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            ADMISSIONS.inc(kind=kind, result='rejected')
+                            raise AdmissionRejected("The server is busy with other large logs; try again shortly.",
+                                                    status=503, retry_after=self.queue_seconds)
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+                    metrics.JOB_QUEUE_DEPTH.set(self.waiting)
+            ADMISSIONS.inc(kind=kind, result='admitted')
+            self.reserved += estimate
+            self.running += heavy
+            RESERVED_BYTES.set(self.reserved)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.reserved -= estimate
+                self.running -= heavy
+                RESERVED_BYTES.set(self.reserved)
+                self._cond.notify_all()
+
+def get_controller(app=None):
+    """The AdmissionController of app (default: the current app) for its ADMISSION_* settings."""
+    app = app or current_app
+    settings = (app.config.get('ADMISSION_MEMORY_BYTES') or default_memory_budget(),
+                app.config.get('ADMISSION_HEAVY_JOBS', DEFAULT_HEAVY_JOBS),
+                app.config.get('ADMISSION_QUEUE_SECONDS', DEFAULT_QUEUE_SECONDS))
+    controller = app.extensions.get('admission')
+    if controller is None or (controller.memory_bytes, controller.heavy_jobs, controller.queue_seconds) != settings:
+        controller = app.extensions['admission'] = AdmissionController(*settings)
+    return controller
+
+def run_job(kind, filepath, func, *args):
+    """
+    func(*args), a job of kind on filepath, once admitted; isolated kinds run in a worker process
+    under a resident memory limit. Raises AdmissionRejected when the job is refused or killed.
+    """
+    controller = get_controller()
+    estimate = estimate_job_memory(kind, filepath)
+    with get_store().pinned(filepath), controller.admit(kind, estimate):  # ✅ Not evicted while queued or running
+        make_room(filepath)
+        if not JOB_KINDS[kind][2]:
+            return func(*args)
+        limit = rss_limit(estimate, controller.memory_bytes)
+        try:
+            return run_isolated(func, args, limit, preload=(func.__module__,))
+        except MemoryLimitExceeded as e:
+            ADMISSIONS.inc(kind=kind, result='killed')
+            raise AdmissionRejected(f"{e}; use the command-line tools for this log.", status=413) from None
@@ -0,0 +1,190 @@
+"""
+Resumable chunked uploads, for logs too large to send reliably in one multipart POST.
+
+A client announces the log (name, size and, ideally, its sha256), then sends fixed-size chunks in
+any order and in parallel, each with its own sha256. Chunks are written straight into place in an
+assembly file under UPLOAD_FOLDER/.chunks/<upload_id>/, next to one marker per verified chunk, so
+an interrupted upload resumes by asking which chunks are still missing. Announcing the same log
+again gives the same upload_id, in the chunk size it started with. Completing the upload hashes the
+assembled file and moves it into the upload store (see upload_store.py), where the form pages find
+it by name like any upload.
+
+If the announced sha256 is already in the store, nothing needs to be sent at all. An announcement
+larger than the upload limit, or than the room the store's quota leaves beside the uploads already in
+progress, is refused; the assembly files count against the quota until they are completed.
+"""
+
+import os
+import re
+import time
+import uuid
+import shutil
+import hashlib
+from werkzeug.utils import secure_filename
+from tools.log_cache import read_json, write_json
+from tools.compressed_logs import is_log_name
+
+CHUNKS_DIR = '.chunks'
+META_NAME = 'upload.json'
+DATA_NAME = 'data.part'
+MARKER_SUFFIX = '.ok'
+
+DEFAULT_CHUNK_SIZE = 8 << 20
+MIN_CHUNK_SIZE = 256 << 10
+MAX_CHUNK_SIZE = 64 << 20
+STALE_AGE = 24 * 3600  # an upload untouched this long is abandoned
+CREATE_WAIT_SECONDS = 5  # how long a repeated announcement waits for the first one to set up
+HASH_CHUNK_SIZE = 1 << 20
+
+_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+def _upload_dir(root, upload_id):
+    if not _UPLOAD_ID.match(upload_id or ''):
+        raise LookupError(f"Unknown upload: {upload_id}")
+    return os.path.join(root, CHUNKS_DIR, upload_id)
+
+def _load(root, upload_id):
+    path = _upload_dir(root, upload_id)
+    meta = read_json(os.path.join(path, META_NAME))
+    if meta is None:
+        raise LookupError(f"Unknown upload: {upload_id}")
+    return path, meta
+
+def _received(path):
+    return {int(name[:-len(MARKER_SUFFIX)]) for name in os.listdir(path) if name.endswith(MARKER_SUFFIX)}
+
+def reserved_bytes(root, exclude=None):
+    """Bytes announced by the uploads in progress under root (other than exclude)."""
+    chunks_dir = os.path.join(root, CHUNKS_DIR)
+    if not os.path.isdir(chunks_dir):
+        return 0
+    total = 0
+    for entry in os.scandir(chunks_dir):
+        if entry.name != exclude:
+            meta = read_json(os.path.join(entry.path, META_NAME))
+            total += meta['size'] if meta else 0
+    return total
+
+def upload_status(root, upload_id):
+    """{'upload_id', 'filename', 'size', 'chunk_size', 'chunks', 'missing'} of an upload in progress."""
+    path, meta = _load(root, upload_id)
+    received = _received(path)
+    return dict(meta, upload_id=upload_id, complete=False,
+                missing=[i for i in range(meta['chunks']) if i not in received])
+
+def create_upload(store, filename, size, chunk_size=None, sha256=None, max_size=None):
+    """
+    Start (or resume) the upload of a log; returns upload_status(), or {'complete': True, ...} when
+    the announced sha256 is already stored. Raises ValueError for an unusable announcement,
+    including a size above max_size or the store's quota.
+    """
+    name = secure_filename(filename or '')
+    if not name or not is_log_name(name):
+        raise ValueError("Expected a .bin or .ulg log (optionally .gz/.xz/.zst) or a .zip bundle")
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        raise ValueError("size must be a positive number of bytes")
+    limit = store.quota_bytes if max_size is None else min(max_size, store.quota_bytes)
+    if size > limit:
+        raise ValueError(f"size must not exceed {limit} bytes")
+    chunk_size = DEFAULT_CHUNK_SIZE if chunk_size is None else chunk_size
+    if not isinstance(chunk_size, int) or not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(f"chunk_size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes")
+    if sha256 is not None:
+        sha256 = str(sha256).lower()
+        if not _SHA256.match(sha256):
+            raise ValueError("sha256 must be 64 hex digits")
+        stored = store.link(sha256, name)
+        if stored is not None:  # ✅ Already uploaded (under any name): nothing to send
+            return {'complete': True, 'filename': os.path.basename(stored), 'sha256': sha256, 'size': size}
+        # ✅ The same log resumes the same upload, in the chunk size it was started with
+        upload_id = hashlib.sha256(f"{name}\0{size}\0{sha256}".encode()).hexdigest()[:32]
+    else:
+        upload_id = uuid.uuid4().hex
+
+    path = _upload_dir(store.root, upload_id)
+    meta_path = os.path.join(path, META_NAME)
+    if read_json(meta_path) is None:
+        if reserved_bytes(store.root, exclude=upload_id) + size > store.quota_bytes:
+            raise ValueError("Not enough room for this upload beside the uploads in progress; try again later")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.mkdir(path)  # ✅ Exclusive: of two identical announcements only one sets the upload up
+        except FileExistsError:
+            deadline = time.monotonic() + CREATE_WAIT_SECONDS
+            while read_json(meta_path) is None and time.monotonic() < deadline:
+                time.sleep(0.05)
+        else:
+            with open(os.path.join(path, DATA_NAME), 'wb') as f:
+                f.truncate(size)
+            write_json(meta_path, {
+                'filename': name,
+                'size': size,
+                'chunk_size': chunk_size,
+                'chunks': -(-size // chunk_size),
+                'sha256': sha256,
+            })
+    return upload_status(store.root, upload_id)
+
+def write_chunk(root, upload_id, index, data, checksum):
+    """
+    Verify one chunk against its sha256 and write it into place; chunks may arrive in any order
+    and concurrently. Returns {'index', 'received', 'chunks'}; raises ValueError if it does not fit.
+    """
+    path, meta = _load(root, upload_id)
+    if not 0 <= index < meta['chunks']:
+        raise ValueError(f"Chunk {index} is out of range (0-{meta['chunks'] - 1})")
+    offset = index * meta['chunk_size']
+    expected = min(meta['chunk_size'], meta['size'] - offset)
+    if len(data) != expected:
+        raise ValueError(f"Chunk {index} must be {expected} bytes, got {len(data)}")
+    if not checksum or hashlib.sha256(data).hexdigest() != checksum.lower():
+        raise ValueError(f"Chunk {index} does not match its sha256")
+
+    with open(os.path.join(path, DATA_NAME), 'r+b') as f:  # ✅ Own handle: parallel chunks never share a file position
+        f.seek(offset)
+        f.write(data)
+    with open(os.path.join(path, f"{index}{MARKER_SUFFIX}"), 'w') as f:
+        f.write(checksum.lower())
+    return {'index': index, 'received': len(_received(path)), 'chunks': meta['chunks']}
+
+def complete_upload(store, upload_id):
+    """
+    Hash the assembled log and move it into the store; returns {'complete': True, 'filename',
+    'sha256', 'size'}. Raises ValueError while chunks are missing or if the log's sha256 differs.
+    """
+    path, meta = _load(store.root, upload_id)
+    missing = meta['chunks'] - len(_received(path))
+    if missing:
+        raise ValueError(f"{missing} of {meta['chunks']} chunks are still missing")
+
+    data_path = os.path.join(path, DATA_NAME)
+    digest = hashlib.sha256()
+    with open(data_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(block)
+    sha256 = digest.hexdigest()
+    if meta['sha256'] and sha256 != meta['sha256']:
+        shutil.rmtree(path, ignore_errors=True)
+        raise ValueError("The assembled log does not match the announced sha256; upload it again")
+
+    stored = store.add(data_path, sha256, meta['filename'])
+    shutil.rmtree(path, ignore_errors=True)
+    return {'complete': True, 'filename': os.path.basename(stored), 'sha256': sha256, 'size': meta['size']}
+
+def remove_stale_uploads(root, max_age=STALE_AGE):
+    """Delete uploads that received nothing for max_age seconds; returns how many."""
+    chunks_dir = os.path.join(root, CHUNKS_DIR)
+    if not os.path.isdir(chunks_dir):
+        return 0
+    removed = 0
+    now = time.time()
+    for entry in os.scandir(chunks_dir):
+        try:
+            touched = max([entry.stat().st_mtime] + [f.stat().st_mtime for f in os.scandir(entry.path)])
+        except OSError:
+            continue
+        if now - touched > max_age:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
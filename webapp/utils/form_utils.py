@@ -0,0 +1,30 @@
+from tools.flight_segments import segment_window
+from tools.compressed_logs import LOG_EXTENSIONS, log_extension
+from webapp.utils.upload_store import get_store
+
+def time_window_from_form(form, filepath=None):
+    """
+    (start, end, error) from the optional 'start'/'end' form fields (seconds since boot) and,
+    once the log is saved at filepath, the optional 'segment' selector.
+    """
+    selector = (form.get('segment') or '').strip() if filepath else None
+    try:
+        start, end = segment_window(filepath, selector, form.get('start'), form.get('end'))
+    except ValueError as e:
+        return None, None, str(e)
+    return start, end, None
+
+def is_log_upload(filename, extensions=LOG_EXTENSIONS):
+    """
+    True for an upload name of a log with one of the extensions, plain or compressed. A .zip
+    bundle is accepted here; the tool checks what it holds once it is saved.
+    """
+    ext = log_extension(filename or '')
+    return ext == '.zip' or ext in extensions
+
+def uploaded_log_path(filename):
+    """Stored path of the latest (possibly compressed) .bin/.ulg upload named filename, or None if there is no such log."""
+    filepath = get_store().resolve(filename)
+    if filepath is None or log_extension(filepath) not in LOG_EXTENSIONS:
+        return None
+    return filepath
@@ -0,0 +1,88 @@
+"""
+Background indexing of uploaded logs (see tools/log_index.py).
+
+An upload to an info or explorer page queues the log's index on a one-worker process pool and
+returns at once; the explorer shows the build's progress and picks up the message types and field
+lists from the index when it is ready, instead of decoding the whole log again at every step.
+Progress lives in the index file beside the log, so every Flask worker (and the CLI) sees it.
+"""
+
+import sys
+import threading
+from contextlib import ExitStack
+from tools.log_index import read_index_status, load_log_index, is_pending, mark_queued, build_log_index_status, explorer_step
+from tools.worker_pool import get_pool, discard_pool
+from webapp.utils import metrics
+from webapp.utils.admission import run_job, make_room, AdmissionRejected
+from webapp.utils.upload_store import get_store
+
+INDEX_WORKERS = 1  # builds share the machine with the requests; one at a time
+
+INDEX_BUILDS = metrics.Counter('flight_tools_index_builds_total', 'Background log index builds by result',
+                               ('result',))
+
+_pending = {}
+_lock = threading.Lock()
+
+def _finished(filepath, pin, future):
+    with _lock:
+        _pending.pop(filepath, None)
+    pin.close()
+    try:
+        result = future.result()
+    except Exception as e:
+        result = {'error': str(e)}
+    INDEX_BUILDS.inc(result='error' if 'error' in result else 'built')
+
+def start_indexing(filepath):
+    """Queue the index of filepath unless it is ready, failed or already on its way; never raises."""
+    with _lock:
+        if filepath in _pending:
+            return
+        entry = read_index_status(filepath)
+        if entry is not None and (entry['state'] in ('ready', 'error') or is_pending(entry)):
+            return
+        pin = ExitStack()
+        try:
+            pin.enter_context(get_store().pinned(filepath))  # ✅ Not evicted while it is indexed
+            make_room(filepath)
+            mark_queued(filepath)
+            future = get_pool('log_index', INDEX_WORKERS, preload=['tools.log_index']).submit(build_log_index_status, filepath)
+        except AdmissionRejected as e:
+            pin.close()
+            print(f"⚠️  Not indexing {filepath}: {e}", file=sys.stderr)
+            return
+        except Exception as e:
+            pin.close()
+            print(f"⚠️  Indexing unavailable ({e})", file=sys.stderr)
+            discard_pool('log_index')
+            return
+        _pending[filepath] = future
+    future.add_done_callback(lambda f: _finished(filepath, pin, f))
+
+def index_progress(filepath):
+    """{'state', 'step', 'progress'} of the log's index; state 'missing' when none was started."""
+    entry = read_index_status(filepath)
+    if entry is None:
+        return {'state': 'missing', 'step': None, 'progress': 0.0}
+    status = {key: entry.get(key) for key in ('state', 'step', 'progress')}
+    if entry['state'] == 'error':
+        status['error'] = entry.get('error')
+    return status
+
+def explore(explore_file, filepath, start, end, msg_type=None, field_name=None):
+    """
+    An explorer step: the type and field lists of the whole log come from its index when it is
+    ready; field values and windowed steps are decoded as an admitted job.
+    """
+    if start is None and end is None and field_name is None:
+        index = load_log_index(filepath)
+        if index is not None:
+            metrics.record_cache_lookup('log_index', True)
+            return explorer_step(index, msg_type)
+        metrics.record_cache_lookup('log_index', False)
+    return run_job('explorer', filepath, explore_file, filepath, start, end, msg_type, field_name)
+
+def field_rows(columns):
+    """(time, value) rows of a field-values step's columns, produced as the page renders them."""
+    return zip(columns['time'], columns['value'])
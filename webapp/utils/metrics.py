@@ -0,0 +1,199 @@
+"""
+Minimal in-process metrics registry rendered in the Prometheus text exposition format.
+
+Each worker process keeps its own registry, and behind a multi-worker server each scrape is
+answered by whichever worker takes it. Every series therefore carries the worker's 'pid' label,
+so the counts of different workers are separate series that never look like a counter reset, and
+totals are summed over it, e.g. sum without (pid) (rate(flight_tools_http_requests_total[5m])).
+"""
+
+import os
+import sys
+import threading
+
+_lock = threading.Lock()
+_registry = []
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Stages that render charts rather than decode logs (see tools/profiling.py)
+RENDER_STAGES = ('savefig', 'encode')
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        with _lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        return tuple((name, str(labels.get(name, ''))) for name in self.labelnames)
+
+    def samples(self):
+        with _lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        pid = (('pid', str(os.getpid())),)  # ✅ Keeps each worker's series apart (see the module docstring)
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(pid + labels)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        with _lock:
+            return self._values.get(self._key(labels), 0)
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labelnames=(), callback=None):
+        super().__init__(name, help_text, labelnames)
+        self._callback = callback  # returns [(labels dict, value)] at scrape time
+
+    def set(self, value, **labels):
+        with _lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self._callback is None:
+            return super().samples()
+        return [(self.name, self._key(labels), value) for labels, value in self._callback()]
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        out = []
+        with _lock:
+            items = [(key, (list(counts), total)) for key, (counts, total) in self._values.items()]
+        for key, (counts, total) in items:
+            for bound, count in zip(self.buckets, counts):
+                out.append((f"{self.name}_bucket", key + (('le', _format_value(bound)),), count))
+            out.append((f"{self.name}_sum", key, total))
+            out.append((f"{self.name}_count", key, counts[-1]))
+        return out
+
+def render_metrics():
+    """All registered metrics in Prometheus text format."""
+    with _lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# --- Process gauges ---
+
+def _rss_bytes():
+    """Current resident set size; falls back to peak RSS where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return 0
+
+def _cache_hit_ratios():
+    ratios = {}
+    for _, labels, value in CACHE_REQUESTS.samples():
+        label_map = dict(labels)
+        hits, total = ratios.get(label_map['cache'], (0, 0))
+        if label_map['result'] == 'hit':
+            hits += value
+        ratios[label_map['cache']] = (hits, total + value)
+    return [({'cache': cache}, hits / total if total else 0.0) for cache, (hits, total) in ratios.items()]
+
+# --- Flight-Tools metrics ---
+
+HTTP_REQUESTS = Counter('flight_tools_http_requests_total', 'HTTP requests by route, method and status',
+                        ('route', 'method', 'status'))
+HTTP_LATENCY = Histogram('flight_tools_http_request_duration_seconds', 'HTTP request latency by route',
+                         ('route', 'method'))
+REQUESTS_IN_PROGRESS = Gauge('flight_tools_http_requests_in_progress', 'HTTP requests currently being served')
+UPLOAD_BYTES = Counter('flight_tools_upload_bytes_total', 'Request body bytes received on uploads by route',
+                       ('route',))
+PARSE_DURATION = Histogram('flight_tools_parse_duration_seconds',
+                           'Log decode/extract time per request (chart rendering excluded) by log type',
+                           ('log_type',))
+STAGE_DURATION = Histogram('flight_tools_stage_duration_seconds', 'Time spent in each instrumented stage',
+                           ('log_type', 'stage'))
+CACHE_REQUESTS = Counter('flight_tools_cache_requests_total', 'Cache lookups by cache and result (hit/miss)',
+                         ('cache', 'result'))
+CACHE_HIT_RATIO = Gauge('flight_tools_cache_hit_ratio', 'Cache hits / lookups since worker start',
+                        ('cache',), callback=_cache_hit_ratios)
+JOB_QUEUE_DEPTH = Gauge('flight_tools_job_queue_depth', 'Jobs waiting for a worker slot')
+JOB_QUEUE_DEPTH.set(0)
+WORKER_RSS = Gauge('flight_tools_worker_rss_bytes', 'Resident memory of this worker process',
+                   callback=lambda: [({}, _rss_bytes())])
+
+def record_cache_lookup(cache, hit):
+    """Count one cache lookup; caches call this so hit ratios show up on /metrics."""
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+def observe_stages(log_type, recorder):
+    """Feed a request's StageRecorder into the stage and parse-duration histograms."""
+    parse_seconds = 0.0
+    for path, _, seconds in recorder.events:
+        STAGE_DURATION.observe(seconds, log_type=log_type, stage=path[-1])
+        if len(path) == 1:
+            parse_seconds += seconds
+        # Subtract outermost rendering stages so only decode/extract time remains
+        is_render = path[-1] in RENDER_STAGES or path[-1].startswith('generate_')
+        if is_render and not any(p in RENDER_STAGES or p.startswith('generate_') for p in path[:-1]):
+            parse_seconds -= seconds
+    if recorder.events:
+        PARSE_DURATION.observe(max(parse_seconds, 0.0), log_type=log_type)
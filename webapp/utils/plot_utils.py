@@ -1,10 +1,13 @@
 import io
 import base64
 import matplotlib.pyplot as plt
+from tools.profiling import stage
 
 def render_plot_to_base64(fig):
     buf = io.BytesIO()
-    fig.savefig(buf, format='png')
-    buf.seek(0)
-    encoded = base64.b64encode(buf.read()).decode('utf-8')
+    with stage("savefig"):
+        fig.savefig(buf, format='png')
+    with stage("encode"):
+        buf.seek(0)
+        encoded = base64.b64encode(buf.read()).decode('utf-8')
     return f"data:image/png;base64,{encoded}"
@@ -0,0 +1,163 @@
+"""
+Streaming upload handling: decode logs while the request body is still arriving.
+
+StreamingRequest replaces Werkzeug's temporary upload file with a StreamingUpload that writes
+each chunk straight into UPLOAD_FOLDER and hashes it. For the views marked @decode_uploads (the ones
+that read streamed_result()) it also feeds each chunk to the .bin/.ulg stream decoder. By the time
+the route runs, the file is already on disk and the summary is already decoded, and saving it into the upload store (see upload_store.py) is a rename keyed by the finished hash.
+A form may instead name a log already sent through the chunked upload API (see chunked_upload.py);
+uploaded_file() presents both the same way to the routes.
+A .gz/.xz/.zst upload is decompressed on the way into the decoder (the file is saved as sent);
+a .zip bundle is left to the tools once it is saved.
+"""
+
+import os
+import time
+import hashlib
+from flask import Request, request, current_app
+from werkzeug.datastructures import FileStorage
+from tools.profiling import current_recorder
+from tools.bin_stream_decoder import BinStreamDecoder
+from tools.ulg_stream_decoder import UlgStreamDecoder
+from tools.compressed_logs import compression, log_extension, stream_decompressor
+from webapp.utils.upload_store import get_store
+
+STREAM_DECODERS = {
+    '.bin': BinStreamDecoder,
+    '.ulg': UlgStreamDecoder,
+}
+
+class StreamingUpload:
+    """Writable/readable upload container that tees chunks to disk, sha256 and a decoder."""
+
+    def __init__(self, store, filename=None, decode=True):
+        self._file = store.new_partial()
+        self.path = self._file.name
+        self.bytes_received = 0
+        self.decode_seconds = 0.0
+        self._hash = hashlib.sha256()
+        self._persisted = False
+        self._result = None
+
+        decoder_cls = STREAM_DECODERS.get(log_extension(filename or '')) if decode else None
+        self.decoder = decoder_cls(filename) if decoder_cls else None
+        self._decompressor = None
+        kind = compression(filename or '')
+        if self.decoder is not None and kind is not None:
+            try:
+                self._decompressor = stream_decompressor(kind)
+            except ValueError:
+                self._decompressor = None
+            if self._decompressor is None:
+                self.decoder = None  # ✅ Decoded from the saved file instead
+
+    def write(self, data):
+        self._file.write(data)
+        self._hash.update(data)
+        self.bytes_received += len(data)
+        if self.decoder is not None:
+            started = time.perf_counter()
+            try:
+                self.decoder.feed(self._decompressor.decompress(data) if self._decompressor else data)
+            except Exception as e:
+                # A decoder failure must never break the upload; routes fall back to the file
+                print(f"[DEBUG] Stream decoder disabled for {self.path}: {e}")
+                self.decoder = None
+            self.decode_seconds += time.perf_counter() - started
+        return len(data)
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    def result(self):
+        """The decoder's summary for the complete upload, or None if unavailable."""
+        if self.decoder is None:
+            return None
+        if self._result is None:
+            recorder = current_recorder()
+            if recorder is not None:
+                recorder.record('stream_decode', self.decode_seconds)
+            try:
+                self._result = self.decoder.finish()
+            except Exception as e:
+                self._result = {'error': str(e)}
+        if 'error' in self._result:
+            return None
+        return dict(self._result, filename=os.path.basename(self.path))
+
+    def persist(self, store, filename):
+        """Move the already-written upload into the store as filename (replaces FileStorage.save); returns its path."""
+        position = self._file.tell()
+        self._file.close()
+        self.path = store.add(self.path, self.sha256, filename)
+        self._persisted = True
+        self._file = open(self.path, 'rb')
+        self._file.seek(position)
+        return self.path
+
+    def close(self):
+        self._file.close()
+        if not self._persisted and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        # read/seek/tell/readline/flush... go to the underlying file
+        if name == '_file':
+            raise AttributeError(name)
+        return getattr(self._file, name)
+
+class StoredLog:
+    """Stream of a log already in the upload store: a chunked upload named in a form field."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self, size=-1):
+        with open(self.path, 'rb') as f:
+            return f.read(size)
+
+def decode_uploads(view):
+    """Mark a view that uses streamed_result(): its uploads are decoded while they arrive."""
+    view.decode_uploads = True
+    return view
+
+class StreamingRequest(Request):
+    """Flask request class whose file uploads are StreamingUpload containers."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # ✅ Only views that read the summary pay for decoding on the upload path
+        view = current_app.view_functions.get(self.endpoint)
+        return StreamingUpload(get_store(), filename, decode=getattr(view, 'decode_uploads', False))
+
+def uploaded_file(field):
+    """
+    The FileStorage uploaded in field, or, when the field instead holds the name of a completed
+    chunked upload, a FileStorage for that stored log; None if there is neither.
+    """
+    file = request.files.get(field)
+    name = request.form.get(field)
+    if file or not name:
+        return file
+    path = get_store().resolve(name)
+    if path is None:
+        return None
+    return FileStorage(stream=StoredLog(path), filename=os.path.basename(path), name=field)
+
+def save_upload(file, filepath):
+    """
+    Store an uploaded FileStorage under the name of filepath and return the stored log's path,
+    which is what the route should read; a rename when it was streamed to disk.
+    """
+    if isinstance(file.stream, StoredLog):
+        return file.stream.path  # ✅ Already stored by the chunked upload API
+    store = get_store()
+    if isinstance(file.stream, StreamingUpload):
+        return file.stream.persist(store, os.path.basename(filepath))
+    return store.add_stream(file.stream, os.path.basename(filepath))
+
+def streamed_result(file):
+    """Summary decoded while the upload arrived (bin_info/ulg_info keys plus 'parameters'), or None."""
+    if isinstance(file.stream, StreamingUpload):
+        return file.stream.result()
+    return None
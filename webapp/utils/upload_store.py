@@ -0,0 +1,338 @@
+"""
+Content-addressed upload store with filename aliases and a disk quota.
+
+Every uploaded log is kept once per content, as UPLOAD_FOLDER/objects/<sha256>/<name>. Uploading
+the same bytes again (under any name) stores nothing new, and the caches the tools write beside a
+log (parameter sets, segments, pyramids, and the decompressed copy of a compressed log, see
+compressed_logs.py) are shared by every upload of it and count towards the quota. A stored log is never
+rewritten, so a request keeps reading the log it uploaded even if the same name is uploaded again
+meanwhile.
+
+index.json maps each upload name to the sha256 of its latest upload, so the explorer steps and the
+chart APIs keep naming logs by filename. The store (caches included) is held under its quota by
+evicting the least recently used logs after each new upload and from a background janitor, which
+also removes abandoned partial and chunked uploads.
+
+Every worker process of the app shares the store: index.json is only rewritten under a file lock,
+and a job reading a log holds a shared lock on the log's .pin file (see pinned()) for as long as
+it runs, so eviction skips it however long ago the log was uploaded.
+"""
+
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from flask import current_app
+from werkzeug.utils import secure_filename
+from tools.log_cache import read_json, write_json
+from tools.compressed_logs import is_log_name
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single worker process, the thread lock is enough
+    fcntl = None
+
+OBJECTS_DIR = 'objects'
+INDEX_NAME = 'index.json'
+LOCK_NAME = '.index.lock'
+PIN_NAME = '.pin'
+PARTIAL_PREFIX = '.upload-'
+PARTIAL_SUFFIX = '.part'
+
+DEFAULT_QUOTA_BYTES = 2 << 30
+MIN_IDLE_SECONDS = 300  # a log used this recently may still be read by a request; never evicted
+PARTIAL_MAX_AGE = 3600  # partial uploads untouched this long were abandoned
+TOUCH_INTERVAL = 60  # last-used times are only rewritten this often
+JANITOR_INTERVAL = 300
+COPY_CHUNK_SIZE = 1 << 20
+
+def _tree_size(path):
+    """Bytes under path, counting hard-linked aliases of a log once."""
+    total = 0
+    seen = set()
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            if st.st_ino not in seen:
+                seen.add(st.st_ino)
+                total += st.st_size
+    return total
+
+@contextmanager
+def _pin_lock(object_dir, shared):
+    """
+    Lock a stored log's .pin file for the block: shared (a job reads the log; waits for an eviction
+    in progress) or exclusive without waiting (eviction); yields whether the lock was taken.
+    """
+    if fcntl is None:
+        yield shared
+        return
+    try:
+        f = open(os.path.join(object_dir, PIN_NAME), 'a')
+    except OSError:
+        yield shared  # ✅ Evicted already: the job finds the log missing
+        return
+    with f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+class UploadStore:
+    """Uploads under root, keyed by sha256; see the module docstring."""
+
+    def __init__(self, root, quota_bytes=DEFAULT_QUOTA_BYTES):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.objects_dir = os.path.join(root, OBJECTS_DIR)
+        self.index_path = os.path.join(root, INDEX_NAME)
+        self.lock_path = os.path.join(root, LOCK_NAME)
+        self._lock = threading.Lock()  # threads of this process; the file lock covers the others
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive use of index.json across the threads and worker processes of the app."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, 'a') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        index = read_json(self.index_path) or {}
+        index.setdefault('aliases', {})
+        index.setdefault('last_used', {})
+        return index
+
+    def new_partial(self):
+        """Open binary file for an upload still arriving; add() moves it into the store."""
+        return tempfile.NamedTemporaryFile(dir=self.root, prefix=PARTIAL_PREFIX, suffix=PARTIAL_SUFFIX, delete=False)
+
+    def add(self, partial_path, digest, filename):
+        """
+        Move a complete upload (its sha256 already computed while it arrived) into the store under
+        filename; returns the stored path. A duplicate only records the alias.
+        """
+        return self._store(partial_path, digest, filename)
+
+    def link(self, digest, filename):
+        """
+        Record filename for content that is already stored, so it need not be uploaded at all;
+        returns the stored path, or None if no log with that sha256 is stored.
+        """
+        return self._store(None, digest, filename)
+
+    def _store(self, partial_path, digest, filename):
+        name = secure_filename(filename) or digest
+        object_dir = os.path.join(self.objects_dir, digest)
+        path = os.path.join(object_dir, name)
+        with self._locked():
+            is_new = not os.path.isdir(object_dir)
+            if is_new and partial_path is None:
+                return None
+            index = self._load_index()
+            os.makedirs(object_dir, exist_ok=True)
+            if os.path.exists(path):
+                if partial_path is not None:
+                    os.remove(partial_path)  # ✅ Same bytes under the same name: already stored
+            else:
+                same = next((entry.path for entry in os.scandir(object_dir)
+                             if entry.is_file() and is_log_name(entry.name)), None)
+                if same is None and partial_path is None:
+                    return None
+                try:
+                    if same is None:
+                        raise OSError
+                    os.link(same, path)  # ✅ Same bytes under a new name: no second copy
+                    if partial_path is not None:
+                        os.remove(partial_path)
+                except OSError:
+                    if partial_path is not None:
+                        os.replace(partial_path, path)
+                    else:
+                        shutil.copyfile(same, path)  # no hard links on this file system
+            index['aliases'][name] = digest
+            index['last_used'][digest] = time.time()
+            write_json(self.index_path, index)
+        if is_new:
+            self.enforce_quota()
+        return path
+
+    def add_stream(self, stream, filename):
+        """add() for an upload that was not streamed to disk: copy and hash it first."""
+        digest = hashlib.sha256()
+        with self.new_partial() as f:
+            for chunk in iter(lambda: stream.read(COPY_CHUNK_SIZE), b''):
+                f.write(chunk)
+                digest.update(chunk)
+        return self.add(f.name, digest.hexdigest(), filename)
+
+    def resolve(self, filename):
+        """Stored path of the latest upload named filename, or None."""
+        name = secure_filename(filename)
+        with self._locked():
+            index = self._load_index()
+            digest = index['aliases'].get(name)
+            if digest is None:
+                return None
+            path = os.path.join(self.objects_dir, digest, name)
+            if not os.path.exists(path):
+                return None
+            self._touch(index, digest)
+        return path
+
+    def _touch(self, index, digest):
+        now = time.time()
+        if now - index['last_used'].get(digest, 0) > TOUCH_INTERVAL:
+            index['last_used'][digest] = now
+            write_json(self.index_path, index)
+
+    def _digest_of(self, filepath):
+        """sha256 of a stored log's path, or None for a path outside the store."""
+        object_dir = os.path.dirname(os.path.abspath(filepath))
+        if os.path.dirname(object_dir) != os.path.abspath(self.objects_dir):
+            return None
+        return os.path.basename(object_dir)
+
+    @contextmanager
+    def pinned(self, filepath):
+        """
+        Mark a stored log in use for the block: its last use is now, and eviction skips it until
+        the block ends (or the process holding it dies). Paths outside the store are left alone.
+        """
+        digest = self._digest_of(filepath)
+        if digest is None:
+            yield
+            return
+        with self._locked():
+            self._touch(self._load_index(), digest)
+        with _pin_lock(os.path.join(self.objects_dir, digest), shared=True):
+            yield
+
+    def enforce_quota(self, reserve=0):
+        """
+        Evict least recently used logs until the store fits its quota with reserve bytes to spare
+        (for a file a job is about to write into it); returns the evicted sha256s.
+        """
+        with self._locked():
+            index = self._load_index()
+            sizes = {}
+            for entry in os.scandir(self.objects_dir):
+                if entry.is_dir():
+                    sizes[entry.name] = _tree_size(entry.path)
+            # ✅ Uploads still arriving (chunked or streamed) take their room too; they are never evicted
+            total = sum(sizes.values()) + self._in_flight_size() + reserve
+            if total <= self.quota_bytes:
+                return []
+
+            def last_used(digest):
+                return index['last_used'].get(digest) or os.path.getmtime(os.path.join(self.objects_dir, digest))
+
+            now = time.time()
+            evicted = []
+            for digest in sorted(sizes, key=last_used):
+                if total <= self.quota_bytes:
+                    break
+                if now - last_used(digest) < MIN_IDLE_SECONDS:
+                    continue
+                object_dir = os.path.join(self.objects_dir, digest)
+                with _pin_lock(object_dir, shared=False) as free:
+                    if not free:
+                        continue  # ✅ A job (in any worker) is reading it
+                    shutil.rmtree(object_dir, ignore_errors=True)
+                total -= sizes[digest]
+                evicted.append(digest)
+
+            gone = set(evicted)
+            index['aliases'] = {name: d for name, d in index['aliases'].items() if d not in gone and d in sizes}
+            index['last_used'] = {d: t for d, t in index['last_used'].items() if d not in gone and d in sizes}
+            write_json(self.index_path, index)
+        if total > self.quota_bytes:
+            print(f"[WARNING] Upload store over quota ({total} > {self.quota_bytes} bytes, {reserve} of them "
+                  f"reserved); the rest is in use")
+        return evicted
+
+    def _in_flight_size(self):
+        """Bytes of the partial and chunked uploads not yet in the store."""
+        from webapp.utils.chunked_upload import CHUNKS_DIR
+
+        total = _tree_size(os.path.join(self.root, CHUNKS_DIR))
+        for entry in os.scandir(self.root):
+            if entry.name.startswith(PARTIAL_PREFIX) and entry.name.endswith(PARTIAL_SUFFIX):
+                try:
+                    total += entry.stat().st_size
+                except OSError:
+                    pass
+        return total
+
+    def remove_partials(self, max_age=PARTIAL_MAX_AGE):
+        """Delete partial uploads older than max_age seconds; returns how many."""
+        removed = 0
+        now = time.time()
+        for entry in os.scandir(self.root):
+            if entry.name.startswith(PARTIAL_PREFIX) and entry.name.endswith(PARTIAL_SUFFIX):
+                try:
+                    if now - entry.stat().st_mtime > max_age:
+                        os.remove(entry.path)
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
+
+def get_store(app=None):
+    """The UploadStore of app (default: the current app) for its UPLOAD_FOLDER and UPLOAD_QUOTA_BYTES."""
+    app = app or current_app
+    root = app.config['UPLOAD_FOLDER']
+    quota = app.config.get('UPLOAD_QUOTA_BYTES', DEFAULT_QUOTA_BYTES)
+    store = app.extensions.get('upload_store')
+    if store is None or store.root != root or store.quota_bytes != quota:
+        store = app.extensions['upload_store'] = UploadStore(root, quota)
+    return store
+
+_janitor_lock = threading.Lock()
+
+def start_janitor(app, interval=JANITOR_INTERVAL):
+    """
+    Background thread enforcing the quota and clearing abandoned partial uploads every interval
+    seconds; started once per worker process (call it when the process serves its first request,
+    not at import, so forking servers do not inherit a dead thread). Returns the thread.
+    """
+    from webapp.utils.chunked_upload import remove_stale_uploads
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                store = get_store(app)
+                evicted = store.enforce_quota()
+                removed = store.remove_partials() + remove_stale_uploads(store.root)
+                if evicted or removed:
+                    app.logger.info("Upload janitor: evicted %d logs, removed %d partial uploads", len(evicted), removed)
+            except Exception as e:
+                app.logger.warning("Upload janitor failed: %s", e)
+
+    with _janitor_lock:
+        running = app.extensions.get('upload_janitor')
+        if running is not None and running[0] == os.getpid() and running[1].is_alive():
+            return running[1]
+        thread = threading.Thread(target=run, name='upload-janitor', daemon=True)
+        thread.start()
+        app.extensions['upload_janitor'] = (os.getpid(), thread)
+    return thread